@@ -0,0 +1,147 @@
+"""
+Benchmarks the exact banded Dynamic Time Warping of recognition.py against FastDTW. Every recorded gesture is fitted
+with the degree of its recogniser and compared to every template, so that both matching and non-matching pairs are
+measured. For each engine the latency per comparison and the number of accept/reject decisions that differ from
+FastDTW at the threshold of the template's sign are reported.
+
+Since the thresholds of DTW_THRESHOLDS were set with FastDTW, every recogniser of the registry is also run end to end
+on every recording of every sign and on NUM_PERTURBATIONS perturbed copies of each, once with the banded Dynamic Time
+Warping and once with FastDTW in its place at the same thresholds, and the decisions that differ are reported. The
+feature prefilter is disabled and longer recordings are replayed faster, so that the templates decide. Run from the
+Backend directory with `python -m Parametric.Benchmarks.benchmark_dtw`.
+"""
+import contextlib
+import io
+import os
+import time
+from typing import Dict, Tuple
+import numpy as np
+from fastdtw import fastdtw
+from scipy.spatial.distance import euclidean
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from features import load_feature_envelopes
+from gesture import Gesture
+from parameterisation import fit_bezier_batch, evaluate_bezier
+from recognition import dtw_distance, compare_sequences_coarse_to_fine, coarse_to_fine_hit_rates, \
+    DTW_THRESHOLDS, CURVE_METRICS, METRIC_THRESHOLDS, SIGN_METRICS
+from registry import build_registry
+from templates import SIGN_TEMPLATES, split_recording
+from Parametric.Benchmarks.benchmark_point_cloud import REPLAY_DURATION, perturb_gesture
+
+# number of perturbed copies per recording that every recogniser is run on
+NUM_PERTURBATIONS = 20
+# seed of the perturbations, so that the benchmark is reproducible
+SEED = 0
+
+# engines that are compared, each called with two curves and the threshold
+ENGINES = {
+    'fastdtw': lambda seq1, seq2, threshold: fastdtw(seq1, seq2, dist=euclidean)[0],
+    'exact': lambda seq1, seq2, threshold: dtw_distance(seq1, seq2, band=None),
+    'band 20': lambda seq1, seq2, threshold: dtw_distance(seq1, seq2, band=20),
+    'band 10': lambda seq1, seq2, threshold: dtw_distance(seq1, seq2, band=10),
+    'band 20 + abandon': lambda seq1, seq2, threshold: dtw_distance(seq1, seq2, band=20, threshold=threshold),
+    'coarse to fine': lambda seq1, seq2, threshold: compare_sequences_coarse_to_fine(seq1, seq2, threshold),
+    'band 20 squared': lambda seq1, seq2, threshold: dtw_distance(seq1, seq2, band=20, squared=True),
+}
+
+
+def comparison_pairs(parametric_directory: str):
+    """
+    Fits the recorded gestures and pairs every user curve with every template and the threshold of its sign.
+
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: A list of tuples of user curve, template and threshold.
+    """
+    recordings = load_recorded_gestures(parametric_directory)
+    user_curves = []
+    for sign, templates in SIGN_TEMPLATES.items():
+        _, locations = extract_timestamps_and_locations(recordings[sign])
+        controls = fit_bezier_batch(split_recording(sign, locations), degree=templates['degree'])
+        user_curves.extend(evaluate_bezier(controls))
+
+    pairs = []
+    for sign, templates in SIGN_TEMPLATES.items():
+        for template_file in templates['templates']:
+            template = np.load(os.path.join(parametric_directory, template_file))
+            pairs.extend((curve, template, DTW_THRESHOLDS[sign]) for curve in user_curves)
+    return pairs
+
+
+def fastdtw_distance(seq1: np.ndarray, seq2: np.ndarray, threshold: float = None) -> float:
+    """
+    Calculates the FastDTW distance with the signature of recognition.CURVE_METRICS.
+
+    :return: The distance, or infinity if it exceeds the threshold.
+    """
+    distance = fastdtw(seq1, seq2, dist=euclidean)[0]
+    return np.inf if threshold is not None and distance > threshold else distance
+
+
+def recogniser_decisions(gestures: Dict[str, list], fast: bool) -> Dict[Tuple[str, str, int], bool]:
+    """
+    Runs every recogniser of the registry on every gesture, with the banded Dynamic Time Warping or with FastDTW at
+    the same thresholds, which is registered as a metric of its own for the duration of the call.
+
+    :param gestures: The gestures of every recorded sign, each a list of timestamps and locations.
+    :param fast: Whether the recognisers compare with FastDTW.
+    :return: The decision for every recogniser, recorded sign and gesture index.
+    """
+    sign_metrics = dict(SIGN_METRICS)
+    if fast:
+        CURVE_METRICS['fastdtw'] = fastdtw_distance
+        METRIC_THRESHOLDS['fastdtw'] = dict(DTW_THRESHOLDS)
+        SIGN_METRICS.update(dict.fromkeys(DTW_THRESHOLDS, 'fastdtw'))
+    try:
+        registry = build_registry()
+        decisions = {}
+        for sign, recogniser in registry.items():
+            for recorded, copies in gestures.items():
+                for position, (timestamps, locations) in enumerate(copies):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        decisions[(sign, recorded, position)] = recogniser(Gesture(timestamps, locations))
+        return decisions
+    finally:
+        SIGN_METRICS.clear()
+        SIGN_METRICS.update(sign_metrics)
+        METRIC_THRESHOLDS.pop('fastdtw', None)
+        CURVE_METRICS.pop('fastdtw', None)
+
+
+if __name__ == '__main__':
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    pairs = comparison_pairs(parametric_directory)
+    reference = [ENGINES['fastdtw'](*pair) > pair[2] for pair in pairs]
+
+    print(f"{len(pairs)} comparisons of 100-point curves")
+    print(f"{'engine':<20}{'latency [ms]':>14}{'accepted':>10}{'disagreements':>15}")
+    for name, engine in ENGINES.items():
+        start = time.perf_counter()
+        distances = [engine(*pair) for pair in pairs]
+        latency = (time.perf_counter() - start) / len(pairs) * 1e3
+
+        # squared distances are on a different scale and are not compared to the thresholds
+        if name.endswith('squared'):
+            print(f"{name:<20}{latency:>14.3f}{'-':>10}{'-':>15}")
+            continue
+        rejected = [distance > pair[2] for distance, pair in zip(distances, pairs)]
+        disagreements = sum(reject != expected for reject, expected in zip(rejected, reference))
+        print(f"{name:<20}{latency:>14.3f}{rejected.count(False):>10}{disagreements:>15}")
+
+    hit_rates = coarse_to_fine_hit_rates()
+    print('coarse to fine hit rates: ' + ', '.join(f'{stage} {rate:.1%}' for stage, rate in hit_rates.items()))
+
+    # runs the recognisers end to end on the recordings and their perturbed copies
+    rng = np.random.default_rng(SEED)
+    load_feature_envelopes().clear()
+    gestures = {}
+    for sign, recording in load_recorded_gestures(parametric_directory).items():
+        timestamps, locations = extract_timestamps_and_locations(recording)
+        timestamps = np.asarray(timestamps) - timestamps[0]
+        timestamps = timestamps * min(1.0, REPLAY_DURATION / timestamps[-1])
+        locations = np.asarray(locations, dtype=float)
+        gestures[sign] = [(timestamps, locations)] + [(timestamps, perturb_gesture(locations, rng))
+                                                      for _ in range(NUM_PERTURBATIONS)]
+    banded, fast = recogniser_decisions(gestures, fast=False), recogniser_decisions(gestures, fast=True)
+    differing = sorted(key for key in banded if banded[key] != fast[key])
+    print(f"{len(banded)} recogniser decisions, {sum(banded.values())} accepted with the band, "
+          f"{sum(fast.values())} with FastDTW, {len(differing)} differing: {differing}")
@@ -0,0 +1,94 @@
+"""
+Measures the geometric feature prefilter of features.py on replayed recordings. Every recorded gesture of
+Parametric/data_*.json is shifted, scaled and jittered slightly, as if drawn again, and passed to the recogniser of
+every sign. For every recogniser, the share of its own gestures that the prefilter wrongly rejects (which has to be
+zero), the share of the other signs' gestures that it rejects, the gate that rejects them, and the latency of the
+recogniser with and without prefilter are reported. Run from the Backend directory with
+`python -m Parametric.Benchmarks.benchmark_feature_prefilter`.
+"""
+import contextlib
+import io
+import os
+import time
+import numpy as np
+import features
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from features import FEATURE_STATISTICS, features_valid
+from Parametric.sign_ch.sign_ch import is_sign_ch
+from Parametric.sign_g.sign_g import is_sign_g
+from Parametric.sign_h.sign_h import is_sign_h
+from Parametric.sign_j.sign_j import is_sign_j
+from Parametric.sign_ll.sign_ll import is_sign_ll
+from Parametric.sign_rr.sign_rr import is_sign_rr
+from Parametric.sign_v.sign_v import is_sign_v
+from Parametric.sign_w.sign_w import is_sign_w_three_curves
+from Parametric.sign_y.sign_y import is_sign_y
+from Parametric.sign_z.sign_z import is_sign_z_cubic
+from Parametric.sign_ñ.sign_ñ import is_sign_ñ_two_curves
+
+# recogniser of every sign with recordings
+RECOGNISERS = {'CH': is_sign_ch, 'G': is_sign_g, 'H': is_sign_h, 'J': is_sign_j, 'LL': is_sign_ll, 'RR': is_sign_rr,
+               'V': is_sign_v, 'W': is_sign_w_three_curves, 'Y': is_sign_y, 'Z': is_sign_z_cubic,
+               'Ñ': is_sign_ñ_two_curves}
+# number of redrawn copies per recording
+NUM_COPIES = 20
+# maximum shift in pixels, maximum relative scaling and standard deviation of the jitter in pixels of the copies
+SHIFT, SCALE, JITTER = 20.0, 0.05, 2.0
+# seed of the copies, so that the benchmark is reproducible
+SEED = 0
+
+
+def redraw(locations: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Shifts, scales and jitters a recorded gesture slightly, as if it was drawn again.
+
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :param rng: The random number generator.
+    :return: The redrawn touch locations as numpy array of shape (n, 2).
+    """
+    center = locations.mean(axis=0)
+    scale = 1 + rng.uniform(-SCALE, SCALE)
+    return (locations - center) * scale + center + rng.uniform(-SHIFT, SHIFT, 2) \
+        + rng.normal(scale=JITTER, size=locations.shape)
+
+
+def run_recogniser(recogniser, timestamps: np.ndarray, locations: np.ndarray) -> float:
+    """
+    Runs a recogniser silently.
+
+    :return: The latency in milliseconds.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        recogniser(timestamps.tolist(), locations.tolist())
+    return (time.perf_counter() - start) * 1e3
+
+
+if __name__ == '__main__':
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    rng = np.random.default_rng(SEED)
+    gestures = {}
+    for sign, recording in load_recorded_gestures(parametric_directory).items():
+        timestamps, locations = extract_timestamps_and_locations(recording)
+        gestures[sign] = [(np.asarray(timestamps), redraw(np.asarray(locations, dtype=float), rng))
+                          for _ in range(NUM_COPIES)]
+
+    print(f"{'sign':<5}{'own rejected':>13}{'others rejected':>16}{'with filter [ms]':>17}{'without [ms]':>13}"
+          f"  rejecting gates")
+    for sign, recogniser in RECOGNISERS.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            own = np.mean([not features_valid(sign, *gesture) for gesture in gestures[sign]])
+            FEATURE_STATISTICS.clear()
+            others = [gesture for other, copies in gestures.items() if other != sign for gesture in copies]
+            rejected = np.mean([not features_valid(sign, *gesture) for gesture in others])
+        gates = {key.split(':')[1]: count for key, count in FEATURE_STATISTICS.items() if not key.endswith('passed')}
+
+        with_filter = np.mean([run_recogniser(recogniser, *gesture) for gesture in others])
+        # replaces the prefilter of the recogniser by one that accepts every gesture
+        features.load_feature_envelopes.cache_clear()
+        envelopes = features.load_feature_envelopes()
+        disabled = envelopes.pop(sign)
+        without_filter = np.mean([run_recogniser(recogniser, *gesture) for gesture in others])
+        envelopes[sign] = disabled
+
+        print(f"{sign:<5}{own:>13.1%}{rejected:>16.1%}{with_filter:>17.2f}{without_filter:>13.2f}  {gates}")
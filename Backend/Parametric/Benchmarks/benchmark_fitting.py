@@ -0,0 +1,64 @@
+"""
+Benchmarks Bézier fitting when replaying many recorded gestures offline. The recorded 'data_*.json' gestures are
+replayed with random jitter until the requested number of strokes is reached, and fitted once stroke by stroke and
+once with the batch API. Run from the Backend directory with
+`python -m Parametric.Benchmarks.benchmark_fitting`.
+"""
+import os
+import time
+from typing import List
+import numpy as np
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from parameterisation import fit_bezier_control_points, fit_bezier_batch
+
+# number of replayed strokes
+NUM_STROKES = 5000
+# degree of the fitted Bézier curves
+DEGREE = 4
+
+
+def replay_strokes(num_strokes: int, seed: int = 0) -> List[np.ndarray]:
+    """
+    Builds a workload of strokes by replaying the recorded gestures with random jitter.
+
+    :param num_strokes: The number of strokes that are generated.
+    :param seed: The seed of the random number generator.
+    :return: A list of strokes, each an array of x and y coordinates.
+    """
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    recordings = [np.array(extract_timestamps_and_locations(data)[1], dtype=float)
+                  for data in load_recorded_gestures(parametric_directory).values()]
+
+    rng = np.random.default_rng(seed)
+    return [recordings[i % len(recordings)] + rng.normal(0, 2, size=recordings[i % len(recordings)].shape)
+            for i in range(num_strokes)]
+
+
+if __name__ == '__main__':
+    strokes = replay_strokes(NUM_STROKES)
+    print(f"{len(strokes)} strokes, {sum(len(stroke) for stroke in strokes)} touch points")
+
+    # fits stroke by stroke
+    start = time.perf_counter()
+    single = np.array([fit_bezier_control_points(stroke, DEGREE) for stroke in strokes])
+    print(f"stroke by stroke:   {time.perf_counter() - start:.3f} s")
+
+    # fits all ragged strokes at once
+    start = time.perf_counter()
+    batch = fit_bezier_batch(strokes, DEGREE)
+    print(f"batch (ragged):     {time.perf_counter() - start:.3f} s, max deviation {np.abs(batch - single).max():.2e}")
+
+    # fits strokes with individual parameter vectors (normalised arc length)
+    parameters = []
+    for stroke in strokes:
+        arc_length = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(stroke, axis=0), axis=1))])
+        parameters.append(arc_length / arc_length[-1])
+    start = time.perf_counter()
+    fit_bezier_batch(strokes, DEGREE, parameters)
+    print(f"batch (arc length): {time.perf_counter() - start:.3f} s")
+
+    # fits strokes that were resampled to a common length
+    resampled = [stroke[np.linspace(0, len(stroke) - 1, 100).round().astype(int)] for stroke in strokes]
+    start = time.perf_counter()
+    fit_bezier_batch(resampled, DEGREE)
+    print(f"batch (100 pts):    {time.perf_counter() - start:.3f} s")
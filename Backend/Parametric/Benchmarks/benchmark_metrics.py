@@ -0,0 +1,73 @@
+"""
+Compares the curve metrics of recognition.py on replayed recordings. Every recorded gesture of Parametric/data_*.json
+is fitted with the degree of its recogniser, and perturbed copies of every template are added, from barely visible to
+clearly wrong, so that each template is compared with curves on both sides of its threshold. For every metric and
+sign, the latency per comparison and the share of accept/reject decisions that agree with the Dynamic Time Warping
+threshold of the sign are reported, both at the configured METRIC_THRESHOLDS and at the best threshold on this data.
+Run from the Backend directory with `python -m Parametric.Benchmarks.benchmark_metrics` and copy the printed thresholds
+to METRIC_THRESHOLDS in recognition.py before moving a sign to another metric in SIGN_METRICS.
+"""
+import os
+import time
+import numpy as np
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from parameterisation import fit_bezier_control_points, fit_bezier_batch, evaluate_bezier
+from recognition import CURVE_METRICS, DTW_THRESHOLDS, METRIC_THRESHOLDS, dtw_distance
+from templates import SIGN_TEMPLATES, split_recording
+from Parametric.Benchmarks.calibrate_control_point_distance import perturb, best_threshold
+
+# number of perturbed copies per template curve
+NUM_PERTURBATIONS = 100
+# seed of the perturbations, so that the benchmark is reproducible
+SEED = 0
+
+
+def replayed_curves(parametric_directory: str) -> list:
+    """
+    Fits the curves of all recorded gestures with the degree of their recogniser.
+
+    :param parametric_directory: The 'Parametric' directory that contains the recordings.
+    :return: A list of user curves, each a numpy array of shape (100, 2).
+    """
+    recordings = load_recorded_gestures(parametric_directory)
+    curves = []
+    for sign, templates in SIGN_TEMPLATES.items():
+        _, locations = extract_timestamps_and_locations(recordings[sign])
+        curves.extend(evaluate_bezier(fit_bezier_batch(split_recording(sign, locations), degree=templates['degree'])))
+    return curves
+
+
+if __name__ == '__main__':
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    user_curves = replayed_curves(parametric_directory)
+    rng = np.random.default_rng(SEED)
+
+    calibrated = {metric: {} for metric in CURVE_METRICS if metric != 'dtw'}
+    print(f"{'sign':<5}{'metric':<11}{'latency [us]':>13}{'configured':>12}{'agreement':>11}{'calibrated':>12}"
+          f"{'agreement':>11}")
+    for sign, templates in SIGN_TEMPLATES.items():
+        pairs = []
+        for path in templates['templates']:
+            template = np.load(os.path.join(parametric_directory, path))
+            controls = fit_bezier_control_points(template, templates['degree'])
+            candidates = user_curves + list(evaluate_bezier(perturb(controls, rng, NUM_PERTURBATIONS)))
+            pairs.extend((candidate, template) for candidate in candidates)
+        accepted = np.array([dtw_distance(candidate, template) <= DTW_THRESHOLDS[sign]
+                             for candidate, template in pairs])
+
+        for metric, distance_function in CURVE_METRICS.items():
+            start = time.perf_counter()
+            distances = np.array([distance_function(candidate, template, None) for candidate, template in pairs])
+            latency = (time.perf_counter() - start) / len(pairs) * 1e6
+
+            configured = DTW_THRESHOLDS[sign] if metric == 'dtw' else METRIC_THRESHOLDS[metric].get(sign)
+            configured_agreement = '-' if configured is None \
+                else f'{np.mean((distances <= configured) == accepted):.3f}'
+            threshold, agreement = best_threshold(distances, accepted)
+            if metric != 'dtw':
+                calibrated[metric][sign] = threshold
+            print(f"{sign:<5}{metric:<11}{latency:>13.0f}{'-' if configured is None else f'{configured:.1f}':>12}"
+                  f"{configured_agreement:>11}{threshold:>12.1f}{agreement:>11.3f}")
+
+    for metric, thresholds in calibrated.items():
+        print(f"'{metric}': {{" + ', '.join(f"'{sign}': {value:.1f}" for sign, value in thresholds.items()) + '},')
@@ -0,0 +1,102 @@
+"""
+Compares the point-cloud engine of point_cloud.py with the Bézier recognisers of the multi-curve signs. Every recorded
+gesture of Parametric/data_*.json is rotated, scaled, moved and jittered with random strength, from barely visible to
+clearly wrong, and passed to the recogniser of its own sign; the recordings of the other signs are passed as well.
+For every sign, the latency of both engines, the share of their accept/reject decisions that agree, and the share of
+other signs' gestures that each engine rejects are reported, both at the configured POINT_CLOUD_THRESHOLDS and at the
+threshold that agrees best with the Bézier recogniser. The feature prefilter is disabled and longer recordings are
+replayed faster, so that only the shapes are compared. Run from the Backend directory with
+`python -m Parametric.Benchmarks.benchmark_point_cloud` and copy the printed thresholds to POINT_CLOUD_THRESHOLDS in
+point_cloud.py before moving a sign to the engine in SIGN_ENGINES.
+"""
+import contextlib
+import io
+import os
+import time
+import numpy as np
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from features import load_feature_envelopes
+from point_cloud import POINT_CLOUD_THRESHOLDS, cloud_distance, gesture_cloud, template_cloud
+from Parametric.Benchmarks.calibrate_control_point_distance import best_threshold
+from Parametric.sign_ch.sign_ch import is_sign_ch
+from Parametric.sign_ll.sign_ll import is_sign_ll
+from Parametric.sign_rr.sign_rr import is_sign_rr
+from Parametric.sign_v.sign_v import is_sign_v
+from Parametric.sign_w.sign_w import is_sign_w_three_curves
+from Parametric.sign_ñ.sign_ñ import is_sign_ñ_two_curves
+
+# Bézier recogniser of every multi-curve sign
+RECOGNISERS = {'CH': is_sign_ch, 'LL': is_sign_ll, 'RR': is_sign_rr, 'V': is_sign_v, 'W': is_sign_w_three_curves,
+               'Ñ': is_sign_ñ_two_curves}
+# number of perturbed copies per recording
+NUM_PERTURBATIONS = 100
+# maximum duration in seconds of the replayed recordings, which is within the duration limit of every sign
+REPLAY_DURATION = 1.5
+# seed of the perturbations, so that the benchmark is reproducible
+SEED = 0
+
+
+def perturb_gesture(locations: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Rotates, scales, moves and jitters the touch locations of a gesture with random strength.
+
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :param rng: The random number generator.
+    :return: The perturbed touch locations as numpy array of shape (n, 2).
+    """
+    strength = rng.uniform(0, 1)
+    angle = rng.normal() * 0.3 * strength
+    scale = 1 + rng.normal() * 0.2 * strength
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]]) * scale
+    centroid = locations.mean(axis=0)
+    return (locations - centroid) @ rotation.T + centroid + rng.normal(size=2) * 60 * strength \
+        + rng.normal(size=locations.shape) * 3
+
+
+def timed(function, *args) -> tuple:
+    """
+    Calls a function silently.
+
+    :return: The result and the latency in milliseconds.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+if __name__ == '__main__':
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    recordings = {}
+    for sign, recording in load_recorded_gestures(parametric_directory).items():
+        timestamps, locations = extract_timestamps_and_locations(recording)
+        timestamps = np.asarray(timestamps) - timestamps[0]
+        recordings[sign] = ((timestamps * min(1.0, REPLAY_DURATION / timestamps[-1])).tolist(), locations)
+    load_feature_envelopes().clear()
+    rng = np.random.default_rng(SEED)
+
+    print(f"{'sign':<5}{'bezier [ms]':>12}{'cloud [ms]':>11}{'configured':>12}{'agreement':>11}{'calibrated':>12}"
+          f"{'agreement':>11}{'others rejected (bezier, cloud)':>33}")
+    for sign, recogniser in RECOGNISERS.items():
+        timestamps, locations = recordings[sign]
+        gestures = [(timestamps, perturb_gesture(np.asarray(locations, dtype=float), rng).tolist())
+                    for _ in range(NUM_PERTURBATIONS)]
+        others = [recording for other, recording in recordings.items() if other != sign]
+
+        bezier, bezier_latency, cloud, cloud_latency = [], [], [], []
+        for gesture in gestures + others:
+            accepted, latency = timed(recogniser, *gesture)
+            bezier.append(accepted)
+            bezier_latency.append(latency)
+            distance, latency = timed(lambda *args: cloud_distance(gesture_cloud(sign, *args), template_cloud(sign)),
+                                      *gesture)
+            cloud.append(distance)
+            cloud_latency.append(latency)
+        bezier, cloud = np.array(bezier), np.array(cloud)
+
+        configured = POINT_CLOUD_THRESHOLDS[sign]
+        calibrated, agreement = best_threshold(cloud, bezier)
+        rejected = (np.mean(~bezier[len(gestures):]), np.mean(cloud[len(gestures):] > configured))
+        print(f"{sign:<5}{np.mean(bezier_latency):>12.2f}{np.mean(cloud_latency):>11.2f}{configured:>12.1f}"
+              f"{np.mean((cloud <= configured) == bezier):>11.1%}{calibrated:>12.1f}{agreement:>11.1%}"
+              f"{rejected[0]:>17.0%}, {rejected[1]:.0%}")
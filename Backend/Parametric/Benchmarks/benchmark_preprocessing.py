@@ -0,0 +1,61 @@
+"""
+Benchmarks the latency and accuracy trade-off of the preprocessing options against the full-resolution path for the
+single-curve signs. For every option, the recorded gesture of a sign is preprocessed, fitted and compared to the
+template; the deviation of the fitted curve from the full-resolution fit serves as accuracy measure. Run from the
+Backend directory with `python -m Parametric.Benchmarks.benchmark_preprocessing`.
+"""
+import os
+import time
+import numpy as np
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from parameterisation import fit_bezier_control_points, evaluate_bezier
+from preprocessing import preprocess_locations
+from recognition import compare_sequences_dtw
+
+# single-curve signs with the degree of their Bézier curve and their template file
+SINGLE_CURVE_SIGNS = {
+    'G': (1, 'sign_g/bezier_curve_template.npy'),
+    'H': (1, 'sign_h/bezier_curve_template.npy'),
+    'J': (3, 'sign_j/bezier_curve_template.npy'),
+    'Y': (1, 'sign_y/bezier_curve_template.npy'),
+    'Z': (3, 'sign_z/bezier_curve_template_cubic.npy'),
+    'Ñ': (4, 'sign_ñ/bezier_curve_single_template.npy'),
+}
+
+# preprocessing options that are compared
+OPTIONS = {
+    'full resolution': {},
+    'duplicates': {'remove_duplicates': True},
+    'outliers x8': {'outlier_factor': 8.0},
+    'rdp 1px': {'rdp_epsilon': 1.0},
+    'rdp 3px': {'rdp_epsilon': 3.0},
+    'resample 100': {'resample': 100},
+    'resample 50': {'resample': 50},
+    'resample 25': {'resample': 25},
+}
+
+# repetitions per measurement
+REPETITIONS = 200
+
+
+if __name__ == '__main__':
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    recordings = load_recorded_gestures(parametric_directory)
+
+    print(f"{'sign':<5}{'option':<18}{'points':>7}{'latency [us]':>14}{'deviation [px]':>16}{'DTW':>10}")
+    for sign, (degree, template_file) in SINGLE_CURVE_SIGNS.items():
+        timestamps, locations = extract_timestamps_and_locations(recordings[sign])
+        template = np.load(os.path.join(parametric_directory, template_file))
+        reference = evaluate_bezier(fit_bezier_control_points(locations, degree))
+
+        for name, options in OPTIONS.items():
+            # measures preprocessing, fitting and sampling of the curve
+            start = time.perf_counter()
+            for _ in range(REPETITIONS):
+                _, processed = preprocess_locations(timestamps, locations, **options)
+                curve = evaluate_bezier(fit_bezier_control_points(processed, degree))
+            latency = (time.perf_counter() - start) / REPETITIONS * 1e6
+
+            deviation = np.linalg.norm(curve - reference, axis=1).max()
+            distance = compare_sequences_dtw(curve, template)
+            print(f"{sign:<5}{name:<18}{len(processed):>7}{latency:>14.1f}{deviation:>16.2f}{distance:>10.0f}")
@@ -0,0 +1,68 @@
+"""
+Compares the vectorised hit test of regions.py with a point-by-point loop in Python, as the tap signs used before the
+region engine. Taps of increasing length are tested against the circle of sign 'A', the rectangle of sign 'B' and a
+union of a polygon and a circle. For the few points of a real tap, the fixed cost of converting the locations to an
+array dominates, so that the loop is faster on a single circle or rectangle; the engine is meant to keep every tap
+sign, including combined regions, within tens of microseconds on one code path. Run from the Backend directory with
+`python -m Parametric.Benchmarks.benchmark_regions`.
+"""
+import timeit
+import numpy as np
+from regions import compile_region, locations_inside_region, sign_region
+
+# number of touch points per tap
+NUM_POINTS = (5, 20, 100)
+# number of repetitions per measurement
+REPETITIONS = 2000
+# seed of the taps, so that the benchmark is reproducible
+SEED = 0
+
+# a combined region, as later tap signs may need
+UNION = compile_region({'type': 'union', 'regions': [
+    {'type': 'polygon', 'vertices': [[155, 548.5], [955, 548.5], [555, 1020.5]]},
+    {'type': 'circle', 'center': [477.5, 755.5], 'radius': 369.5},
+]})
+
+
+def loop_inside_circle(locations: list, xc: float, yc: float, r: float) -> bool:
+    """
+    Checks whether all locations are inside a circle, one point at a time.
+    """
+    for x, y in locations:
+        if not ((x - xc) ** 2 + (y - yc) ** 2 <= r ** 2):
+            return False
+    return True
+
+
+def loop_inside_rectangle(locations: list, x1: float, y1: float, x2: float, y2: float) -> bool:
+    """
+    Checks whether all locations are inside a rectangle, one point at a time.
+    """
+    for x, y in locations:
+        if not (x1 <= x <= x2 and y1 <= y <= y2):
+            return False
+    return True
+
+
+def microseconds(function) -> float:
+    """
+    :return: The mean latency of a call in microseconds.
+    """
+    return timeit.timeit(function, number=REPETITIONS) / REPETITIONS * 1e6
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(SEED)
+    circle, rectangle = sign_region('A'), sign_region('B')
+
+    print(f"{'points':>7}{'circle loop [us]':>18}{'circle [us]':>13}{'rectangle loop [us]':>21}{'rectangle [us]':>16}"
+          f"{'union [us]':>12}")
+    for num_points in NUM_POINTS:
+        # taps spread around the centre of the circle, so that all points need to be tested
+        locations = (rng.normal(size=(num_points, 2)) * 50 + [477.5, 755.5]).tolist()
+        print(f"{num_points:>7}"
+              f"{microseconds(lambda: loop_inside_circle(locations, 477.5, 755.5, 369.5)):>18.1f}"
+              f"{microseconds(lambda: locations_inside_region(circle, locations)):>13.1f}"
+              f"{microseconds(lambda: loop_inside_rectangle(locations, 155, 548.5, 955, 1020.5)):>21.1f}"
+              f"{microseconds(lambda: locations_inside_region(rectangle, locations)):>16.1f}"
+              f"{microseconds(lambda: locations_inside_region(UNION, locations)):>12.1f}")
@@ -0,0 +1,46 @@
+"""
+Measures how the nearest-template search of the template bank scales with the number of templates per stroke. Banks
+of perturbed copies of the 'G' template, as if recorded by many users, are searched with perturbed copies of the
+recorded gesture. The indexed search is compared with the exhaustive search of all templates by latency, by how
+often both find the same template and by how often both make the same accept/reject decision. Run from the Backend
+directory with `python -m Parametric.Benchmarks.benchmark_template_bank`.
+"""
+import os
+import time
+import numpy as np
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from parameterisation import fit_bezier_control_points, evaluate_bezier
+from recognition import DTW_THRESHOLDS
+from template_bank import TemplateBank, NUM_CANDIDATES
+from Parametric.Benchmarks.calibrate_control_point_distance import perturb
+
+# numbers of templates per stroke
+BANK_SIZES = (10, 100, 1000, 10000)
+# number of searches per bank size
+NUM_QUERIES = 20
+# seed of the perturbations, so that the benchmark is reproducible
+SEED = 0
+
+if __name__ == '__main__':
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    rng = np.random.default_rng(SEED)
+    template_controls = fit_bezier_control_points(np.load(os.path.join(parametric_directory, 'sign_g',
+                                                                       'bezier_curve_template.npy')), 1)
+    _, locations = extract_timestamps_and_locations(load_recorded_gestures(parametric_directory)['G'])
+    queries = evaluate_bezier(perturb(fit_bezier_control_points(locations, 1), rng, NUM_QUERIES))
+
+    print(f"{'templates':>10}{'indexed [ms]':>14}{'exhaustive [ms]':>17}{'same template':>15}{'same decision':>15}")
+    for size in BANK_SIZES:
+        curves = evaluate_bezier(perturb(template_controls, rng, size))
+        bank = TemplateBank(curves, ['G'] * size, [0] * size, [1] * size, ['perturbed'] * size)
+
+        latencies, results = [], []
+        for num_candidates in [NUM_CANDIDATES, None]:
+            start = time.perf_counter()
+            results.append([bank.nearest('G', query, DTW_THRESHOLDS['G'], num_candidates=num_candidates)[0]
+                            for query in queries])
+            latencies.append((time.perf_counter() - start) / NUM_QUERIES * 1e3)
+
+        indexed, exhaustive = np.array(results[0]), np.array(results[1])
+        print(f"{size:>10}{latencies[0]:>14.2f}{latencies[1]:>17.2f}{np.mean(indexed == exhaustive):>15.1%}"
+              f"{np.mean((indexed >= 0) == (exhaustive >= 0)):>15.1%}")
@@ -0,0 +1,59 @@
+"""
+Compares the cost of turning the body of a request into a gesture for the JSON array of touch points and for the
+compact formats of touch_payload.py, for gestures from 50 to 5000 points. The JSON bodies are decoded with json.loads
+as Flask does; the array of touch points is converted with Gesture.from_json and the columnar format with
+parse_columnar_touches, while the binary body is read with np.frombuffer, in float32 and float64. The sizes of the
+bodies are printed as well. Run from the Backend directory with
+`python -m Parametric.Benchmarks.benchmark_touch_payload`.
+"""
+import json
+import timeit
+import numpy as np
+from gesture import Gesture
+from touch_payload import pack_binary_touches, parse_binary_touches, parse_columnar_touches
+
+# number of touch points per gesture
+NUM_POINTS = (50, 200, 1000, 5000)
+# number of repetitions per measurement
+REPETITIONS = 200
+# seed of the gestures, so that the benchmark is reproducible
+SEED = 0
+
+
+def random_gesture(rng: np.random.Generator, num_points: int):
+    """
+    :return: The timestamps, locations and touch identifiers of a random two-finger gesture, sampled at 120 Hz.
+    """
+    timestamps = 750000.0 + np.arange(num_points) / 120
+    locations = np.round(rng.uniform(0, 1000, size=(num_points, 2)), 2)
+    touch_ids = np.arange(num_points) % 2
+    return timestamps, locations, touch_ids
+
+
+def microseconds(function) -> float:
+    """
+    :return: The mean latency of a call in microseconds.
+    """
+    return timeit.timeit(function, number=REPETITIONS) / REPETITIONS * 1e6
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(SEED)
+
+    print(f"{'points':>7}{'JSON [us]':>11}{'columnar [us]':>15}{'float32 [us]':>14}{'float64 [us]':>14}{'JSON [B]':>10}"
+          f"{'columnar [B]':>14}{'float32 [B]':>13}")
+    for num_points in NUM_POINTS:
+        timestamps, locations, touch_ids = random_gesture(rng, num_points)
+        json_body = json.dumps([{'location': location, 'timestamp': timestamp, 'id': touch_id}
+                                for timestamp, location, touch_id in
+                                zip(timestamps.tolist(), locations.tolist(), touch_ids.tolist())]).encode()
+        columnar_body = json.dumps({'t': timestamps.tolist(), 'x': locations[:, 0].tolist(),
+                                    'y': locations[:, 1].tolist(), 'id': touch_ids.tolist()}).encode()
+        float32_body = pack_binary_touches(timestamps, locations, touch_ids, float_size=4)
+        float64_body = pack_binary_touches(timestamps, locations, touch_ids, float_size=8)
+        print(f"{num_points:>7}"
+              f"{microseconds(lambda: Gesture.from_json(json.loads(json_body))):>11.1f}"
+              f"{microseconds(lambda: parse_columnar_touches(json.loads(columnar_body))):>15.1f}"
+              f"{microseconds(lambda: parse_binary_touches(float32_body)):>14.1f}"
+              f"{microseconds(lambda: parse_binary_touches(float64_body)):>14.1f}"
+              f"{len(json_body):>10}{len(columnar_body):>14}{len(float32_body):>13}")
@@ -0,0 +1,105 @@
+"""
+Calibrates the thresholds of the control point distance against the Dynamic Time Warping thresholds of the signs.
+For every template curve, perturbed copies are generated by moving, rotating and scaling its control points and by
+adding noise to them, from barely visible to clearly wrong. Together with the fitted recordings and the templates of
+the other signs, each copy is compared to the template with both distances. The threshold of the L2 distance is the
+value that agrees with most accept/reject decisions of the Dynamic Time Warping threshold. Run from the Backend
+directory with `python -m Parametric.Benchmarks.calibrate_control_point_distance` and copy the printed thresholds to
+CONTROL_POINT_THRESHOLDS in recognition.py.
+"""
+import os
+import time
+import numpy as np
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from parameterisation import fit_bezier_control_points, fit_bezier_batch, evaluate_bezier
+from recognition import dtw_distance, bezier_l2_distance, DTW_THRESHOLDS
+from templates import SIGN_TEMPLATES, split_recording
+
+# number of perturbed copies per template curve
+NUM_PERTURBATIONS = 300
+# seed of the perturbations, so that the calibration is reproducible
+SEED = 0
+
+
+def perturb(controls: np.ndarray, rng: np.random.Generator, num_copies: int) -> np.ndarray:
+    """
+    Generates perturbed copies of the control points of a curve with random strength.
+
+    :param controls: The control points with shape (degree + 1, 2).
+    :param rng: The random number generator.
+    :param num_copies: The number of copies.
+    :return: The perturbed control points with shape (num_copies, degree + 1, 2).
+    """
+    strength = rng.uniform(0, 1, size=(num_copies, 1, 1))
+    angles = rng.normal(size=num_copies) * 0.3 * strength[:, 0, 0]
+    scales = 1 + rng.normal(size=num_copies) * 0.2 * strength[:, 0, 0]
+
+    # rotates and scales around the centroid, then moves and adds noise to every control point
+    rotations = np.stack([np.stack([np.cos(angles), -np.sin(angles)], axis=-1),
+                          np.stack([np.sin(angles), np.cos(angles)], axis=-1)], axis=-2) * scales[:, None, None]
+    centroid = controls.mean(axis=0)
+    copies = (controls - centroid) @ rotations.transpose(0, 2, 1) + centroid
+    copies += rng.normal(size=(num_copies, 1, 2)) * 60 * strength
+    copies += rng.normal(size=copies.shape) * 40 * strength
+    return copies
+
+
+def best_threshold(l2_distances: np.ndarray, accepted: np.ndarray) -> tuple:
+    """
+    Finds the threshold of the L2 distance that agrees with the most accept/reject decisions.
+
+    :param l2_distances: The L2 distances of all comparisons.
+    :param accepted: Whether the Dynamic Time Warping distance of each comparison is within the sign's threshold.
+    :return: The threshold and the share of decisions it agrees with.
+    """
+    order = np.argsort(l2_distances)
+    sorted_distances, sorted_accepted = l2_distances[order], accepted[order]
+    # agreement if the threshold lies after the first k comparisons: accepted among them, rejected after them
+    agreement = np.concatenate([[0], np.cumsum(sorted_accepted)]) \
+        + np.concatenate([np.cumsum(~sorted_accepted[::-1])[::-1], [0]])
+    best = int(np.argmax(agreement))
+    if best == 0:
+        threshold = sorted_distances[0] / 2
+    elif best == len(sorted_distances):
+        threshold = sorted_distances[-1]
+    else:
+        threshold = (sorted_distances[best - 1] + sorted_distances[best]) / 2
+    return float(threshold), agreement[best] / len(l2_distances)
+
+
+if __name__ == '__main__':
+    parametric_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    recordings = load_recorded_gestures(parametric_directory)
+    rng = np.random.default_rng(SEED)
+
+    # control points of all templates and all fitted recordings
+    template_controls, recorded_controls = {}, []
+    for sign, templates in SIGN_TEMPLATES.items():
+        template_controls[sign] = [fit_bezier_control_points(np.load(os.path.join(parametric_directory, path)),
+                                                             templates['degree']) for path in templates['templates']]
+        _, locations = extract_timestamps_and_locations(recordings[sign])
+        recorded_controls.extend(fit_bezier_batch(split_recording(sign, locations), degree=templates['degree']))
+    other_controls = recorded_controls + [controls for curves in template_controls.values() for controls in curves]
+
+    thresholds = {}
+    print(f"{'sign':<5}{'DTW threshold':>14}{'L2 threshold':>14}{'agreement':>11}{'DTW [us]':>10}{'L2 [us]':>9}")
+    for sign, curves in template_controls.items():
+        l2_distances, accepted, dtw_time, l2_time = [], [], 0.0, 0.0
+        for controls in curves:
+            template = evaluate_bezier(controls)
+            candidates = list(perturb(controls, rng, NUM_PERTURBATIONS)) + other_controls
+            for candidate in candidates:
+                start = time.perf_counter()
+                accepted.append(dtw_distance(evaluate_bezier(candidate), template) <= DTW_THRESHOLDS[sign])
+                dtw_time += time.perf_counter() - start
+                start = time.perf_counter()
+                l2_distances.append(bezier_l2_distance(candidate, controls))
+                l2_time += time.perf_counter() - start
+
+        thresholds[sign], agreement = best_threshold(np.array(l2_distances), np.array(accepted))
+        num_comparisons = len(accepted)
+        print(f"{sign:<5}{DTW_THRESHOLDS[sign]:>14.0f}{thresholds[sign]:>14.1f}{agreement:>11.3f}"
+              f"{dtw_time / num_comparisons * 1e6:>10.0f}{l2_time / num_comparisons * 1e6:>9.1f}")
+
+    print('CONTROL_POINT_THRESHOLDS = {' + ', '.join(f"'{sign}': {value:.1f}" for sign, value in thresholds.items())
+          + '}')
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from parameterisation import IncrementalBezierFitter, fit_bezier_control_points
+
+
+def test_incremental_fit_matches_full_fit():
+    # defines a noisy stroke
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 1, 200)
+    locations = np.stack([400 * t, 300 * np.sin(3 * t)], axis=1) + rng.normal(0, 3, size=(200, 2))
+
+    for degree in [1, 3, 4]:
+        fitter = IncrementalBezierFitter(degree)
+
+        # adds points one at a time and compares the fit to a fit from scratch along the way
+        for i, location in enumerate(locations):
+            fitter.add_point(location)
+            if i in (0, 1, 2, 10, 199):
+                expected = fit_bezier_control_points(locations[:i + 1], degree)
+                assert np.allclose(fitter.control_points(), expected, atol=1e-6), \
+                    f"Incremental fit differs for degree {degree} after {i + 1} points"
+
+
+def test_incremental_fit_chunks():
+    # defines a stroke that is added in chunks of different sizes
+    locations = [[0, 0], [1, 2], [2, 3], [3, 3], [4, 2], [5, 0], [6, -1]]
+
+    fitter = IncrementalBezierFitter(4)
+    fitter.add_points(locations[:3])
+    fitter.add_points([])
+    fitter.add_points(locations[3:])
+
+    assert fitter.count == len(locations)
+    assert np.allclose(fitter.control_points(), fit_bezier_control_points(locations, 4))
+
+
+def test_incremental_fit_empty():
+    # no control points can be returned before the first touch location arrives
+    with pytest.raises(ValueError):
+        IncrementalBezierFitter(3).control_points()
+
+
+if __name__ == '__main__':
+    pytest.main()
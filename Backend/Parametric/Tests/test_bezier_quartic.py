@@ -67,5 +67,80 @@ def test_return_quartic_bezier_curve():
     assert np.allclose(result[-1], control_points[-1]), "Last point generated is not the last control point"
 
 
+def test_fit_bezier_control_points_recovers_curve():
+    """Checks that the closed-form fit recovers the control points of sampled curves of several degrees."""
+    for degree in range(1, 6):
+        # defines random control points and samples the curve at equally spaced parameter values
+        control_points = np.random.default_rng(degree).uniform(0, 500, size=(degree + 1, 2))
+        times = np.linspace(0, 1, 40)
+        coordinates = bernstein_basis(degree, times) @ control_points
+
+        # fits the curve and compares the control points
+        result = fit_bezier_control_points(coordinates, degree)
+        assert np.allclose(result, control_points), f"Control points not recovered for degree {degree}"
+
+
+def test_fit_bezier_control_points_too_few_points():
+    """Checks that a fit with fewer points than control points falls back to a straight line."""
+    result = fit_quartic_bezier_control_points([[0, 0], [4, 8]])
+
+    expected_result = np.array([[0, 0], [1, 2], [2, 4], [3, 6], [4, 8]])
+    assert np.allclose(result, expected_result), "Test failed"
+
+
+def test_fit_bezier_batch():
+    """Checks that ragged strokes fitted at once match the strokes fitted one by one."""
+    # defines strokes of different lengths
+    rng = np.random.default_rng(0)
+    strokes = [rng.uniform(0, 500, size=(length, 2)) for length in [3, 20, 21, 20, 100]]
+
+    # fits all strokes at once, once with equally spaced and once with explicit parameter values
+    result = fit_bezier_batch(strokes, 4)
+    result_parameters = fit_bezier_batch(strokes, 4, [np.linspace(0, 1, len(stroke)) for stroke in strokes])
+
+    assert result.shape == (5, 5, 2), "Shape of the batch is not as expected"
+    for stroke, control_points in zip(strokes, result):
+        assert np.allclose(control_points, fit_quartic_bezier_control_points(stroke)), "Batch fit differs"
+    assert np.allclose(result_parameters, result), "Fit with explicit parameter values differs"
+
+
+def test_fit_bezier_batch_short_stroke():
+    """Checks that a stroke without enough points is rejected instead of receiving the fit of another stroke."""
+    strokes = [[[0, 0], [1, 1], [2, 0]], [], [[0, 0], [4, 8]]]
+    with pytest.raises(ValueError):
+        fit_bezier_batch(strokes, 4)
+    with pytest.raises(ValueError):
+        fit_bezier_batch(strokes, 4, [np.linspace(0, 1, len(stroke)) for stroke in strokes])
+    with pytest.raises(ValueError):
+        fit_bezier_batch(strokes[:1], 4, [np.linspace(0, 1, 2)])
+
+
+def test_evaluate_bezier_batch():
+    """Checks that a stack of curves is evaluated like the individual curves."""
+    # defines two quartic curves
+    control_points = np.array([[[0, 0], [1, 2], [2, 2], [3, 2], [4, 0]],
+                               [[0, 0], [1, 1], [2, 2], [3, 3], [4, 4]]])
+
+    # evaluates both curves at once and one by one
+    result = evaluate_bezier(control_points, 50)
+
+    assert result.shape == (2, 50, 2), "Shape of the batch is not as expected"
+    assert np.allclose(result[0], return_quartic_bezier_curve(control_points[0], 50)), "First curve differs"
+    assert np.allclose(result[1], return_quartic_bezier_curve(control_points[1], 50)), "Second curve differs"
+
+
+def test_evaluate_bezier_derivative():
+    """Checks the tangents and curvature of a straight line and a parabola."""
+    # equally spaced control points on a line have a constant tangent and zero curvature
+    line = np.array([[0, 0], [1, 1], [2, 2], [3, 3], [4, 4]])
+    assert np.allclose(evaluate_bezier_derivative(line, 1, 10), [4, 4]), "Tangent of line is not constant"
+    assert np.allclose(bezier_curvature(line, 10), 0), "Curvature of line is not zero"
+
+    # the parabola y = x^2 on [-1, 1] has curvature 2 at its vertex
+    parabola = np.array([[-1, 1], [0, -1], [1, 1]])
+    assert np.isclose(bezier_curvature(parabola, 3)[1], 2), "Curvature at vertex is not as expected"
+    assert np.allclose(evaluate_bezier_derivative(parabola, 3, 5), 0), "Third derivative should vanish"
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,63 @@
+import gzip
+import os
+import pytest
+
+from capture import CAPTURE_STATISTICS, CaptureLog, encode_capture, capture_to_json, capture_paths, read_captures
+from extraction import extract_gesture
+from touch_payload import pack_binary_touches, parse_binary_touches
+
+TOUCHES = [{'location': [1.0, 2.0], 'timestamp': 0.5, 'id': 0}, {'location': [3.0, 4.0], 'timestamp': 0.6, 'id': 1}]
+
+
+def test_encode_capture():
+    record = encode_capture('V', TOUCHES, True, 100.0)
+    assert record['t'] == [0.5, 0.6] and record['x'] == [1.0, 3.0] and record['y'] == [2.0, 4.0]
+    assert record['id'] == [0, 1]
+
+    # the touch data of the request is restored, also without touch identifiers
+    assert capture_to_json(record) == TOUCHES
+    assert capture_to_json(encode_capture('G', [{'location': [1, 2], 'timestamp': 3}], False, 0.0)) == \
+        [{'location': [1, 2], 'timestamp': 3}]
+
+    # a gesture read from a binary body is encoded with the same columns
+    gesture = parse_binary_touches(pack_binary_touches([0.5, 0.6], [[1.0, 2.0], [3.0, 4.0]], [0, 1], float_size=8))
+    record = encode_capture('V', gesture, True, 100.0)
+    assert record['t'] == pytest.approx([0.5, 0.6]) and record['x'] == [1.0, 3.0] and record['id'] == [0, 1]
+
+
+def test_capture_log(tmp_path):
+    log = CaptureLog(str(tmp_path), sampling={'G': 0.0}, flush_interval=0.01).start()
+    for sign in ['V', 'G', 'W']:
+        log.capture(sign, TOUCHES, sign == 'V')
+    log.stop(timeout=5)
+
+    # sampled out gestures are not written, and the records can be replayed
+    records = list(read_captures(str(tmp_path)))
+    assert [record['sign'] for record in records] == ['V', 'W'] and records[0]['recognised']
+    assert [record['sign'] for record in read_captures(str(tmp_path), 'W')] == ['W']
+    assert extract_gesture(capture_to_json(records[0])).touch_ids.tolist() == [0, 1]
+
+
+def test_capture_log_backpressure(tmp_path):
+    # without a writer, gestures beyond the size of the queue are dropped instead of blocking
+    log = CaptureLog(str(tmp_path), queue_size=2)
+    dropped = CAPTURE_STATISTICS['dropped']
+    assert [log.capture('V', TOUCHES, True) for _ in range(3)] == [True, True, False]
+    assert CAPTURE_STATISTICS['dropped'] == dropped + 1
+
+
+def test_capture_rotation(tmp_path):
+    log = CaptureLog(str(tmp_path), max_file_bytes=1, max_files=2)
+    os.makedirs(str(tmp_path), exist_ok=True)
+    for _ in range(4):
+        log.write([encode_capture('V', TOUCHES, True, 0.0)])
+
+    # every batch exceeds the size of a file, and only the newest files are kept
+    paths = capture_paths(str(tmp_path))
+    assert len(paths) == 2 and len(list(read_captures(str(tmp_path)))) == 2
+    with gzip.open(paths[-1], 'rt') as file:
+        assert len(file.readlines()) == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
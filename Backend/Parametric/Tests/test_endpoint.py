@@ -7,59 +7,49 @@ To make the tests work do:
 """
 
 from unittest.mock import patch
-from unittest.mock import mock_open
 
 import pytest
-from flask import Response, jsonify, Flask
+from flask import jsonify, Flask
 import endpoint
+from capture import CaptureLog
+from gesture import Gesture
+from touch_payload import BINARY_CONTENT_TYPE, pack_binary_touches
 
+TOUCHES = [{'location': [1.0, 2.0], 'timestamp': 0.0}, {'location': [3.0, 4.0], 'timestamp': 0.1}]
 
-def test_delay_response_second_stroke_missing():
-    # creates a Flask app and set up an application context
-    app = Flask(__name__)
-    with app.app_context():
-        # sets up the global variables
-        endpoint.first_stroke_result = (Response(), 200)
-        endpoint.second_stroke_result = None
-        # calls the function
-        result = endpoint.delay_response(app, 1)
-        # checks the result
-        assert result[0].get_json() == jsonify({"message": "Second stroke not received"}).get_json() \
-               and result[1] == 200
-        # checks that the global variable was reset
-        assert endpoint.first_stroke_result is None
-
-
-def test_delay_response_second_stroke_received():
-    # creates a Flask app and set up an application context
+
+def test_receive_json_multi_stroke():
+    # creates a Flask app and set up an application and request context
     app = Flask(__name__)
-    with app.app_context():
-        # sets up the global variables
-        endpoint.first_stroke_result = (Response(), 200)
-        endpoint.second_stroke_result = 'Y'
-        # calls the function
-        result = endpoint.delay_response(app, 1)
-        # checks the result
-        assert result[0].get_json() == jsonify({"message": "Second stroke already received"}).get_json() \
-               and result[1] == 200
-        # checks that the global variable was reset
-        assert endpoint.second_stroke_result is None
-
-
-# patch decorator replaces real objects in code with mock instances for test
-@patch('json.dump')
-@patch('builtins.open', new_callable=mock_open)
-def test_receive_json(mocked_open_param, mock_dump_param):
+    # both strokes come from the same client
+    with app.app_context(), \
+            app.test_request_context(headers={'Sign': 'Y', 'Session-Id': 'client'}, json=TOUCHES), \
+            patch("endpoint.recogniser_function") as mock_recogniser, \
+            patch("endpoint.capture_log", None), \
+            patch("endpoint.session_store", endpoint.SessionStore()):
+        # setup mock values
+        mock_recogniser.return_value = (jsonify({"message": "Sign Y correct"}), 200, True)
+
+        # the first stroke is answered right away, the second completes the sign
+        assert endpoint.receive_json()[0].get_json()["message"] == "Stroke 1 of sign Y correct"
+        assert endpoint.receive_json()[0].get_json() == jsonify({"message": "Sign Y correct"}).get_json()
+
+        # an incorrect stroke discards the session
+        assert endpoint.receive_json()[0].get_json()["message"] == "Stroke 1 of sign Y correct"
+        mock_recogniser.return_value = (jsonify({"message": "Sign not correct"}), 200, False)
+        assert endpoint.receive_json()[0].get_json() == jsonify({"message": "Sign not correct"}).get_json()
+        assert len(endpoint.session_store) == 0
+
+
+def test_receive_json():
     # creates a Flask app and set up an application and request context
     app = Flask(__name__)
     with app.app_context(), \
-            app.test_request_context(), \
-            patch("endpoint.request") as mock_request, \
-            patch("endpoint.recogniser_function") as mock_recogniser:
+            app.test_request_context(headers={'Sign': 'RR'}, json=TOUCHES), \
+            patch("endpoint.recogniser_function") as mock_recogniser, \
+            patch("endpoint.capture_log") as mock_capture_log:
         # setup mock values
-        mock_request.headers.get.return_value = 'RR'
-        mock_request.get_json.return_value = {'data': 'sample data'}
-        mock_recogniser.return_value = (jsonify({"message": "Sign RR correct"}), 200)
+        mock_recogniser.return_value = (jsonify({"message": "Sign RR correct"}), 200, True)
 
         # calls function for the first stroke
         result = endpoint.receive_json()
@@ -67,6 +57,77 @@ def test_receive_json(mocked_open_param, mock_dump_param):
         # verifies results of second stroke
         assert result[0].get_json() == jsonify({"message": "Sign RR correct"}).get_json()
         assert result[1] == 200
+        # the gesture is queued for the capture log instead of being written during the request
+        mock_capture_log.capture.assert_called_once()
+        sign, gesture, recognised = mock_capture_log.capture.call_args[0]
+        assert sign == 'RR' and recognised and gesture.x.tolist() == [1.0, 3.0]
+
+    # touch points of which only some have a touch identifier are rejected
+    with app.app_context(), \
+            app.test_request_context(headers={'Sign': 'RR'}, json=[dict(TOUCHES[0], id=0), TOUCHES[1]]):
+        assert endpoint.receive_json()[1] == 400
+
+
+def test_receive_json_binary():
+    app = Flask(__name__)
+    body = pack_binary_touches([0.0, 0.1], [[1.0, 2.0], [3.0, 4.0]], [0, 1])
+    with app.app_context(), \
+            app.test_request_context(headers={'Sign': 'V'}, data=body, content_type=BINARY_CONTENT_TYPE), \
+            patch("endpoint.recogniser_function") as mock_recogniser, \
+            patch("endpoint.capture_log", None):
+        mock_recogniser.return_value = (jsonify({"message": "Sign V correct"}), 200, True)
+
+        # the binary body is passed on as gesture
+        assert endpoint.receive_json()[1] == 200
+        gesture = mock_recogniser.call_args[0][1]
+        assert isinstance(gesture, Gesture) and gesture.touch_ids.tolist() == [0, 1]
+
+    # a malformed body is rejected
+    with app.app_context(), \
+            app.test_request_context(headers={'Sign': 'V'}, data=body[:-1], content_type=BINARY_CONTENT_TYPE):
+        assert endpoint.receive_json()[1] == 400
+
+
+def test_receive_json_columnar():
+    app = Flask(__name__)
+    columns = {'t': [0.0, 0.1], 'x': [1.0, 3.0], 'y': [2.0, 4.0], 'id': [0, 1]}
+    with app.app_context(), \
+            app.test_request_context(headers={'Sign': 'V'}, json=columns), \
+            patch("endpoint.recogniser_function") as mock_recogniser, \
+            patch("endpoint.capture_log", None):
+        mock_recogniser.return_value = (jsonify({"message": "Sign V correct"}), 200, True)
+
+        # the columnar format is detected and passed on as gesture
+        assert endpoint.receive_json()[1] == 200
+        gesture = mock_recogniser.call_args[0][1]
+        assert isinstance(gesture, Gesture) and gesture.x.tolist() == [1.0, 3.0]
+
+    # columns of different length are rejected
+    with app.app_context(), app.test_request_context(headers={'Sign': 'V'}, json=dict(columns, x=[1.0])):
+        assert endpoint.receive_json()[1] == 400
+
+
+def test_recogniser_function():
+    app = Flask(__name__)
+    with app.app_context(), patch("endpoint.recognisers", {'G': lambda gesture: True, 'H': lambda gesture: False}):
+        # the message is built from the result of the recogniser, which is returned with it
+        response, status, recognised = endpoint.recogniser_function('G', TOUCHES)
+        assert response.get_json() == {"message": "Sign G correct"} and status == 200 and recognised
+        for sign in ['H', 'X']:
+            response, status, recognised = endpoint.recogniser_function(sign, TOUCHES)
+            assert response.get_json() == {"message": "Sign not correct"} and status == 200 and not recognised
+
+
+def test_capture_log_started_with_server(tmp_path):
+    # importing the endpoint does not start the capture log, which is off unless enabled
+    assert endpoint.capture_log is None and not endpoint.CAPTURE_ENABLED
+
+    with patch("endpoint.capture_log", None), patch("endpoint.CAPTURE_ENABLED", True), \
+            patch("endpoint.CaptureLog", lambda: CaptureLog(str(tmp_path / 'captures'))):
+        endpoint.start_capture_log()
+        capture_log = endpoint.capture_log
+        assert capture_log is not None and (tmp_path / 'captures').is_dir()
+        capture_log.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,90 @@
+import math
+from unittest.mock import patch
+import numpy as np
+import pytest
+
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from features import FEATURE_STATISTICS, POSITION_GATES, path_length, turning_angle, gesture_features, \
+    learn_feature_envelope, features_valid, load_feature_envelopes
+from templates import PARAMETRIC_DIRECTORY
+from Parametric.sign_g import sign_g
+from Parametric.sign_h import sign_h
+from Parametric.sign_j import sign_j
+
+
+def test_path_length():
+    line = np.stack([np.linspace(0, 100, 11), np.zeros(11)], axis=1)
+    assert math.isclose(path_length(line), 100)
+
+    # two fingers drawing parallel lines, interleaved, are linked to their own previous points
+    other = line + [0, 200]
+    interleaved = np.stack([line, other], axis=1).reshape(-1, 2)
+    assert math.isclose(path_length(interleaved), 200 + 200)
+
+
+def test_turning_angle():
+    line = np.stack([np.linspace(0, 100, 50), np.zeros(50)], axis=1)
+    jittered = line + np.random.default_rng(0).normal(scale=1, size=line.shape)
+    assert turning_angle(jittered) == 0
+
+    # a right angle and back
+    corner = np.concatenate([line, line[-1] + line[1:, ::-1], line[::-1][1:] + [0, 100]])
+    assert math.isclose(turning_angle(corner), math.pi)
+
+
+def test_gesture_features():
+    timestamps = [0, 0.01, 0.02, 0.03, 0.04, 2, 2.01, 2.02, 2.03, 2.04]
+    locations = [[x, 2 * x] for x in range(10)]
+
+    features = gesture_features(timestamps, locations)
+    assert features['strokes'] == 2
+    assert features['bounding_box'] == [0, 0, 9, 18] and features['start'] == [0, 0] and features['end'] == [9, 18]
+    assert math.isclose(features['path_length'], 9 * math.sqrt(5)) and not features['interleaved']
+
+
+def test_learn_feature_envelope():
+    recorded = [{'strokes': 1, 'bounding_box': [0, 0, 100, 0], 'start': [0, 0], 'end': [100, 0], 'path_length': 100,
+                 'turning_angle': 0, 'interleaved': False}]
+    envelope = learn_feature_envelope(recorded)
+    assert envelope['strokes'] == [1, 1] and envelope['path_length'] == [50, 200]
+    assert envelope['start'] == [[-65, -65], [65, 65]]
+
+    # interleaved fingers have no meaningful turning angle
+    assert learn_feature_envelope([{**recorded[0], 'interleaved': True}])['turning_angle'] is None
+
+
+def test_features_valid():
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+    envelopes = load_feature_envelopes()
+    FEATURE_STATISTICS.clear()
+
+    # every recording passes its own envelope
+    for sign in envelopes:
+        assert features_valid(sign, *extract_timestamps_and_locations(recordings[sign]))
+    assert sum(FEATURE_STATISTICS.values()) == FEATURE_STATISTICS['G:passed'] * len(envelopes)
+
+    # the short line of 'Y' does not pass as 'Z', and the rejecting gate is counted
+    assert not features_valid('Z', *extract_timestamps_and_locations(recordings['Y']))
+    assert sum(count for key, count in FEATURE_STATISTICS.items() if key.startswith('Z:')) == 2
+
+    # signs without recordings are not filtered
+    assert features_valid('A', [0], [[0, 0]])
+    assert features_valid('W', *extract_timestamps_and_locations(recordings['W']), gates=POSITION_GATES)
+
+
+@pytest.mark.parametrize('module, recogniser, fit', [(sign_g, 'is_sign_g', 'generate_linear_bezier'),
+                                                     (sign_h, 'is_sign_h', 'generate_linear_bezier'),
+                                                     (sign_j, 'is_sign_j', 'return_cubic_bezier')])
+def test_features_valid_before_fitting(module, recogniser, fit):
+    timestamps, locations = extract_timestamps_and_locations(load_recorded_gestures(PARAMETRIC_DIRECTORY)['G'])
+
+    # a gesture rejected by the feature check is neither preprocessed nor fitted
+    with patch.object(module, 'features_valid', return_value=False), \
+            patch.object(module, 'preprocess_for_sign') as preprocess, patch.object(module, fit) as fit_curve:
+        assert not getattr(module, recogniser)(timestamps, locations)
+    preprocess.assert_not_called()
+    fit_curve.assert_not_called()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from extraction import extract_gesture
+from gesture import Stroke
+from parameterisation import fit_cubic_bezier_curve
+
+
+def test_extract_gesture():
+    json_data = [{'timestamp': 1000.0, 'location': [0.0, 1.0]},
+                 {'timestamp': 1000.5, 'location': [1.0, 2.0]},
+                 {'timestamp': 1002.0, 'location': [4.0, 0.0]}]
+
+    gesture = extract_gesture(json_data)
+
+    # arrays are contiguous float32 and timestamps are relative to the first touch
+    assert gesture.locations.dtype == np.float32 and gesture.locations.flags['C_CONTIGUOUS']
+    assert gesture.start_time == 1000.0
+    assert np.allclose(gesture.timestamps, [0.0, 0.5, 2.0])
+    assert np.array_equal(gesture.x, [0.0, 1.0, 4.0])
+    assert gesture.touch_ids is None
+
+    # derived values
+    assert gesture.duration == pytest.approx(2.0)
+    assert np.array_equal(gesture.bounding_box, [0.0, 0.0, 4.0, 2.0])
+
+
+def test_extract_gesture_touch_ids():
+    json_data = [{'timestamp': 0.0, 'location': [0.0, 1.0], 'id': 1},
+                 {'timestamp': 0.1, 'location': [1.0, 2.0], 'id': 2}]
+
+    assert np.array_equal(extract_gesture(json_data).touch_ids, [1, 2])
+
+
+@pytest.mark.parametrize('json_data', [
+    [{'timestamp': 0.0, 'location': [0.0, 1.0], 'id': 1}, {'timestamp': 0.1, 'location': [1.0, 2.0]}],
+    [{'timestamp': 0.0, 'location': [0.0, 1.0]}, {'timestamp': 0.1, 'location': [1.0, 2.0], 'id': 2}],
+    [{'timestamp': 0.0, 'location': [0.0, 1.0]}, {'location': [1.0, 2.0]}],
+    [{'timestamp': 0.0, 'location': [0.0, 1.0, 2.0]}],
+    [{'timestamp': None, 'location': [0.0, 1.0]}],
+    ['touch'],
+    # booleans, fractional identifiers and identifiers beyond 32 bits are rejected like in the columnar format
+    [{'timestamp': True, 'location': [0.0, 1.0]}],
+    [{'timestamp': 0.0, 'location': [True, False]}],
+    [{'timestamp': 0.0, 'location': [0.0, 1.0], 'id': 1.9}],
+    [{'timestamp': 0.0, 'location': [0.0, 1.0], 'id': True}],
+    [{'timestamp': 0.0, 'location': [0.0, 1.0], 'id': 2 ** 31}],
+])
+def test_extract_gesture_invalid(json_data):
+    # malformed touch points raise ValueError, which the endpoint answers with 400
+    with pytest.raises(ValueError):
+        extract_gesture(json_data)
+
+
+def test_stroke_as_locations():
+    locations = [[0, 0], [1, 1], [2, 1], [3, 0]]
+    stroke = Stroke([0.0, 0.1, 0.2, 0.3], locations)
+
+    # the stroke can be passed wherever locations are expected
+    assert np.allclose(fit_cubic_bezier_curve(stroke), fit_cubic_bezier_curve(locations))
+
+
+def test_stroke_select():
+    stroke = Stroke([10.0, 11.0, 12.0], [[0, 0], [1, 1], [2, 2]])
+
+    selected = stroke.select(np.array([1, 2]))
+
+    assert len(selected) == 2
+    assert selected.start_time == stroke.start_time
+    assert np.allclose(selected.timestamps, [1.0, 2.0])
+
+
+if __name__ == '__main__':
+    pytest.main()
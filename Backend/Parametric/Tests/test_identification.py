@@ -0,0 +1,114 @@
+from unittest.mock import patch
+import numpy as np
+import pytest
+
+import identification
+import template_store
+
+from extraction import load_recorded_gestures
+from gesture import Gesture
+from identification import VantagePointTree, count_strokes, candidate_signs, identify_sign, load_sign_index, \
+    rank_signs
+from recognition import SIGN_METRICS, METRIC_THRESHOLDS
+from template_store import TemplateStore
+from templates import PARAMETRIC_DIRECTORY
+
+
+def test_vantage_point_tree():
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(500, 16)) * 50
+    tree = VantagePointTree(points)
+
+    for point in rng.normal(size=(10, 16)) * 50:
+        distances = np.linalg.norm(points - point, axis=1)
+
+        # finds the exact nearest neighbours
+        found_distances, found_indices = tree.query(point, k=5)
+        assert np.array_equal(found_indices, np.argsort(distances)[:5])
+        assert np.allclose(found_distances, np.sort(distances)[:5])
+
+        # only returns allowed points
+        _, found_indices = tree.query(point, k=3, allowed=lambda indices: indices % 2 == 0)
+        assert np.array_equal(found_indices, np.arange(0, 500, 2)[np.argsort(distances[::2])[:3]])
+
+    assert len(VantagePointTree(points[:3]).query(points[0], k=5)[0]) == 3
+
+
+def test_vantage_point_tree_visits_nearest_side_first():
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(20000, 16))
+    tree = VantagePointTree(points)
+    visited = []
+
+    # a query next to a point only visits a small part of the tree
+    point = points[123] + rng.normal(size=16) * 0.01
+    _, found_indices = tree.query(point, allowed=lambda indices: visited.append(indices) or np.ones(len(indices), bool))
+    assert found_indices[0] == 123
+    assert len(visited) < 100
+
+
+def test_count_strokes():
+    timestamps = np.concatenate([np.arange(10) * 0.01, 1 + np.arange(10) * 0.01])
+    locations = np.zeros((20, 2))
+
+    # pauses separate strokes drawn one after the other
+    assert count_strokes(Gesture(timestamps, locations)) == (2, False)
+    # touch identifiers separate simultaneous strokes exactly
+    assert count_strokes(Gesture(timestamps, locations, touch_ids=np.arange(20) % 3)) == (3, True)
+
+
+def test_identify_recordings():
+    index = load_sign_index()
+
+    for sign, recording in load_recorded_gestures(PARAMETRIC_DIRECTORY).items():
+        gesture = Gesture.from_json(recording)
+        identified, distance, statistics = identify_sign(gesture, index)
+
+        # the recording of 'CH' takes longer than the sign allows
+        if sign == 'CH':
+            assert identified is None and 'CH' not in candidate_signs(gesture, index.bank)
+            continue
+        assert identified == sign and distance < 1
+        assert statistics['ranked'] <= 3
+
+        # only the best ranked signs are preprocessed and fitted
+        with patch.object(identification, 'user_curves', wraps=identification.user_curves) as user_curves:
+            identify_sign(gesture, index, top_k=1)
+        assert user_curves.call_count == 1
+
+        # nothing is identified if no sign is compared exactly
+        assert identify_sign(gesture, index, top_k=0)[0] is None
+
+
+def test_rank_signs_queries_tree_once_per_stroke():
+    index = load_sign_index()
+    gesture = Gesture.from_json(load_recorded_gestures(PARAMETRIC_DIRECTORY)['V'])
+    signs = candidate_signs(gesture, index.bank)
+
+    # the recording has no touch identifiers: it is looked up once as one stroke for the five single-stroke signs
+    # and once per track for the four two-stroke signs, and is not split into the three strokes of 'W'
+    with patch.object(VantagePointTree, 'query', autospec=True, side_effect=VantagePointTree.query) as query:
+        ranking = rank_signs(gesture, index, signs)
+    assert query.call_count == 3 and len(signs) == 10
+    assert ranking[0][1] == 'V' and {sign for _, sign in ranking} <= set(signs)
+
+
+def test_identify_with_recogniser_thresholds(monkeypatch):
+    index = load_sign_index()
+    gesture = Gesture.from_json(load_recorded_gestures(PARAMETRIC_DIRECTORY)['G'])
+
+    # the exact stage compares with the metric of the recogniser
+    monkeypatch.setitem(SIGN_METRICS, 'G', 'hausdorff')
+    identified, distance, _ = identify_sign(gesture, index)
+    assert identified == 'G' and distance < METRIC_THRESHOLDS['hausdorff']['G']
+
+    # and with the thresholds of the template store that is served
+    store = TemplateStore.load(PARAMETRIC_DIRECTORY)
+    thresholds = {**store.thresholds, 'sign_g/bezier_curve_template.npy': {'metric': 'hausdorff', 'threshold': 0.0}}
+    monkeypatch.setattr(template_store, '_current_store', TemplateStore(store.directory, store.version, store.data,
+                                                                        store.entries, thresholds, store.regions))
+    assert identify_sign(gesture, index)[0] is None
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,137 @@
+import os
+import numpy as np
+import pytest
+
+from matching import template_envelope, lower_bound_kim, lower_bound_keogh, nearest_template, \
+    match_curves_to_templates, load_templates, curve_cost_matrix, assign_curves, match_curves_optimally, \
+    MAX_BRUTE_FORCE_CURVES
+from recognition import dtw_distance
+
+SIGN_W_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sign_w')
+
+
+def random_curves(rng: np.random.Generator, num_curves: int, num_points: int = 100) -> np.ndarray:
+    # random walks at random positions
+    return np.cumsum(rng.normal(size=(num_curves, num_points, 2)) * 5, axis=1) \
+        + rng.normal(size=(num_curves, 1, 2)) * 50
+
+
+def test_template_envelope():
+    template = np.array([[0, 5], [1, 4], [2, 3], [3, 2], [4, 1]], dtype=float)
+
+    lower, upper = template_envelope(template, band=1)
+
+    # minimum and maximum of each point and its neighbours
+    assert np.array_equal(lower, [[0, 4], [0, 3], [1, 2], [2, 1], [3, 1]])
+    assert np.array_equal(upper, [[1, 5], [2, 5], [3, 4], [4, 3], [4, 2]])
+
+
+def test_lower_bounds():
+    rng = np.random.default_rng(0)
+    templates = random_curves(rng, 20)
+    envelopes = np.stack([template_envelope(template) for template in templates])
+
+    for curve in random_curves(rng, 5):
+        distances = np.array([dtw_distance(curve, template) for template in templates])
+
+        # both bounds never exceed the exact distance
+        assert np.all(lower_bound_kim(curve, templates) <= distances + 1e-6)
+        assert np.all(lower_bound_keogh(curve, envelopes) <= distances + 1e-6)
+
+
+def test_nearest_template():
+    rng = np.random.default_rng(1)
+    templates = random_curves(rng, 30)
+    curve = random_curves(rng, 1)[0]
+    distances = np.array([dtw_distance(curve, template) for template in templates])
+
+    index, distance, statistics = nearest_template(curve, templates, threshold=np.median(distances))
+
+    # finds the exact nearest template and prunes most of the others
+    assert index == np.argmin(distances) and np.isclose(distance, distances.min())
+    assert statistics['pruned_kim'] + statistics['pruned_keogh'] + statistics['dtw'] == len(templates)
+    assert statistics['dtw'] < len(templates)
+
+    # no template within the threshold
+    index, distance, _ = nearest_template(curve, templates, threshold=distances.min() / 2)
+    assert index == -1 and distance == np.inf
+
+
+def test_match_curves_to_templates():
+    filenames = ['bezier1_curve_template.npy', 'bezier2_curve_template.npy', 'bezier3_curve_template.npy']
+    templates, envelopes, pyramids = load_templates(SIGN_W_DIRECTORY, filenames)
+
+    # the templates are loaded once and shared
+    assert load_templates(SIGN_W_DIRECTORY, filenames)[0] is templates
+    assert not templates.flags.writeable
+
+    # shuffled and slightly shifted templates are matched to their original
+    assignments, distances = match_curves_to_templates(templates[[2, 0, 1]] + 1, templates, envelopes, threshold=5000,
+                                                       pyramids=pyramids)
+
+    assert np.array_equal(assignments, [2, 0, 1])
+    assert np.all(distances < 5000)
+
+    # other metrics compare every template without the lower bounds
+    assignments, distances = match_curves_to_templates(templates[[2, 0, 1]] + 1, templates, threshold=5,
+                                                       metric='hausdorff')
+    assert np.array_equal(assignments, [2, 0, 1])
+    assert np.allclose(distances, np.sqrt(2))
+
+
+def test_curve_cost_matrix():
+    rng = np.random.default_rng(3)
+    templates = random_curves(rng, 3)
+    curves = templates[[1, 2]] + rng.normal(size=(2, 100, 2))
+    envelopes = np.stack([template_envelope(template) for template in templates])
+    expected = np.array([[dtw_distance(curve, template) for template in templates] for curve in curves])
+
+    # pairs within the threshold have their exact distance, the others are infinity
+    threshold = np.sort(expected.ravel())[2] + 1e-6
+    costs = curve_cost_matrix(curves, templates, threshold, envelopes)
+    assert np.allclose(costs[expected <= threshold], expected[expected <= threshold])
+    assert np.all(np.isinf(costs[expected > threshold]))
+
+    # per-template thresholds and other metrics
+    costs = curve_cost_matrix(curves, templates, [np.inf, 0, np.inf])
+    assert np.all(np.isinf(costs[:, 1])) and np.allclose(costs[:, [0, 2]], expected[:, [0, 2]])
+    assert curve_cost_matrix(curves, templates, np.inf, metric='hausdorff').shape == (2, 3)
+
+
+def test_assign_curves():
+    # both curves are nearest to template 0, but only one of them can be assigned to it
+    costs = np.array([[1.0, 10.0, np.inf],
+                      [2.0, np.inf, np.inf]])
+    assignments, distances = assign_curves(costs)
+    assert np.array_equal(assignments, [1, 0]) and np.array_equal(distances, [10, 2])
+
+    # curves without a template within the threshold are not assigned
+    assignments, distances = assign_curves(np.array([[1.0, np.inf], [2.0, np.inf]]))
+    assert sorted(assignments.tolist()) == [-1, 0] and np.isinf(distances).sum() == 1
+
+    # the Hungarian algorithm finds the same assignment as the enumeration
+    rng = np.random.default_rng(4)
+    costs = rng.uniform(size=(MAX_BRUTE_FORCE_CURVES + 2, MAX_BRUTE_FORCE_CURVES + 2))
+    assignments, distances = assign_curves(costs)
+    assert sorted(assignments.tolist()) == list(range(len(costs)))
+    assert np.isclose(distances.sum(), costs[np.arange(len(costs)), assignments].sum())
+    brute_force = assign_curves(costs[:MAX_BRUTE_FORCE_CURVES, :MAX_BRUTE_FORCE_CURVES])
+    hungarian = assign_curves(np.pad(costs[:MAX_BRUTE_FORCE_CURVES, :MAX_BRUTE_FORCE_CURVES], ((0, 1), (0, 1)),
+                                     constant_values=10))
+    assert np.array_equal(brute_force[0], hungarian[0][:MAX_BRUTE_FORCE_CURVES])
+
+
+def test_match_curves_optimally():
+    filenames = ['bezier1_curve_template.npy', 'bezier2_curve_template.npy', 'bezier3_curve_template.npy']
+    templates, envelopes, _ = load_templates(SIGN_W_DIRECTORY, filenames)
+
+    assignments, distances = match_curves_optimally(templates[[2, 0, 1]] + 1, templates, 5000, envelopes)
+    assert np.array_equal(assignments, [2, 0, 1]) and np.all(distances < 5000)
+
+    # two copies of one template cannot both be assigned to it
+    assignments, _ = match_curves_optimally(templates[[0, 0, 1]], templates, 1, envelopes)
+    assert sorted(assignments.tolist()) == [-1, 0, 1]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,31 @@
+import os
+import numpy as np
+import pytest
+
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from multi_curve import MULTI_CURVE_SIGNS, is_multi_curve_sign
+from segmentation import SIGN_SEGMENTATION
+from templates import PARAMETRIC_DIRECTORY
+
+
+def test_multi_curve_signs():
+    # every sign declares one template and threshold per curve, and is segmented into as many curves
+    for sign, spec in MULTI_CURVE_SIGNS.items():
+        assert len(spec['templates']) == len(spec['thresholds']) == spec['num_curves']
+        assert SIGN_SEGMENTATION[sign]['num_curves'] == spec['num_curves']
+        assert all(os.path.exists(os.path.join(PARAMETRIC_DIRECTORY, path)) for path in spec['templates'])
+
+
+def test_is_multi_curve_sign():
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+
+    for sign in MULTI_CURVE_SIGNS:
+        timestamps, locations = extract_timestamps_and_locations(recordings[sign])
+        # replays the recording within the duration limit of every sign
+        timestamps = ((np.asarray(timestamps) - timestamps[0]) * 0.7).tolist()
+        assert is_multi_curve_sign(sign, timestamps, locations)
+        assert not is_multi_curve_sign('V' if sign == 'W' else 'W', timestamps, locations)
+
+
+if __name__ == '__main__':
+    pytest.main()
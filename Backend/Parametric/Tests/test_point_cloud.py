@@ -0,0 +1,61 @@
+import math
+import numpy as np
+import pytest
+
+import point_cloud
+from extraction import load_recorded_gestures, extract_timestamps_and_locations
+from point_cloud import sample_cloud, curves_cloud, gesture_cloud, template_cloud, cloud_distance, is_sign_point_cloud
+from templates import PARAMETRIC_DIRECTORY
+from Parametric.sign_v.sign_v import is_sign_v
+
+
+def test_sample_cloud():
+    # points drawn slowly at the start are spread evenly along the stroke
+    x = np.concatenate([np.linspace(0, 10, 50), np.linspace(11, 100, 10)])
+    locations = np.stack([x, np.zeros(len(x))], axis=1)
+    cloud = sample_cloud(locations, np.diff(x), 11)
+    assert np.allclose(cloud[:, 0], np.arange(0, 110, 10), atol=5)
+
+
+def test_curves_cloud():
+    # two parallel lines of equal length get the same number of points, without points in between
+    line = np.stack([np.linspace(0, 100, 100), np.zeros(100)], axis=1)
+    cloud = curves_cloud([line, line + [0, 50]], 20)
+    assert np.sum(cloud[:, 1] == 0) == 10 and np.sum(cloud[:, 1] == 50) == 10
+
+
+def test_cloud_distance():
+    rng = np.random.default_rng(0)
+    cloud = rng.normal(size=(32, 2)) * 100
+
+    # the order of the points does not matter
+    assert math.isclose(cloud_distance(cloud, rng.permutation(cloud)), 0, abs_tol=1e-9)
+    assert math.isclose(cloud_distance(cloud, cloud + [3, 4]), 5)
+
+
+def test_is_sign_point_cloud():
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+    timestamps, locations = extract_timestamps_and_locations(recordings['V'])
+
+    # the interleaved strokes of both fingers are closer to the templates of their own sign than to others
+    cloud = gesture_cloud('V', timestamps, locations)
+    assert cloud_distance(cloud, template_cloud('V')) < min(cloud_distance(cloud, template_cloud(sign))
+                                                            for sign in ['CH', 'LL', 'RR', 'W'])
+    assert is_sign_point_cloud('V', timestamps, locations, threshold=30)
+    assert not is_sign_point_cloud('V', *extract_timestamps_and_locations(recordings['RR']), threshold=30)
+
+
+def test_sign_engine(monkeypatch):
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+    timestamps, locations = extract_timestamps_and_locations(recordings['V'])
+
+    # the recogniser of the sign switches to the point clouds
+    monkeypatch.setitem(point_cloud.SIGN_ENGINES, 'V', 'point_cloud')
+    monkeypatch.setitem(point_cloud.POINT_CLOUD_THRESHOLDS, 'V', 1.0)
+    assert not is_sign_v(timestamps, locations)
+    monkeypatch.setitem(point_cloud.POINT_CLOUD_THRESHOLDS, 'V', 30.0)
+    assert is_sign_v(timestamps, locations)
+
+
+if __name__ == '__main__':
+    pytest.main()
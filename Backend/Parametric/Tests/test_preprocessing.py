@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from preprocessing import remove_duplicate_points, remove_outliers, ramer_douglas_peucker, resample_by_arc_length, \
+    preprocess_for_sign, preprocess_touches_for_sign
+
+
+def test_remove_duplicate_points():
+    timestamps = np.array([0.0, 0.1, 0.2, 0.3])
+    locations = np.array([[0, 0], [0, 0], [1, 1], [0, 0]])
+
+    result_timestamps, result_locations = remove_duplicate_points(timestamps, locations)
+
+    # only consecutive duplicates are removed
+    assert np.array_equal(result_timestamps, [0.0, 0.2, 0.3])
+    assert np.array_equal(result_locations, [[0, 0], [1, 1], [0, 0]])
+
+
+def test_remove_outliers():
+    # a straight stroke with a stray touch point at the end
+    locations = np.array([[i, i] for i in range(10)] + [[300, 5]], dtype=float)
+    timestamps = np.arange(len(locations), dtype=float)
+
+    _, result = remove_outliers(timestamps, locations, factor=8.0)
+    assert len(result) == 10 and not np.any(result[:, 0] == 300), "Stray point should be removed"
+
+    # a jump between two curves is kept
+    locations = np.array([[0, 0], [1, 1], [2, 2], [3, 3], [200, 200], [201, 201], [202, 202]], dtype=float)
+    _, result = remove_outliers(np.arange(7, dtype=float), locations, factor=8.0)
+    assert len(result) == 7, "Jump between curves should be kept"
+
+
+def test_ramer_douglas_peucker():
+    # points on a straight line with one corner
+    locations = np.array([[0, 0], [1, 0], [2, 0], [3, 0], [3, 1], [3, 2]], dtype=float)
+
+    keep = ramer_douglas_peucker(locations, epsilon=0.1)
+
+    assert np.array_equal(np.flatnonzero(keep), [0, 3, 5]), "Only endpoints and corner should be kept"
+
+
+def test_resample_by_arc_length():
+    timestamps = np.array([0.0, 1.0, 3.0])
+    locations = np.array([[0, 0], [1, 0], [3, 0]], dtype=float)
+
+    result_timestamps, result_locations = resample_by_arc_length(timestamps, locations, 4)
+
+    assert np.allclose(result_locations, [[0, 0], [1, 0], [2, 0], [3, 0]])
+    assert np.allclose(result_timestamps, [0.0, 1.0, 2.0, 3.0])
+
+
+def test_preprocess_for_sign():
+    # unknown signs are passed through unchanged, converted to numpy arrays
+    timestamps, locations = preprocess_for_sign('unknown', [0.0, 1.0], [[0, 0], [0, 0]])
+
+    assert isinstance(locations, np.ndarray)
+    assert locations.shape == (2, 2)
+
+
+def test_preprocess_touches_for_sign():
+    # a duplicate of the first finger and a stray point at the end of the second finger
+    timestamps = np.arange(8, dtype=float)
+    locations = np.array([[0, 0], [0, 0], [50, 0], [1, 1], [51, 1], [2, 2], [52, 2], [300, 300]], dtype=float)
+    touch_ids = np.array([1, 1, 2, 1, 2, 1, 2, 2])
+
+    result_timestamps, result_locations, result_ids = preprocess_touches_for_sign('CH', timestamps, locations,
+                                                                                touch_ids)
+
+    # identifiers stay aligned with the remaining points
+    assert np.array_equal(result_timestamps, [0, 2, 3, 4, 5, 6, 7])
+    assert np.array_equal(result_ids, [1, 2, 1, 2, 1, 2, 2])
+    assert len(result_locations) == len(result_ids)
+
+
+if __name__ == '__main__':
+    pytest.main()
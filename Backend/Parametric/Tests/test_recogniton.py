@@ -3,7 +3,12 @@ import math
 import numpy as np
 import pytest
 
-from recognition import euclidean_distance, compare_sequences_fdtw
+from parameterisation import evaluate_bezier, degree_elevation_matrix
+from recognition import euclidean_distance, compare_sequences_fdtw, compare_sequences_dtw, dtw_distance, \
+    bezier_l2_distance, bezier_distance_bound, compare_control_points, downsample_curve, curve_pyramid, \
+    compare_sequences_coarse_to_fine, COARSE_TO_FINE_STATISTICS, coarse_to_fine_hit_rates, discrete_frechet_distance, \
+    hausdorff_distance, resampled_l2_distance, CURVE_METRICS, DTW_THRESHOLDS, SIGN_METRICS, METRIC_THRESHOLDS, \
+    sign_metric, recogniser_metric, compare_curves, dtw_distance_batch
 
 
 def test_euclidean_distance():
@@ -36,5 +41,195 @@ def test_compare_sequences():
     assert compare_sequences_fdtw(seq1, seq3) > 0, "different sequences should have > 0 distance"
 
 
+def full_dtw(seq1: np.ndarray, seq2: np.ndarray, band: int = None) -> float:
+    # textbook dynamic programming over the whole cost matrix
+    accumulated = np.full((len(seq1) + 1, len(seq2) + 1), np.inf)
+    accumulated[0, 0] = 0
+    for i in range(len(seq1)):
+        for j in range(len(seq2)):
+            if band is None or abs(i - j) <= band:
+                accumulated[i + 1, j + 1] = euclidean_distance(seq1[i], seq2[j]) + min(
+                    accumulated[i, j + 1], accumulated[i + 1, j], accumulated[i, j])
+    return accumulated[-1, -1]
+
+
+def test_dtw_distance():
+    rng = np.random.default_rng(0)
+    seq1 = np.cumsum(rng.normal(size=(30, 2)), axis=0)
+    seq2 = np.cumsum(rng.normal(size=(25, 2)), axis=0)
+
+    # matches the full calculation without and with a band, which is widened to the length difference
+    assert math.isclose(dtw_distance(seq1, seq2, band=None), full_dtw(seq1, seq2))
+    assert math.isclose(dtw_distance(seq1, seq2, band=3), full_dtw(seq1, seq2, band=5))
+    assert dtw_distance(seq1, seq2, band=None) <= dtw_distance(seq1, seq2, band=5)
+
+    # without warping, the squared distances of corresponding points are accumulated
+    assert math.isclose(dtw_distance(seq1, seq1 + [3, 4], band=0, squared=True), 25 * len(seq1))
+
+
+def test_dtw_early_abandon():
+    seq1 = np.array([[0, 0], [1, 1], [2, 2], [3, 3]], dtype=float)
+    seq2 = seq1 + [0, 100]
+    distance = dtw_distance(seq1, seq2)
+
+    # the exact distance is returned below the threshold, infinity once it is exceeded
+    assert compare_sequences_dtw(seq1, seq2, threshold=distance + 1) == distance
+    assert compare_sequences_dtw(seq1, seq2, threshold=distance / 2) == math.inf
+
+
+def test_dtw_distance_batch():
+    rng = np.random.default_rng(2)
+    seqs1 = np.cumsum(rng.normal(size=(6, 40, 2)) * 5, axis=1)
+    seqs2 = np.cumsum(rng.normal(size=(6, 40, 2)) * 5, axis=1)
+    expected = np.array([dtw_distance(seq1, seq2) for seq1, seq2 in zip(seqs1, seqs2)])
+
+    # every pair of the batch has the distance of its separate calculation
+    assert np.allclose(dtw_distance_batch(seqs1, seqs2), expected)
+
+    # pairs beyond their threshold are infinity, and abandoned all at once
+    thresholds = expected * np.array([0.5, 2, 0.5, 2, 0.5, 2])
+    distances = dtw_distance_batch(seqs1, seqs2, thresholds=thresholds)
+    assert np.all(np.isinf(distances[::2])) and np.allclose(distances[1::2], expected[1::2])
+    assert np.all(np.isinf(dtw_distance_batch(seqs1, seqs2, thresholds=expected / 2)))
+    assert dtw_distance_batch(seqs1[:0], seqs2[:0]).shape == (0,)
+
+
+def test_degree_elevation():
+    controls = np.array([[0, 0], [10, 30], [40, 20], [50, 0]], dtype=float)
+
+    elevated = degree_elevation_matrix(3, 5) @ controls
+
+    # the elevated control points describe the same curve
+    assert elevated.shape == (6, 2)
+    assert np.allclose(evaluate_bezier(elevated), evaluate_bezier(controls))
+
+
+def test_bezier_l2_distance():
+    rng = np.random.default_rng(0)
+    controls1 = rng.normal(size=(4, 2)) * 50
+    controls2 = rng.normal(size=(5, 2)) * 50
+
+    # matches the root mean square distance between densely sampled corresponding points
+    sampled = np.linalg.norm(evaluate_bezier(controls1, 20001) - evaluate_bezier(controls2, 20001), axis=1)
+    assert math.isclose(bezier_l2_distance(controls1, controls2), np.sqrt(np.mean(sampled ** 2)), rel_tol=1e-3)
+
+    # the bound is never below the largest distance
+    assert bezier_distance_bound(controls1, controls2) >= sampled.max()
+
+    # a shifted curve has the length of the shift as distance
+    assert math.isclose(bezier_l2_distance(controls1, controls1 + [3, 4]), 5)
+
+
+def test_compare_control_points():
+    controls = np.array([[0, 0], [10, 30], [40, 20], [50, 0]], dtype=float)
+
+    assert math.isclose(compare_control_points(controls, controls + [3, 4], threshold=10), 5)
+    assert compare_control_points(controls, controls + [30, 40], threshold=10) == math.inf
+
+
+def test_curve_pyramid():
+    curve = evaluate_bezier(np.array([[0, 0], [10, 30], [40, 20], [50, 0]], dtype=float))
+
+    pyramid = curve_pyramid(curve, levels=(16, 25))
+
+    # the reduced curves keep the end points and the full-resolution curve is included
+    assert sorted(pyramid) == [16, 25, 100]
+    assert np.array_equal(pyramid[100], curve)
+    assert np.allclose(pyramid[25][[0, -1]], curve[[0, -1]])
+    # a linear curve is reproduced exactly by the interpolation
+    line = np.stack([np.linspace(0, 99, 100), np.zeros(100)], axis=1)
+    assert np.allclose(downsample_curve(line, 12), np.stack([np.linspace(0, 99, 12), np.zeros(12)], axis=1))
+
+
+def test_compare_sequences_coarse_to_fine():
+    template = evaluate_bezier(np.array([[0, 0], [100, 300], [400, 200], [500, 0]], dtype=float))
+    pyramid = curve_pyramid(template)
+    distance = dtw_distance(template + 10, template)
+    COARSE_TO_FINE_STATISTICS.clear()
+
+    # clear accepts and rejects are decided on the coarse curves
+    assert compare_sequences_coarse_to_fine(template + 10, template, distance * 10, pyramid) <= distance * 10
+    assert compare_sequences_coarse_to_fine(template + 10, template, distance / 10, pyramid) == np.inf
+    assert COARSE_TO_FINE_STATISTICS['full_resolution'] == 0
+
+    # a threshold close to the coarse estimate is decided on the full-resolution curves
+    estimate = dtw_distance(downsample_curve(template + 10, 25), pyramid[25], band=5) * 4
+    assert compare_sequences_coarse_to_fine(template + 10, template, max(estimate, distance), pyramid) == distance
+    assert COARSE_TO_FINE_STATISTICS['full_resolution'] == 1
+    assert math.isclose(sum(coarse_to_fine_hit_rates().values()), 1)
+
+    # coarse accepts can be disabled to obtain the exact distance
+    assert compare_sequences_coarse_to_fine(template + 10, template, distance * 10, pyramid,
+                                            accept_coarse=False) == distance
+
+
+def full_frechet(seq1: np.ndarray, seq2: np.ndarray) -> float:
+    # reference implementation filling the whole coupling matrix cell by cell
+    costs = np.linalg.norm(seq1[:, None] - seq2[None, :], axis=2)
+    coupling = np.full((len(seq1) + 1, len(seq2) + 1), np.inf)
+    coupling[0, 0] = 0
+    for i in range(1, len(seq1) + 1):
+        for j in range(1, len(seq2) + 1):
+            coupling[i, j] = max(costs[i - 1, j - 1], min(coupling[i - 1, j], coupling[i, j - 1],
+                                                          coupling[i - 1, j - 1]))
+    return coupling[-1, -1]
+
+
+def test_discrete_frechet_distance():
+    rng = np.random.default_rng(0)
+    seq1 = rng.normal(size=(40, 2)) * 50
+    seq2 = rng.normal(size=(30, 2)) * 50
+    distance = full_frechet(seq1, seq2)
+
+    assert math.isclose(discrete_frechet_distance(seq1, seq2), distance)
+    assert discrete_frechet_distance(seq1, seq2, threshold=distance / 2) == math.inf
+    # a shifted curve has the length of the shift as distance
+    assert math.isclose(discrete_frechet_distance(seq1, seq1 + [3, 4]), 5)
+
+
+def test_hausdorff_distance():
+    seq1 = np.array([[0, 0], [10, 0], [20, 0]], dtype=float)
+    seq2 = np.array([[0, 1], [20, 1], [40, 0]], dtype=float)
+
+    # the point (40, 0) is 20 away from the nearest point of the first sequence
+    assert math.isclose(hausdorff_distance(seq1, seq2), 20)
+    assert math.isclose(hausdorff_distance(seq2, seq1), 20)
+    assert hausdorff_distance(seq1, seq2, threshold=10) == math.inf
+    # the order of the points is ignored
+    assert math.isclose(hausdorff_distance(seq1, seq1[::-1]), 0)
+
+
+def test_resampled_l2_distance():
+    line = np.stack([np.linspace(0, 100, 100), np.zeros(100)], axis=1)
+    # the same line sampled with a different speed
+    unevenly_sampled = np.stack([np.linspace(0, 10, 50) ** 2, np.zeros(50)], axis=1)
+
+    assert math.isclose(resampled_l2_distance(line, unevenly_sampled), 0, abs_tol=1e-9)
+    assert math.isclose(resampled_l2_distance(line, line + [3, 4]), 5)
+    assert resampled_l2_distance(line, line + [3, 4], threshold=4) == math.inf
+
+
+def test_metric_registry():
+    template = evaluate_bezier(np.array([[0, 0], [100, 300], [400, 200], [500, 0]], dtype=float))
+
+    # every metric has a threshold for every sign and accepts a slightly shifted curve
+    for metric, distance_function in CURVE_METRICS.items():
+        assert math.isclose(distance_function(template, template, None), 0, abs_tol=1e-3)
+        if metric != 'dtw':
+            assert set(METRIC_THRESHOLDS[metric]) == set(DTW_THRESHOLDS)
+            assert compare_curves(metric, template + 1, template, METRIC_THRESHOLDS[metric]['G']) < math.inf
+
+    # signs use Dynamic Time Warping with the threshold of their recogniser unless configured otherwise
+    assert sign_metric('G', 2000.0) == ('dtw', 2000.0)
+    SIGN_METRICS['G'] = 'l2'
+    try:
+        assert sign_metric('G', 2000.0) == ('l2', METRIC_THRESHOLDS['l2']['G'])
+        # the other metrics are calibrated against DTW_THRESHOLDS, so recognisers at other thresholds keep their own
+        assert sign_metric('G', 3000.0) == ('dtw', 3000.0)
+        assert recogniser_metric('G', [2000.0, 3000.0]) == ('dtw', [2000.0, 3000.0])
+    finally:
+        del SIGN_METRICS['G']
+
+
 if __name__ == '__main__':
     pytest.main()
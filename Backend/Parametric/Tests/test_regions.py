@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from regions import TAP_SIGNS, compile_region, points_inside_region, locations_inside_region, sign_region, is_tap_sign
+
+SQUARE = {'type': 'rectangle', 'top_left': [0, 0], 'bottom_right': [10, 10]}
+CIRCLE = {'type': 'circle', 'center': [10, 5], 'radius': 5}
+TRIANGLE = {'type': 'polygon', 'vertices': [[0, 0], [10, 0], [0, 10]]}
+
+
+def test_compile_region():
+    # the bounding boxes of combined regions enclose or overlap those of their parts
+    assert np.allclose(compile_region(CIRCLE)['bounding_box'], [[5, 0], [15, 10]])
+    assert np.allclose(compile_region({'type': 'union', 'regions': [SQUARE, CIRCLE]})['bounding_box'],
+                       [[0, 0], [15, 10]])
+    assert np.allclose(compile_region({'type': 'intersection', 'regions': [SQUARE, CIRCLE]})['bounding_box'],
+                       [[5, 0], [10, 10]])
+
+    with pytest.raises(ValueError):
+        compile_region({'type': 'ellipse'})
+    with pytest.raises(ValueError):
+        compile_region({'type': 'polygon', 'vertices': [[0, 0], [1, 1]]})
+
+
+def test_points_inside_region():
+    points = np.array([[1.0, 1.0], [8.0, 8.0], [12.0, 5.0], [20.0, 5.0], [-1.0, 5.0]])
+
+    assert list(points_inside_region(compile_region(SQUARE), points)) == [True, True, False, False, False]
+    assert list(points_inside_region(compile_region(CIRCLE), points)) == [False, True, True, False, False]
+    assert list(points_inside_region(compile_region(TRIANGLE), points)) == [True, False, False, False, False]
+    assert list(points_inside_region(compile_region({'type': 'union', 'regions': [TRIANGLE, CIRCLE]}), points)) == \
+        [True, True, True, False, False]
+    assert list(points_inside_region(compile_region({'type': 'intersection', 'regions': [SQUARE, CIRCLE]}),
+                                     points)) == [False, True, False, False, False]
+
+    # a concave polygon excludes its notch
+    notch = compile_region({'type': 'polygon', 'vertices': [[0, 0], [10, 0], [10, 10], [5, 5], [0, 10]]})
+    assert list(points_inside_region(notch, np.array([[5.0, 2.0], [5.0, 8.0]]))) == [True, False]
+
+
+def test_tap_signs():
+    # the stored regions of the tap signs accept taps on their centre
+    for sign in TAP_SIGNS:
+        lower, upper = sign_region(sign)['bounding_box']
+        centre = ((lower + upper) / 2).tolist()
+        assert locations_inside_region(sign_region(sign), [centre])
+        assert is_tap_sign(sign, [0.0, 0.1], [centre, centre])
+        assert not is_tap_sign(sign, [0.0, 0.1], [centre, (upper + 1).tolist()])
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,76 @@
+import builtins
+import os
+import numpy as np
+import pytest
+
+from extraction import load_recorded_gestures, extract_gesture
+from matching import load_template
+from recognition import DTW_THRESHOLDS, SIGN_DURATIONS, DEFAULT_DURATION, timestamp_duration_valid
+from regions import TAP_SIGNS, compile_region, sign_region
+from registry import SIGN_RECOGNISERS, build_registry
+from templates import PARAMETRIC_DIRECTORY, MULTI_CURVE_SIGNS, SIGN_TEMPLATES
+
+
+def test_timestamp_duration_valid():
+    assert timestamp_duration_valid('LL', [0.0, 4.0]) and not timestamp_duration_valid('Y', [0.0, 1.5])
+    # signs without a configured duration use the default
+    assert timestamp_duration_valid('A', [0.0, 2.0]) and not timestamp_duration_valid('A', [0.0, 2.5])
+    # a duration preloaded by the recogniser takes precedence
+    assert timestamp_duration_valid('Y', [0.0, 1.5], duration=2.0) and not timestamp_duration_valid('LL', [0, 4], 3.0)
+
+
+def test_build_registry():
+    registry = build_registry()
+    assert set(registry) == set(SIGN_RECOGNISERS)
+
+    for sign, recogniser in registry.items():
+        assert (recogniser.function, recogniser.uses_touch_ids) == SIGN_RECOGNISERS[sign]
+        assert recogniser.duration == SIGN_DURATIONS.get(sign, DEFAULT_DURATION)
+        # tap signs are registered with their region, all other signs with one template per curve
+        if sign in TAP_SIGNS:
+            assert recogniser.templates is None and recogniser.region == sign_region(sign)
+        else:
+            assert len(recogniser.templates.templates) == len(recogniser.templates.thresholds)
+    assert registry['Ñ'].templates.thresholds == [DTW_THRESHOLDS['Ñ']]
+    assert registry['W'].templates.thresholds == MULTI_CURVE_SIGNS['W']['thresholds']
+
+    # the recognisers hold the templates of their files
+    template = load_template(os.path.join(PARAMETRIC_DIRECTORY, SIGN_TEMPLATES['G']['templates'][0]))[0]
+    assert np.array_equal(registry['G'].templates.templates[0], template)
+
+
+def test_recognisers_without_disk_access(monkeypatch):
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+    registry = build_registry()
+
+    def no_disk_access(*args, **kwargs):
+        raise AssertionError("Disk accessed while recognising")
+
+    # recognising a gesture only uses the data loaded by the registry
+    monkeypatch.setattr(builtins, 'open', no_disk_access)
+    monkeypatch.setattr(np, 'load', no_disk_access)
+    for sign in ['G', 'H', 'J', 'LL', 'RR', 'V', 'W', 'Y', 'Z']:
+        assert registry[sign](extract_gesture(json_data=recordings[sign]))
+    assert not registry['G'](extract_gesture(json_data=recordings['H']))
+
+
+def test_recognisers_use_preloaded_data():
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+    registry = build_registry(signs=['A', 'G', 'V'])
+    gestures = {sign: extract_gesture(json_data=recordings[sign]) for sign in ['G', 'V']}
+    assert registry['G'](gestures['G']) and registry['V'](gestures['V'])
+
+    # the recognisers compare with the thresholds and duration they were built with
+    registry['G'].templates.thresholds = [0.0]
+    registry['V'].duration = 0.0
+    assert not registry['G'](gestures['G']) and not registry['V'](gestures['V'])
+
+    # tap signs check the region they were built with
+    tap = extract_gesture(json_data=[{'timestamp': 0.0, 'location': [1e6, 1e6], 'id': 0}])
+    assert not registry['A'](tap)
+    registry['A'].region = compile_region({'type': 'rectangle', 'top_left': [0, 0], 'bottom_right': [2e6, 2e6]})
+    assert registry['A'](tap)
+
+
+if __name__ == '__main__':
+    pytest.main()
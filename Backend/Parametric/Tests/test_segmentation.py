@@ -0,0 +1,97 @@
+import os
+import numpy as np
+import pytest
+
+from extraction import extract_timestamps_and_locations, load_recorded_gestures, split_touch_locations_two_curves, \
+    split_touch_locations_three_curves
+from segmentation import segment_by_touch_id, segment_by_time_gap, segment_by_nearest_track, segment_curves, \
+    SIGN_SEGMENTATION
+from Parametric.sign_rr.sign_rr import is_sign_rr
+
+PARAMETRIC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def interleaved_lines(num_points: int = 40) -> np.ndarray:
+    # two fingers moving down in parallel, reported alternately
+    first = np.stack([np.full(num_points, 100.0), np.linspace(0, 200, num_points)], axis=1)
+    second = np.stack([np.full(num_points, 300.0), np.linspace(0, 200, num_points)], axis=1)
+    return np.stack([first, second], axis=1).reshape(-1, 2)
+
+
+def test_segment_by_touch_id():
+    touch_ids = np.array([7, 3, 7, 3, 3, 7])
+
+    segments = segment_by_touch_id(touch_ids)
+
+    # fingers are ordered by their first touch and keep the order of their points
+    assert [segment.tolist() for segment in segments] == [[0, 2, 5], [1, 3, 4]]
+
+
+def test_segment_by_time_gap():
+    timestamps = np.array([0.0, 0.01, 0.02, 0.5, 0.51, 1.2])
+
+    segments = segment_by_time_gap(timestamps, min_gap=0.15)
+
+    assert [segment.tolist() for segment in segments] == [[0, 1, 2], [3, 4], [5]]
+
+
+def test_segment_by_nearest_track():
+    locations = interleaved_lines()
+    # a stray touch point next to the second finger
+    locations = np.vstack([locations, [[320, 190]]])
+
+    first, second = segment_by_nearest_track(locations, num_curves=2, threshold=20)
+
+    assert np.all(locations[first, 0] == 100)
+    assert np.all(locations[second, 0] >= 300) and second[-1] == len(locations) - 1
+
+    # a single track cannot be split
+    with pytest.raises(ValueError):
+        segment_by_nearest_track(locations[:-1:2], num_curves=2, threshold=20)
+
+
+def test_segment_curves_modes():
+    locations = interleaved_lines()
+    timestamps = np.repeat(np.arange(len(locations) // 2) * 0.01, 2)
+
+    # touch identifiers take precedence
+    touch_ids = np.tile([1, 2], len(locations) // 2)
+    curve1, curve2 = segment_curves('CH', timestamps, locations, touch_ids)
+    assert np.all(curve1[:, 0] == 100) and np.all(curve2[:, 0] == 300)
+
+    # strokes that follow each other are split at the pause, even if they overlap in space
+    sequential = np.vstack([locations[::2], locations[::2] + 5])
+    timestamps = np.concatenate([np.arange(40) * 0.01, 1 + np.arange(40) * 0.01])
+    curve1, curve2 = segment_curves('CH', timestamps, sequential)
+    assert len(curve1) == len(curve2) == 40 and np.all(curve2[:, 0] == 105)
+
+
+def test_segment_curves_matches_recordings():
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+
+    for sign, options in SIGN_SEGMENTATION.items():
+        timestamps, locations = extract_timestamps_and_locations(recordings[sign])
+        curves = segment_curves(sign, np.array(timestamps), np.array(locations))
+        if options['num_curves'] == 2:
+            expected = split_touch_locations_two_curves(sign, locations)
+        else:
+            expected = split_touch_locations_three_curves(locations)
+
+        # the recorded gestures are split as by the sequential split
+        assert all(np.array_equal(curve, expected_curve) for curve, expected_curve in zip(curves, expected)), sign
+
+
+def test_recogniser_with_touch_ids():
+    recordings = load_recorded_gestures(PARAMETRIC_DIRECTORY)
+    timestamps, locations = extract_timestamps_and_locations(recordings['RR'])
+    curve1, _ = split_touch_locations_two_curves('RR', locations)
+
+    # labels every point with the finger found by the sequential split
+    first_finger = {tuple(location) for location in curve1}
+    touch_ids = np.array([0 if tuple(location) in first_finger else 1 for location in locations])
+
+    assert is_sign_rr(timestamps, locations, touch_ids)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,50 @@
+import pytest
+
+from sessions import MULTI_STROKE_SIGNS, SessionStore
+
+
+class Clock:
+    # clock of the store that the tests advance by hand
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_add_stroke(monkeypatch):
+    monkeypatch.setitem(MULTI_STROKE_SIGNS, 'X', {'strokes': 3, 'join_window': 1.0})
+    store = SessionStore(Clock())
+
+    # the sessions of different clients do not interfere and close once complete
+    assert [store.add_stroke('a', 'X', True), store.add_stroke('b', 'X', True), store.add_stroke('a', 'X', True)] \
+        == [1, 1, 2]
+    assert store.add_stroke('a', 'X', True) == 3 and len(store) == 1
+
+    # an incorrect stroke discards the session, and a stroke of another sign starts a new one
+    assert store.add_stroke('b', 'X', False) == 0 and len(store) == 0
+    assert store.add_stroke('b', 'X', True) == 1 and store.add_stroke('b', 'Y', True) == 1
+
+
+def test_expire(monkeypatch):
+    monkeypatch.setitem(MULTI_STROKE_SIGNS, 'X', {'strokes': 3, 'join_window': 1.0})
+    clock = Clock()
+    store = SessionStore(clock)
+
+    store.add_stroke('a', 'X', True)
+    clock.now = 0.5
+    store.add_stroke('b', 'X', True)
+
+    # every stroke extends the join window of its session
+    clock.now = 0.9
+    assert store.add_stroke('a', 'X', True) == 2
+    clock.now = 1.6
+    assert store.expire() == 1 and len(store) == 1
+
+    # a stroke after the join window starts a new session
+    clock.now = 2.0
+    assert store.add_stroke('a', 'X', True) == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
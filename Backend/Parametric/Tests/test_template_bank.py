@@ -0,0 +1,100 @@
+import json
+import os
+import numpy as np
+import pytest
+
+from recognition import dtw_distance
+from template_bank import TemplateBank, curve_embedding, build_template_bank, load_template_bank, recording_paths
+from template_store import TemplateStore, write_template_store
+from templates import SIGN_TEMPLATES
+
+PARAMETRIC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def random_bank(rng: np.random.Generator, num_templates: int) -> TemplateBank:
+    # random walks of a single sign and stroke at random positions
+    curves = np.cumsum(rng.normal(size=(num_templates, 100, 2)) * 5, axis=1) \
+        + rng.normal(size=(num_templates, 1, 2)) * 200
+    return TemplateBank(curves, ['G'] * num_templates, [0] * num_templates, [1] * num_templates,
+                        [f'user{index}' for index in range(num_templates)])
+
+
+def test_curve_embedding():
+    line = np.stack([np.linspace(0, 70, 100), np.zeros(100)], axis=1)
+
+    # the coarse curve of a line, flattened
+    assert np.allclose(curve_embedding(line).reshape(-1, 2), np.stack([np.arange(0, 80, 10), np.zeros(8)], axis=1))
+    assert curve_embedding(np.stack([line, line])).shape == (2, 16)
+
+
+def test_nearest():
+    rng = np.random.default_rng(1)
+    bank = random_bank(rng, 200)
+    curve = bank.curves[17] + rng.normal(size=(100, 2))
+    distances = np.array([dtw_distance(curve, template) for template in bank.curves])
+    threshold = distances.min() * 2
+
+    index, distance, statistics = bank.nearest('G', curve, threshold)
+
+    # finds the exact nearest template, most templates are pruned by the index
+    assert index == 17 and np.isclose(distance, distances.min())
+    assert statistics['pruned_index'] == 200 - 32
+    assert bank.nearest('G', curve, threshold, num_candidates=None)[2]['pruned_index'] == 0
+
+    assert bank.nearest('G', curve, distances.min() / 2)[0] == -1
+    assert bank.nearest('H', curve, threshold)[0] == -1
+
+
+def test_match_and_store(tmp_path):
+    curves = np.stack([np.stack([np.linspace(0, 100, 100), np.full(100, offset)], axis=1) for offset in [0, 50, 52]])
+    bank = TemplateBank(curves, ['V', 'V', 'V'], [0, 1, 1], [4, 4, 4], ['a', 'b', 'c'])
+
+    # every curve is assigned to the stroke of its nearest template
+    strokes, distances = bank.match('V', [curves[2] + 1, curves[0]], thresholds=[1000, 1000])
+    assert np.array_equal(strokes, [1, 0]) and distances[1] < 1e-3
+    # every stroke has its own threshold on the scale of the metric
+    assert bank.match('V', [curves[2] + 1], thresholds=[1000, 1])[0].tolist() == [-1]
+    strokes, distances = bank.match('V', [curves[2] + 1, curves[0]], thresholds=[10, 10], metric='hausdorff')
+    assert np.array_equal(strokes, [1, 0]) and np.allclose(distances, [np.sqrt(2), 0])
+    assert bank.num_strokes('V') == 2 and np.array_equal(bank.templates('V', 1), [1, 2])
+
+    # the curves are packed into the template store and read back with their strokes and sources
+    write_template_store(str(tmp_path), bank.store_arrays(), {})
+    loaded = TemplateBank.from_store(TemplateStore.load(str(tmp_path)))
+    assert np.array_equal(loaded.curves, bank.curves) and np.array_equal(loaded.envelopes, bank.envelopes)
+    assert loaded.strokes.tolist() == [0, 1, 1] and loaded.sources.tolist() == ['a', 'b', 'c']
+    assert not loaded.curves.flags.writeable
+
+
+def test_build_template_bank(tmp_path):
+    # a second recording of 'G' from another user, drawn lower
+    with open(os.path.join(PARAMETRIC_DIRECTORY, 'sign_g', 'data_g.json')) as file:
+        recording = json.load(file)
+    for touch in recording:
+        touch['location'] = [touch['location'][0], touch['location'][1] + 40]
+    with open(tmp_path / 'data_g_user2.json', 'w') as file:
+        json.dump(recording, file)
+    assert recording_paths(str(tmp_path), 'G') == [str(tmp_path / 'data_g_user2.json')]
+
+    bank = build_template_bank(PARAMETRIC_DIRECTORY, [str(tmp_path)])
+
+    # the template files plus the new recording, the recordings of the sign directories duplicate the templates
+    assert len(bank.templates('G')) == 2
+    assert all(bank.num_strokes(sign) == len(templates['templates']) for sign, templates in SIGN_TEMPLATES.items())
+    assert bank.nearest('G', bank.curves[bank.templates('G')[1]], threshold=1)[0] == bank.templates('G')[1]
+
+    # only the curve of the recording is packed into the store, the template files are in the store anyway
+    arrays = bank.store_arrays()
+    assert list(arrays) == ['bank/G/0/' + os.path.relpath(str(tmp_path / 'data_g_user2.json'), PARAMETRIC_DIRECTORY)]
+    write_template_store(str(tmp_path), {**{path: np.load(os.path.join(PARAMETRIC_DIRECTORY, path))
+                                            for path in SIGN_TEMPLATES['G']['templates']}, **arrays}, {})
+    loaded = load_template_bank(str(tmp_path))
+    assert np.array_equal(loaded.curves, bank.curves[bank.templates('G')])
+
+    # the bank of the parametric store holds one template per template file
+    assert len(load_template_bank(PARAMETRIC_DIRECTORY)) == sum(len(templates['templates'])
+                                                              for templates in SIGN_TEMPLATES.values())
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,123 @@
+import os
+import numpy as np
+import pytest
+
+import template_store
+from extraction import load_recorded_gestures
+from matching import load_template
+from Parametric.sign_g.sign_g import is_sign_g
+from regions import load_region, sign_region
+from template_store import TEMPLATE_STORE_DATA, TemplateStore, write_template_store, reload_template_store, \
+    current_template_store
+from recognition import DTW_THRESHOLDS, SIGN_METRICS
+from templates import PARAMETRIC_DIRECTORY, CONTROLS_SUFFIX, SIGN_TEMPLATES, MULTI_CURVE_SIGNS, SIGN_VARIANTS, \
+    template_thresholds
+
+
+def test_write_template_store(tmp_path):
+    directory = str(tmp_path)
+    curve = np.arange(20.0).reshape(10, 2)
+
+    region = {'type': 'circle', 'center': [1, 2], 'radius': 3}
+    assert write_template_store(directory, {'sign_x/curve.npy': curve, 'Templates/x.json': curve[:3]},
+                                {'sign_x/curve.npy': {'metric': 'dtw', 'threshold': 1.0}},
+                                {'sign_x/region_template.json': region}) == 1
+    store = TemplateStore.load(directory)
+    assert store.version == 1 and store.thresholds == {'sign_x/curve.npy': {'metric': 'dtw', 'threshold': 1.0}}
+    assert store.regions == {'sign_x/region_template.json': region}
+    assert np.array_equal(store.array('sign_x/curve.npy'), curve) and store.array('sign_y/curve.npy') is None
+    assert store.key(os.path.join(directory, 'sign_x', 'curve.npy')) in store
+
+    # the arrays are read-only views of the mapped file
+    assert not store.array('Templates/x.json').flags.writeable
+
+    # versions older than the previous one are removed
+    for version in [2, 3]:
+        assert write_template_store(directory, {'sign_x/curve.npy': curve * version}, {}) == version
+    assert sorted(os.listdir(directory)) == ['template_store.json', TEMPLATE_STORE_DATA.format(version=2),
+                                             TEMPLATE_STORE_DATA.format(version=3)]
+
+
+def test_reload_template_store(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    monkeypatch.setattr(template_store, '_current_store', None)
+    monkeypatch.setattr(template_store, 'STORE_RELOAD_CALLBACKS', [])
+    reloads = []
+    template_store.STORE_RELOAD_CALLBACKS.append(lambda: reloads.append(current_template_store().version))
+
+    # nothing is loaded without a store, and an unchanged store is not loaded again
+    assert not reload_template_store(directory)
+    write_template_store(directory, {'a.npy': np.zeros(2)}, {})
+    assert reload_template_store(directory) and not reload_template_store(directory)
+
+    # a new version is swapped in, while the arrays of the previous one stay valid
+    previous = current_template_store().array('a.npy')
+    write_template_store(directory, {'a.npy': np.ones(2)}, {})
+    os.utime(os.path.join(directory, 'template_store.json'), (0, 1))
+    assert reload_template_store(directory)
+    assert reloads == [1, 2]
+    assert np.array_equal(previous, np.zeros(2)) and np.array_equal(current_template_store().array('a.npy'), np.ones(2))
+
+
+def test_parametric_template_store():
+    # the stored templates equal the template files, from which load_template reads them if the store is loaded
+    store = TemplateStore.load(PARAMETRIC_DIRECTORY)
+    assert store.thresholds == template_thresholds()
+    for sign, templates in SIGN_TEMPLATES.items():
+        for path in templates['templates']:
+            assert np.array_equal(store.array(path), np.load(os.path.join(PARAMETRIC_DIRECTORY, path)))
+            assert store.array(path[:-len('.npy')] + CONTROLS_SUFFIX).shape == (templates['degree'] + 1, 2)
+
+    reload_template_store(PARAMETRIC_DIRECTORY)
+    template, envelope, _ = load_template(os.path.join(PARAMETRIC_DIRECTORY, SIGN_TEMPLATES['G']['templates'][0]))
+    assert np.shares_memory(template, current_template_store().data)
+    assert envelope.shape == (2,) + template.shape
+
+
+def test_recognisers_read_current_store(monkeypatch):
+    store = TemplateStore.load(PARAMETRIC_DIRECTORY)
+    assert set(store.regions) == {'sign_a/region_template.json', 'sign_b/region_template.json'}
+    recording = load_recorded_gestures(PARAMETRIC_DIRECTORY)['G']
+    timestamps = [item['timestamp'] for item in recording]
+    locations = [item['location'] for item in recording]
+    monkeypatch.setattr(template_store, '_current_store', store)
+    load_region.cache_clear()
+    assert is_sign_g(timestamps, locations) and sign_region('A')['type'] == 'circle'
+
+    # a new version with an edited threshold and region takes effect once it is swapped in
+    rectangle = {'type': 'rectangle', 'top_left': [0, 0], 'bottom_right': [1, 1]}
+    thresholds = {**store.thresholds, 'sign_g/bezier_curve_template.npy': {'metric': 'dtw', 'threshold': 0.0}}
+    edited = TemplateStore(store.directory, store.version + 1, store.data, store.entries, thresholds,
+                           {**store.regions, 'sign_a/region_template.json': rectangle})
+    monkeypatch.setattr(template_store, '_current_store', edited)
+    for callback in template_store.STORE_RELOAD_CALLBACKS:
+        callback()
+    assert not is_sign_g(timestamps, locations) and sign_region('A')['type'] == 'rectangle'
+    load_region.cache_clear()
+
+    # a stored threshold on another metric than the one of the recogniser is ignored
+    monkeypatch.setitem(SIGN_METRICS, 'G', 'frechet')
+    assert is_sign_g(timestamps, locations)
+
+
+def test_template_thresholds(monkeypatch):
+    # the single-curve and the multi-curve recogniser of Ñ compare with different templates at their own thresholds
+    thresholds = template_thresholds()
+    single_curve = SIGN_TEMPLATES['Ñ']['templates'][0]
+    assert thresholds[single_curve] == {'metric': 'dtw', 'threshold': DTW_THRESHOLDS['Ñ']}
+    for path, threshold in zip(MULTI_CURVE_SIGNS['Ñ']['templates'], MULTI_CURVE_SIGNS['Ñ']['thresholds']):
+        assert thresholds[path] == {'metric': 'dtw', 'threshold': threshold}
+
+    # the variants of the recognisers keep Dynamic Time Warping at their own thresholds
+    for spec in SIGN_VARIANTS.values():
+        assert thresholds[spec['templates'][0]] == {'metric': 'dtw', 'threshold': spec['thresholds'][0]}
+
+    # two recognisers must not compare the same template at different thresholds
+    monkeypatch.setitem(SIGN_TEMPLATES, 'X', {'degree': 1, 'templates': SIGN_TEMPLATES['G']['templates']})
+    monkeypatch.setitem(DTW_THRESHOLDS, 'X', DTW_THRESHOLDS['G'] + 1)
+    with pytest.raises(ValueError):
+        template_thresholds()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,15 @@
+import pytest
+
+from templates import split_recording
+
+
+def test_split_recording():
+    locations = [[0, 0], [1, 1], [2, 2], [3, 3], [110, 110], [111, 111]]
+
+    # single-curve signs are not split, two-curve signs are split into two curves
+    assert split_recording('G', locations) == [locations]
+    assert len(split_recording('RR', locations)) == 2
+
+
+if __name__ == '__main__':
+    pytest.main()
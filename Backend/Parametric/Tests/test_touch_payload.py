@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from extraction import extract_gesture
+from touch_payload import BINARY_HEADER, pack_binary_touches, parse_binary_touches, parse_columnar_touches
+
+JSON_DATA = [{'timestamp': 1000.0, 'location': [0.0, 1.0], 'id': 1},
+             {'timestamp': 1000.5, 'location': [1.5, 2.0], 'id': 2},
+             {'timestamp': 1002.0, 'location': [4.0, 0.0], 'id': 1}]
+TIMESTAMPS = [item['timestamp'] for item in JSON_DATA]
+LOCATIONS = [item['location'] for item in JSON_DATA]
+COLUMNS = {'t': TIMESTAMPS, 'x': [0.0, 1.5, 4.0], 'y': [1.0, 2.0, 0.0], 'id': [1, 2, 1]}
+
+
+@pytest.mark.parametrize('float_size', [4, 8])
+def test_parse_binary_touches(float_size):
+    body = pack_binary_touches(TIMESTAMPS, LOCATIONS, [1, 2, 1], float_size=float_size)
+    gesture = parse_binary_touches(body)
+    expected = extract_gesture(JSON_DATA)
+
+    # the binary body yields the same gesture arrays as the JSON touch data
+    assert gesture.start_time == expected.start_time
+    assert np.array_equal(gesture.timestamps, expected.timestamps)
+    assert np.array_equal(gesture.locations, expected.locations)
+    assert np.array_equal(gesture.touch_ids, expected.touch_ids)
+    assert gesture.locations.dtype == np.float32 and gesture.locations.flags['C_CONTIGUOUS']
+
+
+def test_parse_binary_touches_without_ids():
+    gesture = parse_binary_touches(pack_binary_touches(TIMESTAMPS, LOCATIONS))
+    assert gesture.touch_ids is None and len(gesture) == 3
+    assert len(parse_binary_touches(pack_binary_touches([], np.zeros((0, 2))))) == 0
+
+
+def test_parse_binary_touches_invalid():
+    body = pack_binary_touches(TIMESTAMPS, LOCATIONS, [1, 2, 1])
+    with pytest.raises(ValueError):
+        parse_binary_touches(body[:BINARY_HEADER.size - 1])
+    with pytest.raises(ValueError):
+        parse_binary_touches(b'JSON' + body[4:])
+    with pytest.raises(ValueError):
+        # the length does not match the number of points in the header
+        parse_binary_touches(body[:-4])
+    with pytest.raises(ValueError):
+        parse_binary_touches(body[:5] + bytes([2]) + body[6:])
+    with pytest.raises(ValueError):
+        parse_binary_touches(pack_binary_touches(TIMESTAMPS, [[0.0, np.nan]] * 3))
+
+
+def test_parse_columnar_touches():
+    expected = extract_gesture(JSON_DATA)
+
+    # the columnar format is detected and yields the same gesture arrays as the JSON array
+    for gesture in [parse_columnar_touches(COLUMNS), extract_gesture(COLUMNS)]:
+        assert gesture.start_time == expected.start_time
+        assert np.array_equal(gesture.timestamps, expected.timestamps)
+        assert np.array_equal(gesture.locations, expected.locations) and gesture.locations.flags['C_CONTIGUOUS']
+        assert np.array_equal(gesture.touch_ids, expected.touch_ids)
+
+    assert parse_columnar_touches({'t': [1, 2], 'x': [0, 1], 'y': [0, 1]}).touch_ids is None
+    assert len(parse_columnar_touches({'t': [], 'x': [], 'y': [], 'id': []})) == 0
+
+
+@pytest.mark.parametrize('columns', [
+    {'t': [0.0], 'x': [0.0]},
+    dict(COLUMNS, z=[0.0, 0.0, 0.0]),
+    dict(COLUMNS, x=[0.0, 1.0]),
+    dict(COLUMNS, id=[1, 2]),
+    dict(COLUMNS, x='0.0'),
+    dict(COLUMNS, x=['0.0', '1.5', '4.0']),
+    dict(COLUMNS, x=[True, False, True]),
+    dict(COLUMNS, x=[0, True, 4.0]),
+    dict(COLUMNS, id=[1, True, 1]),
+    dict(COLUMNS, x=[0.0, None, 4.0]),
+    dict(COLUMNS, x=[[0.0], [1.5], [4.0]]),
+    dict(COLUMNS, x=[0.0, float('nan'), 4.0]),
+    dict(COLUMNS, id=[1.0, 2.0, 1.0]),
+    dict(COLUMNS, id=[1, 2, 2 ** 40]),
+])
+def test_parse_columnar_touches_invalid(columns):
+    with pytest.raises(ValueError):
+        parse_columnar_touches(columns)
+
+
+if __name__ == '__main__':
+    pytest.main()
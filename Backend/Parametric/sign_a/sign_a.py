@@ -2,19 +2,11 @@
 Sign 'A' is a tap with the fist on the hand of the recipient.
 The touchscreen has difficulty detecting the whole area, but rather
 detects only individual points. Therefore, a circle is defined within
-which the tap needs to occur.
+which the tap needs to occur; it is stored in region_template.json.
 """
 
-from typing import List
-from recognition import timestamp_duration_valid
-
-# Circle template parameters for sign "A" in pixels
-# Circle center x-coordinate
-XC = 477.5
-# Circle center y-coordinate
-YC = 755.5
-# Circle radius
-R = 369.5
+from typing import List, Dict, Optional
+from regions import is_tap_sign, locations_inside_region, sign_region
 
 
 def locations_inside_circle(locations: List[List[float]]) -> bool:
@@ -24,33 +16,19 @@ def locations_inside_circle(locations: List[List[float]]) -> bool:
     :param locations: List of locations where each location is a list of x and y coordinates
     :return: True if all the locations are inside the circle, False otherwise
     """
-    for location in locations:
-        x, y = location
-        # Calculates square of distance between point and center and applying Pythagorean theorem
-        if not ((x - XC) ** 2 + (y - YC) ** 2 <= R ** 2):
-            return False
-    return True
+    return locations_inside_region(sign_region('A'), locations)
 
 
-def is_sign_a(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_a(timestamps: List[float], locations: List[List[float]], duration: Optional[float] = None,
+              region: Optional[Dict] = None) -> bool:
     """
     Checks whether a touch event is within the circle, the number of taps is below 10
     and the duration is not more than 3 seconds.
 
     :param timestamps: List of timestamps
     :param locations: List of locations where each location is a list of x and y coordinates
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param region: The compiled region of the sign, as preloaded by its recogniser; loaded if omitted.
     :return: True if the gesture satisfies all three conditions, False otherwise
     """
-    if len(timestamps) > 15:
-        print("Too many touch points")
-        return False
-
-    if not timestamp_duration_valid('A', timestamps):
-        print("Duration too long")
-        return False
-
-    if not locations_inside_circle(locations):
-        print("Location not inside circle")
-        return False
-
-    return True
+    return is_tap_sign('A', timestamps, locations, duration, region)
@@ -6,11 +6,12 @@ compared to the curve to determine accuracy.
 import os
 import json
 import numpy as np
-from typing import List
+from typing import List, Optional
 import matplotlib.pyplot as plt
 from extraction import extract_timestamps_and_locations, split_touch_locations_two_curves
 from parameterisation import generate_two_linear_beziers
-from recognition import compare_sequences_fdtw, timestamp_duration_valid, euclidean_distance
+from matching import SignTemplates
+from multi_curve import is_multi_curve_sign
 
 
 def fit_bezier_for_ch():
@@ -49,7 +50,9 @@ def fit_bezier_for_ch():
     plt.show()
 
 
-def is_sign_ch(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_ch(timestamps: List[float], locations: List[List[float]],
+               touch_ids: Optional[np.ndarray] = None, duration: Optional[float] = None,
+               templates: Optional[SignTemplates] = None) -> bool:
     """
     This function takes a list of timestamps and a list of touch locations as input.
     It checks whether the gesture represented by these data points matches the gesture of "CH"
@@ -59,50 +62,14 @@ def is_sign_ch(timestamps: List[float], locations: List[List[float]]) -> bool:
 
     :param timestamps: A list of timestamps.
     :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param touch_ids: Optional touch identifier of every point, which separates the fingers.
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param templates: The templates with their metric and thresholds, as preloaded by its recogniser; loaded if
+    omitted.
     :return: True if the gesture matches the template, False otherwise.
     """
-    # checks if time frame is valid
-    if not timestamp_duration_valid('CH', timestamps):
-        print("Duration too long")
-        return False
+    return is_multi_curve_sign('CH', timestamps, locations, touch_ids, duration, templates)
 
-    try:
-        # splits location points into respective curves
-        curve1, curve2 = split_touch_locations_two_curves('CH', locations)
-    except ValueError:
-        print("\nCurve2 is empty")
-        return False
-
-    # fits bezier curves
-    user_curve_1, user_curve_2 = generate_two_linear_beziers(curve1, curve2)
-
-    # loads the templates for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b1 = os.path.join(current_dir, 'bezier1_upper_curve_template.npy')
-    bezier1_upper_curve_template = np.load(file_path_b1)
-    file_path_b2 = os.path.join(current_dir, 'bezier2_lower_curve_template.npy')
-    bezier2_lower_curve_template = np.load(file_path_b2)
-
-    # calculates the Euclidean distance between the first point of user's curves and the first point of the templates
-    dist1 = euclidean_distance(user_curve_1[0], bezier1_upper_curve_template[0])
-    dist2 = euclidean_distance(user_curve_1[0], bezier2_lower_curve_template[0])
-
-    if dist1 < dist2:
-        # if the first point of user_curve_1 is closer to bezier1
-        distance1_template = compare_sequences_fdtw(user_curve_1, bezier1_upper_curve_template)
-        distance2_template = compare_sequences_fdtw(user_curve_2, bezier2_lower_curve_template)
-    else:
-        # if the first point of user_curve_1 is closer to bezier2
-        distance1_template = compare_sequences_fdtw(user_curve_1, bezier2_lower_curve_template)
-        distance2_template = compare_sequences_fdtw(user_curve_2, bezier1_upper_curve_template)
-
-    print(f"distance1_template: {distance1_template}")
-    print(f"distance2_template: {distance2_template}")
-
-    if distance1_template > 5000.0 or distance2_template > 5000.0:
-        return False
-
-    return True
 
 # Code below already executed to fit template
 # if __name__ == '__main__':
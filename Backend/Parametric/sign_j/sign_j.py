@@ -1,11 +1,17 @@
 import json
 import os
-from typing import List
+from typing import List, Optional
 import numpy as np
 from matplotlib import pyplot as plt
 from extraction import extract_timestamps_and_locations
+from features import features_valid
 from parameterisation import return_cubic_bezier
-from recognition import compare_sequences_fdtw, timestamp_duration_valid
+from preprocessing import preprocess_for_sign
+from recognition import DTW_THRESHOLDS, compare_curves, timestamp_duration_valid
+from matching import SignTemplates, load_sign_templates
+
+# template of the recogniser, preloaded by the registry with matching.load_sign_templates
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bezier_curve_template.npy')
 
 
 def fit_bezier_for_j():
@@ -27,21 +33,19 @@ def fit_bezier_for_j():
     # generates cubic bezier curve
     curve_points = return_cubic_bezier(locations)
 
-    # converts list of tuples to numpy array
-    curve_points_np = np.array(curve_points)
-
     # saves the template for future use
     file_path_b = os.path.join(current_dir, 'bezier_curve_template.npy')
-    np.save(file_path_b, curve_points_np)  #
+    np.save(file_path_b, curve_points)  #
 
     # plots curves
     plt.scatter([x[0] for x in locations], [x[1] for x in locations], color='red', s=5)
-    plt.plot(curve_points_np[:, 0], curve_points_np[:, 1], color='green')
+    plt.plot(curve_points[:, 0], curve_points[:, 1], color='green')
 
     plt.show()
 
 
-def is_sign_j(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_j(timestamps: List[float], locations: List[List[float]], duration: Optional[float] = None,
+              templates: Optional[SignTemplates] = None) -> bool:
     """
     This function takes a list of timestamps and a list of touch locations as input.
     It checks whether the gesture represented by these data points matches the gesture of "J"
@@ -51,33 +55,40 @@ def is_sign_j(timestamps: List[float], locations: List[List[float]]) -> bool:
 
     :param timestamps: A list of timestamps.
     :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param templates: The template with its metric and threshold, as preloaded by its recogniser; loaded if
+    omitted.
     :return: True if the gesture matches the template, False otherwise.
     """
+    # checks if time frame is valid
+    if not timestamp_duration_valid('J', timestamps, duration):
+        print("Duration too long")
+        return False
+
+    # rejects gestures whose geometric features lie outside of those recorded for the sign
+    if not features_valid('J', timestamps, locations):
+        return False
+
+    # removes duplicate and stray touch points as configured for the sign
+    timestamps, locations = preprocess_for_sign('J', timestamps, locations)
+
     # creates cubic Bézier curve representing the user-performed gesture
     curve_points_user = return_cubic_bezier(locations)
 
-    # loads the template for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b = os.path.join(current_dir, 'bezier_curve_template.npy')
-    bezier_curve_template = np.load(file_path_b)
-
-    # converts list of numpy arrays to a single 2D numpy array
-    curve_points_user = np.vstack(curve_points_user)
-    bezier_curve_template = np.vstack(bezier_curve_template)
+    # takes the template preloaded by the recogniser, or loads it
+    if templates is None:
+        templates = load_sign_templates('J', [TEMPLATE_PATH], [DTW_THRESHOLDS['J']])
+    bezier_curve_template, template_pyramid = templates.templates[0], templates.pyramid(0)
 
-    # calculates distance using DTW
-    distance_template = compare_sequences_fdtw(curve_points_user, bezier_curve_template)
+    # calculates the distance with the metric of the sign
+    metric, [threshold] = templates.metric, templates.thresholds
+    distance_template = compare_curves(metric, curve_points_user, bezier_curve_template, threshold, template_pyramid)
 
     # debugging
     print(f"distance_template: {distance_template}")
 
     # compares if distance to template is below threshold
-    if distance_template > 3000.0:
-        return False
-
-    # checks if time frame is valid
-    if not timestamp_duration_valid('J', timestamps):
-        print("Duration too long")
+    if distance_template > threshold:
         return False
 
     return True
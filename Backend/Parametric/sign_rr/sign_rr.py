@@ -1,13 +1,12 @@
 import json
 import os
-from typing import List
-import matplotlib
+from typing import List, Optional
 import numpy as np
 from matplotlib import pyplot as plt
-from scipy.spatial.distance import euclidean
 from extraction import extract_timestamps_and_locations, split_touch_locations_two_curves
 from parameterisation import generate_two_quartic_beziers_control_points, return_two_quartic_bezier_curves
-from recognition import timestamp_duration_valid, compare_sequences_fdtw
+from matching import SignTemplates
+from multi_curve import is_multi_curve_sign
 
 # matplotlib.use('Agg')
 
@@ -58,7 +57,9 @@ def fit_bezier_for_rr():
     np.save(file_path_b2, bezier2_curve)
 
 
-def is_sign_rr(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_rr(timestamps: List[float], locations: List[List[float]],
+               touch_ids: Optional[np.ndarray] = None, duration: Optional[float] = None,
+               templates: Optional[SignTemplates] = None) -> bool:
     """
         This function takes a list of timestamps and a list of touch locations as input.
         It checks whether the gesture represented by these data points matches the gesture of "RR"
@@ -69,74 +70,14 @@ def is_sign_rr(timestamps: List[float], locations: List[List[float]]) -> bool:
 
         :param timestamps: A list of timestamps.
         :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+        :param touch_ids: Optional touch identifier of every point, which separates the fingers.
+        :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+        :param templates: The templates with their metric and thresholds, as preloaded by its recogniser; loaded if
+        omitted.
         :return: True if the gesture matches the template, False otherwise.
     """
-    # checks if time frame is valid
-    if not timestamp_duration_valid('RR', timestamps):
-        print("Duration too long")
-        return False
+    return is_multi_curve_sign('RR', timestamps, locations, touch_ids, duration, templates)
 
-    try:
-        # splits locations into both Bézier curves
-        curve1, curve2 = split_touch_locations_two_curves('RR', locations)
-    except ValueError:
-        print("\nCurve2 is empty")
-        return False
-
-    # returns control points for both Bezier points
-    user_curve_1_control, user_curve_2_control = generate_two_quartic_beziers_control_points(curve1, curve2)
-
-    # creates full Bezier curves
-    user_curve_1_b, user_curve_2_b = return_two_quartic_bezier_curves(user_curve_1_control, user_curve_2_control)
-
-    # loads the templates for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b1 = os.path.join(current_dir, 'bezier1_curve_template.npy')
-    bezier1_curve_template = np.load(file_path_b1)
-    file_path_b2 = os.path.join(current_dir, 'bezier2_curve_template.npy')
-    bezier2_curve_template = np.load(file_path_b2)
-
-    # # The code below saves a figure to see how the user curves compare to the templates
-    # # Needs to uncomment agg at the top of the file
-    # # creates a new figure
-    # plt.figure()
-    # # plots the templates
-    # plt.plot(bezier1_curve_template[:, 0], bezier1_curve_template[:, 1], label='Bezier 1 Template',
-    #          linestyle='dashed')
-    # plt.plot(bezier2_curve_template[:, 0], bezier2_curve_template[:, 1], label='Bezier 2 Template',
-    #          linestyle='dashed')
-    # # plots user curves
-    # plt.plot(user_curve_1_b[:, 0], user_curve_1_b[:, 1], label='User Bezier 1')
-    # plt.plot(user_curve_2_b[:, 0], user_curve_2_b[:, 1], label='User Bezier 2')
-    # # adds a legend
-    # plt.legend()
-    # # saves the plot
-    # current_dir = os.path.dirname(os.path.abspath(__file__))
-    # filename = os.path.join(current_dir, 'comparison_rr.png')
-    # plt.savefig(filename)
-    # # closes the figure to free up memory
-    # plt.close()
-
-    # calculates the Euclidean distance between the first point of user's curves and the first point of the templates
-    dist1 = euclidean(user_curve_1_b[0], bezier1_curve_template[0])
-    dist2 = euclidean(user_curve_1_b[0], bezier2_curve_template[0])
-
-    if dist1 < dist2:
-        # if the first point of user_curve_1 is closer to bezier1
-        distance1_template = compare_sequences_fdtw(user_curve_1_b, bezier1_curve_template)
-        distance2_template = compare_sequences_fdtw(user_curve_2_b, bezier2_curve_template)
-    else:
-        # if the first point of user_curve_1 is closer to bezier2
-        distance1_template = compare_sequences_fdtw(user_curve_1_b, bezier2_curve_template)
-        distance2_template = compare_sequences_fdtw(user_curve_2_b, bezier1_curve_template)
-
-    print(f"distance1_template: {distance1_template}")
-    print(f"distance2_template: {distance2_template}")
-
-    if distance1_template > 5000.0 or distance2_template > 5000.0:
-        return False
-
-    return True
 
 # # Code below already executed to fit template
 # if __name__ == '__main__':
@@ -1,14 +1,18 @@
 import json
 import os
-from typing import List
-import matplotlib
+from typing import List, Optional
 import numpy as np
 from matplotlib import pyplot as plt
-from scipy.spatial.distance import euclidean
 from extraction import extract_timestamps_and_locations, split_touch_locations_three_curves
-from parameterisation import fit_quartic_bezier_control_points, return_quartic_bezier_curve, \
-    generate_two_quartic_beziers_control_points, return_two_quartic_bezier_curves
-from recognition import timestamp_duration_valid, compare_sequences_fdtw
+from features import features_valid, POSITION_GATES
+from parameterisation import fit_quartic_bezier_control_points, return_quartic_bezier_curve, fit_bezier_batch, \
+    evaluate_bezier
+from preprocessing import preprocess_for_sign
+from recognition import timestamp_duration_valid, compare_curves, current_sign_metric
+from matching import load_template
+from matching import SignTemplates
+from multi_curve import is_multi_curve_sign
+from templates import PARAMETRIC_DIRECTORY, SIGN_VARIANTS
 
 # matplotlib.use('Agg')
 
@@ -33,13 +37,11 @@ def fit_three_beziers_for_w():
     # splits locations into its three curves
     curve1, curve2, curve3 = split_touch_locations_three_curves(locations)
 
-    # fits bezier control points
-    bezier1_control, bezier2_control = generate_two_quartic_beziers_control_points(curve1, curve2)
-    bezier3_control = fit_quartic_bezier_control_points(curve3)
+    # fits bezier control points of all three curves at once
+    bezier_controls = fit_bezier_batch([curve1, curve2, curve3], degree=4)
 
     # calculates and returns full curves
-    bezier1_curve, bezier2_curve = return_two_quartic_bezier_curves(bezier1_control, bezier2_control)
-    bezier3_curve = return_quartic_bezier_curve(bezier3_control)
+    bezier1_curve, bezier2_curve, bezier3_curve = evaluate_bezier(bezier_controls)
 
     # transforms into numpy arrays
     bezier1_curve_np = np.array(bezier1_curve)
@@ -134,6 +136,13 @@ def is_sign_w_single_curve(timestamps: List[float], locations: List[List[float]]
         print("Duration too long")
         return False
 
+    # rejects gestures whose geometric features lie outside of those recorded for the sign
+    if not features_valid('W', timestamps, locations, gates=POSITION_GATES):
+        return False
+
+    # removes duplicate and stray touch points as configured for the sign
+    timestamps, locations = preprocess_for_sign('W', timestamps, locations)
+
     # returns control points
     user_curve_control = fit_quartic_bezier_control_points(locations)
 
@@ -141,9 +150,9 @@ def is_sign_w_single_curve(timestamps: List[float], locations: List[List[float]]
     user_curve_b = return_quartic_bezier_curve(user_curve_control)
 
     # loads the template for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b = os.path.join(current_dir, 'bezier_curve_single_template.npy')
-    bezier_curve_single_template = np.load(file_path_b)
+    variant = SIGN_VARIANTS['W single curve']
+    file_path_b = os.path.join(PARAMETRIC_DIRECTORY, variant['templates'][0])
+    bezier_curve_single_template, _, template_pyramid = load_template(file_path_b)
 
     # # The code below saves a figure to see how the user curves compare to the templates
     # # Needs to uncomment agg at the top of the file
@@ -164,17 +173,20 @@ def is_sign_w_single_curve(timestamps: List[float], locations: List[List[float]]
     # plt.close()
 
     # calculates DTW distance
-    distance_template = compare_sequences_fdtw(user_curve_b, bezier_curve_single_template)
+    metric, [threshold] = current_sign_metric('W', [file_path_b], variant['thresholds'])
+    distance_template = compare_curves(metric, user_curve_b, bezier_curve_single_template, threshold, template_pyramid)
 
     print(f"distance_template: {distance_template}")
 
-    if distance_template > 3000.0:
+    if distance_template > threshold:
         return False
 
     return True
 
 
-def is_sign_w_three_curves(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_w_three_curves(timestamps: List[float], locations: List[List[float]],
+                           touch_ids: Optional[np.ndarray] = None, duration: Optional[float] = None,
+                           templates: Optional[SignTemplates] = None) -> bool:
     """
     This function takes a list of timestamps and a list of touch locations as input.
     It checks whether the gesture represented by these data points matches the gesture of "W"
@@ -186,93 +198,13 @@ def is_sign_w_three_curves(timestamps: List[float], locations: List[List[float]]
 
     :param timestamps: A list of timestamps.
     :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param touch_ids: Optional touch identifier of every point, which separates the fingers.
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param templates: The templates with their metric and thresholds, as preloaded by its recogniser; loaded if
+    omitted.
     :return: True if the gesture matches the template, False otherwise.
     """
-
-    # checks if time frame is valid
-    if not timestamp_duration_valid('W', timestamps):
-        print("Duration too long")
-        return False
-
-    try:
-        # splits user touch locations into three curves
-        curve1, curve2, curve3 = split_touch_locations_three_curves(locations)
-    except ValueError as error:
-        print(f"ValueError: {error}")
-        return False
-
-    # fits user touch locations into Bézier curve
-    # fits bezier control points
-    user1_control, user2_control = generate_two_quartic_beziers_control_points(curve1, curve2)
-    user3_control = fit_quartic_bezier_control_points(curve3)
-    # calculates and returns full curves
-    user1_curve_bezier, user2_curve_bezier = return_two_quartic_bezier_curves(user1_control, user2_control)
-    user3_curve_bezier = return_quartic_bezier_curve(user3_control)
-
-    # loads the templates for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b1 = os.path.join(current_dir, 'bezier1_curve_template.npy')
-    bezier1_curve_template = np.load(file_path_b1)
-    file_path_b2 = os.path.join(current_dir, 'bezier2_curve_template.npy')
-    bezier2_curve_template = np.load(file_path_b2)
-    file_path_b3 = os.path.join(current_dir, 'bezier3_curve_template.npy')
-    bezier3_curve_template = np.load(file_path_b3)
-
-    # # The code below saves a figure to see how the user curves compare to the templates
-    # # Needs to uncomment agg at the top of the file
-    # # creates a new figure
-    # plt.figure()
-    # # plots the templates
-    # plt.plot(bezier1_curve_template[:, 0], bezier1_curve_template[:, 1], label='Bezier 1 Template',
-    #          linestyle='dashed')
-    # plt.plot(bezier2_curve_template[:, 0], bezier2_curve_template[:, 1], label='Bezier 2 Template',
-    #          linestyle='dashed')
-    # plt.plot(bezier3_curve_template[:, 0], bezier3_curve_template[:, 1], label='Bezier 3 Template',
-    #          linestyle='dashed')
-    # # plots user curves
-    # plt.plot(user1_curve_bezier[:, 0], user1_curve_bezier[:, 1], label='User Bezier 1')
-    # plt.plot(user2_curve_bezier[:, 0], user2_curve_bezier[:, 1], label='User Bezier 2')
-    # plt.plot(user3_curve_bezier[:, 0], user3_curve_bezier[:, 1], label='User Bezier 3')
-    # # adds a legend
-    # plt.legend()
-    # # saves the plot
-    # current_dir = os.path.dirname(os.path.abspath(__file__))
-    # filename = os.path.join(current_dir, 'comparison_w_three_curves.png')
-    # plt.savefig(filename)
-    # # closes the figure to free up memory
-    # plt.close()
-
-    # matches curves
-    template_curves = [bezier1_curve_template, bezier2_curve_template, bezier3_curve_template]
-    user_curves = [user1_curve_bezier, user2_curve_bezier, user3_curve_bezier]
-    # calculate distances between first point of user curves and templates
-    distances = []
-
-    # for each user curve
-    for user_curve in user_curves:
-        distances_for_this_curve = []
-        # calculates the distance to each template
-        for template_curve in template_curves:
-            distance = euclidean(user_curve[0], template_curve[0])
-            distances_for_this_curve.append(distance)
-        distances.append(distances_for_this_curve)
-
-    # assigns each user curve to the closest template
-    assignments = []
-    for i in range(3):
-        min_distance_index = np.argmin(distances[i])
-        assignments.append(min_distance_index)
-
-    # compares user curves to templates
-    for i in range(3):
-        assigned_template = template_curves[assignments[i]]
-        distance_template = compare_sequences_fdtw(user_curves[i], assigned_template)
-        # prints the distance to the respective template
-        print(f"distance{assignments[i] + 1}_template: {distance_template}")
-        if distance_template > 5000:
-            return False
-
-    return True
+    return is_multi_curve_sign('W', timestamps, locations, touch_ids, duration, templates)
 
 
 # # executed once to create the template
@@ -1,11 +1,17 @@
 import json
 import os
-from typing import List
+from typing import List, Optional
 import numpy as np
 from matplotlib import pyplot as plt
 from extraction import extract_timestamps_and_locations
+from features import features_valid
 from parameterisation import generate_linear_bezier
-from recognition import timestamp_duration_valid, compare_sequences_fdtw
+from preprocessing import preprocess_for_sign
+from recognition import DTW_THRESHOLDS, timestamp_duration_valid, compare_curves
+from matching import SignTemplates, load_sign_templates
+
+# template of the recogniser, preloaded by the registry with matching.load_sign_templates
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bezier_curve_template.npy')
 
 
 def fit_bezier_for_y():
@@ -38,7 +44,8 @@ def fit_bezier_for_y():
     plt.show()
 
 
-def is_sign_y(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_y(timestamps: List[float], locations: List[List[float]], duration: Optional[float] = None,
+              templates: Optional[SignTemplates] = None) -> bool:
     """
     This function takes a list of timestamps and a list of touch locations as input.
     It checks whether the gesture represented by these data points matches the gesture of "Y"
@@ -48,27 +55,38 @@ def is_sign_y(timestamps: List[float], locations: List[List[float]]) -> bool:
 
     :param timestamps: A list of timestamps.
     :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param templates: The template with its metric and threshold, as preloaded by its recogniser; loaded if
+    omitted.
     :return: True if the gesture matches the template, False otherwise.
     """
     # checks if time frame is valid
-    if not timestamp_duration_valid('Y', timestamps):
+    if not timestamp_duration_valid('Y', timestamps, duration):
         print("Duration too long")
         return False
 
+    # rejects gestures whose geometric features lie outside of those recorded for the sign
+    if not features_valid('Y', timestamps, locations):
+        return False
+
+    # removes duplicate and stray touch points as configured for the sign
+    timestamps, locations = preprocess_for_sign('Y', timestamps, locations)
+
     # creates Bézier curve representing the user-performed gesture
     user_curve = generate_linear_bezier(locations)
 
-    # loads the template for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b = os.path.join(current_dir, 'bezier_curve_template.npy')
-    bezier_curve_template = np.load(file_path_b)
+    # takes the template preloaded by the recogniser, or loads it
+    if templates is None:
+        templates = load_sign_templates('Y', [TEMPLATE_PATH], [DTW_THRESHOLDS['Y']])
+    bezier_curve_template, template_pyramid = templates.templates[0], templates.pyramid(0)
 
-    # calculates distance using DTW
-    distance_template = compare_sequences_fdtw(user_curve, bezier_curve_template)
+    # calculates the distance with the metric of the sign
+    metric, [threshold] = templates.metric, templates.thresholds
+    distance_template = compare_curves(metric, user_curve, bezier_curve_template, threshold, template_pyramid)
 
     print(f"distance_template: {distance_template}")
 
-    if distance_template > 5000.0:
+    if distance_template > threshold:
         return False
 
     return True
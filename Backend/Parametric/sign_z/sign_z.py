@@ -1,15 +1,21 @@
 import json
 import os
-from typing import List
-import matplotlib
+from typing import List, Optional
 import numpy as np
 from matplotlib import pyplot as plt
 from extraction import extract_timestamps_and_locations
+from features import features_valid
 from parameterisation import return_cubic_bezier, fit_quartic_bezier_control_points, return_quartic_bezier_curve
-from recognition import compare_sequences_fdtw, timestamp_duration_valid  # compare_sequences_dtw
+from preprocessing import preprocess_for_sign
+from recognition import DTW_THRESHOLDS, compare_curves, current_sign_metric, timestamp_duration_valid
+from matching import SignTemplates, load_sign_templates, load_template
+from templates import PARAMETRIC_DIRECTORY, SIGN_VARIANTS
 
 # matplotlib.use('Agg')
 
+# template of the recogniser, preloaded by the registry with matching.load_sign_templates
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bezier_curve_template_cubic.npy')
+
 
 def fit_bezier_for_z_cubic():
     """
@@ -30,16 +36,13 @@ def fit_bezier_for_z_cubic():
     # converts the touch locations into a Bézier curve
     curve_points = return_cubic_bezier(locations)
 
-    # converts list of tuples to numpy array
-    curve_points_np = np.array(curve_points)
-
     # saves the template for future use
     file_path_b = os.path.join(current_dir, 'bezier_curve_template_cubic.npy')
-    np.save(file_path_b, curve_points_np)
+    np.save(file_path_b, curve_points)
 
     # plots curves
     plt.scatter([x[0] for x in locations], [x[1] for x in locations], color='red', s=5)
-    plt.plot(curve_points_np[:, 0], curve_points_np[:, 1], color='green')
+    plt.plot(curve_points[:, 0], curve_points[:, 1], color='green')
 
     plt.show()
 
@@ -87,7 +90,8 @@ def fit_bezier_for_z_quartic():
     np.save(file_path_b1, bezier_curve)
 
 
-def is_sign_z_cubic(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_z_cubic(timestamps: List[float], locations: List[List[float]], duration: Optional[float] = None,
+                    templates: Optional[SignTemplates] = None) -> bool:
     """
     This function takes a list of timestamps and a list of touch locations as input.
     It checks whether the gesture represented by these data points matches the gesture of "Z"
@@ -98,24 +102,30 @@ def is_sign_z_cubic(timestamps: List[float], locations: List[List[float]]) -> bo
 
     :param timestamps: A list of timestamps.
     :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param templates: The template with its metric and threshold, as preloaded by its recogniser; loaded if
+    omitted.
     :return: True if the gesture matches the template, False otherwise.
     """
     # checks if time frame is valid
-    if not timestamp_duration_valid('Z', timestamps):
+    if not timestamp_duration_valid('Z', timestamps, duration):
         print("Duration too long")
         return False
 
+    # rejects gestures whose geometric features lie outside of those recorded for the sign
+    if not features_valid('Z', timestamps, locations):
+        return False
+
+    # removes duplicate and stray touch points as configured for the sign
+    timestamps, locations = preprocess_for_sign('Z', timestamps, locations)
+
     # creates cubic Bézier curve representing the user-performed gesture
     curve_points_user = return_cubic_bezier(locations)
 
-    # loads the template for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b = os.path.join(current_dir, 'bezier_curve_template_cubic.npy')
-    bezier_curve_template = np.load(file_path_b)
-
-    # converts list of numpy arrays to a single 2D numpy array
-    curve_points_user = np.vstack(curve_points_user)
-    bezier_curve_template = np.vstack(bezier_curve_template)
+    # takes the template preloaded by the recogniser, or loads it
+    if templates is None:
+        templates = load_sign_templates('Z', [TEMPLATE_PATH], [DTW_THRESHOLDS['Z']])
+    bezier_curve_template, template_pyramid = templates.templates[0], templates.pyramid(0)
 
     # # The code below saves a figure to see how the user curves compare to the templates
     # # Needs to uncomment agg at the top of the file
@@ -135,14 +145,15 @@ def is_sign_z_cubic(timestamps: List[float], locations: List[List[float]]) -> bo
     # # closes the figure to free up memory
     # plt.close()
 
-    # calculates distance using DTW
-    distance_template = compare_sequences_fdtw(curve_points_user, bezier_curve_template)
+    # calculates the distance with the metric of the sign
+    metric, [threshold] = templates.metric, templates.thresholds
+    distance_template = compare_curves(metric, curve_points_user, bezier_curve_template, threshold, template_pyramid)
 
     # debugging
     print(f"distance_template: {distance_template}")
 
     # compares if distance to template is below threshold
-    if distance_template > 3000.0:
+    if distance_template > threshold:
         return False
 
     return True
@@ -167,6 +178,13 @@ def is_sign_z_quartic(timestamps: List[float], locations: List[List[float]]) ->
         print("Duration too long")
         return False
 
+    # rejects gestures whose geometric features lie outside of those recorded for the sign
+    if not features_valid('Z', timestamps, locations):
+        return False
+
+    # removes duplicate and stray touch points as configured for the sign
+    timestamps, locations = preprocess_for_sign('Z', timestamps, locations)
+
     # returns control points
     user_curve_control = fit_quartic_bezier_control_points(locations)
 
@@ -174,9 +192,9 @@ def is_sign_z_quartic(timestamps: List[float], locations: List[List[float]]) ->
     user_curve_b = return_quartic_bezier_curve(user_curve_control)
 
     # loads the template for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b = os.path.join(current_dir, 'bezier_curve_template_quartic.npy')
-    bezier_curve_template_quartic = np.load(file_path_b)
+    variant = SIGN_VARIANTS['Z quartic']
+    file_path_b = os.path.join(PARAMETRIC_DIRECTORY, variant['templates'][0])
+    bezier_curve_template_quartic, _, template_pyramid = load_template(file_path_b)
 
     # # The code below saves a figure to see how the user curves compare to the templates
     # # Needs to uncomment agg at the top of the file
@@ -198,11 +216,12 @@ def is_sign_z_quartic(timestamps: List[float], locations: List[List[float]]) ->
     # plt.close()
 
     # calculates DTW distance
-    distance_template = compare_sequences_fdtw(user_curve_b, bezier_curve_template_quartic)
+    metric, [threshold] = current_sign_metric('Z', [file_path_b], variant['thresholds'])
+    distance_template = compare_curves(metric, user_curve_b, bezier_curve_template_quartic, threshold, template_pyramid)
 
     print(f"distance_template: {distance_template}")
 
-    if distance_template > 3000.0:
+    if distance_template > threshold:
         return False
 
     return True
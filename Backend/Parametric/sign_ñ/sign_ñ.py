@@ -1,17 +1,22 @@
 import json
 import os
-from typing import List
-import matplotlib
+from typing import List, Optional
 import numpy as np
 from matplotlib import pyplot as plt
-from scipy.spatial.distance import euclidean
 from extraction import extract_timestamps_and_locations, split_touch_locations_two_curves
+from features import features_valid, RECOGNISER_GATES
 from parameterisation import fit_quartic_bezier_control_points, return_quartic_bezier_curve, \
     return_two_quartic_bezier_curves, generate_two_quartic_beziers_control_points
-from recognition import timestamp_duration_valid, compare_sequences_fdtw
+from preprocessing import preprocess_for_sign
+from recognition import DTW_THRESHOLDS, timestamp_duration_valid, compare_curves
+from matching import SignTemplates, load_sign_templates
+from multi_curve import is_multi_curve_sign
 
 # matplotlib.use('Agg')
 
+# template of the recogniser, preloaded by the registry with matching.load_sign_templates
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bezier_curve_single_template.npy')
+
 
 def fit_bezier_for_ñ_two_curves():
     """
@@ -60,7 +65,8 @@ def fit_bezier_for_ñ_two_curves():
 
 
 # Function below currently not implemented in endpoint as accuracy is lower than with single function
-def is_sign_ñ_two_curves(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_ñ_two_curves(timestamps: List[float], locations: List[List[float]],
+                         touch_ids: Optional[np.ndarray] = None) -> bool:
     """
     This function takes a list of timestamps and a list of touch locations as input.
     It checks whether the gesture represented by these data points matches the gesture of "Ñ"
@@ -70,72 +76,10 @@ def is_sign_ñ_two_curves(timestamps: List[float], locations: List[List[float]])
 
     :param timestamps: A list of timestamps.
     :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param touch_ids: Optional touch identifier of every point, which separates the fingers.
     :return: True if the gesture matches the template, False otherwise.
     """
-    # checks if time frame is valid
-    if not timestamp_duration_valid('Ñ', timestamps):
-        print("Duration too long")
-        return False
-
-    try:
-        # splits location points into respective curves and returns control points
-        curve1, curve2 = split_touch_locations_two_curves('Ñ', locations)
-    except ValueError:
-        print("\nCurve2 is empty")
-        return False
-
-    # generates Bezier control points
-    user_curve_1_control, user_curve_2_control = generate_two_quartic_beziers_control_points(curve1, curve2)
-
-    # creates full Bezier curves
-    user_curve_1_b, user_curve_2_b = return_two_quartic_bezier_curves(user_curve_1_control, user_curve_2_control)
-
-    # loads the templates for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b1 = os.path.join(current_dir, 'bezier1_curve_template.npy')
-    bezier1_upper_curve_template = np.load(file_path_b1)
-    file_path_b2 = os.path.join(current_dir, 'bezier2_curve_template.npy')
-    bezier2_lower_curve_template = np.load(file_path_b2)
-
-    # # The code below saves a figure to see how the user curves compare to the templates
-    # # Needs to uncomment agg at the top of the file
-    # # creates a new figure
-    # plt.figure()
-    # # plots the templates
-    # plt.plot(bezier1_upper_curve_template[:, 0], bezier1_upper_curve_template[:, 1], color='green')
-    # plt.plot(bezier2_lower_curve_template[:, 0], bezier2_lower_curve_template[:, 1], color='green')
-    # # plots user curves
-    # plt.plot(user_curve_1_b[:, 0], user_curve_1_b[:, 1], color='red', linestyle='dashed')
-    # plt.plot(user_curve_2_b[:, 0], user_curve_2_b[:, 1], color='red', linestyle='dashed')
-    # # adds a legend
-    # # plt.legend()
-    # # saves the plot
-    # current_dir = os.path.dirname(os.path.abspath(__file__))
-    # filename = os.path.join(current_dir, 'comparison_ene_two_curves.png')
-    # plt.savefig(filename)
-    # # closes the figure to free up memory
-    # plt.close()
-
-    # calculates the Euclidean distance between the first point of user's curves and the first point of the templates
-    dist1 = euclidean(user_curve_1_b[0], bezier1_upper_curve_template[0])
-    dist2 = euclidean(user_curve_1_b[0], bezier2_lower_curve_template[0])
-
-    if dist1 < dist2:
-        # if the first point of user_curve_1 is closer to bezier1
-        distance1_template = compare_sequences_fdtw(user_curve_1_b, bezier1_upper_curve_template)
-        distance2_template = compare_sequences_fdtw(user_curve_2_b, bezier2_lower_curve_template)
-    else:
-        # if the first point of user_curve_1 is closer to bezier2
-        distance1_template = compare_sequences_fdtw(user_curve_1_b, bezier2_lower_curve_template)
-        distance2_template = compare_sequences_fdtw(user_curve_2_b, bezier1_upper_curve_template)
-
-    print(f"distance1_template: {distance1_template}")
-    print(f"distance2_template: {distance2_template}")
-
-    if distance1_template > 5000.0 or distance2_template > 5000.0:
-        return False
-
-    return True
+    return is_multi_curve_sign('Ñ', timestamps, locations, touch_ids)
 
 
 def fit_bezier_for_ñ_single_curve():
@@ -178,7 +122,8 @@ def fit_bezier_for_ñ_single_curve():
     np.save(file_path_b, bezier_curve)
 
 
-def is_sign_ñ_single_curve(timestamps: List[float], locations: List[List[float]]) -> bool:
+def is_sign_ñ_single_curve(timestamps: List[float], locations: List[List[float]], duration: Optional[float] = None,
+                           templates: Optional[SignTemplates] = None) -> bool:
     """
     This function takes a list of timestamps and a list of touch locations as input.
     It checks whether the gesture represented by these data points matches the gesture of "Ñ"
@@ -190,6 +135,9 @@ def is_sign_ñ_single_curve(timestamps: List[float], locations: List[List[float]
 
     :param timestamps: A list of timestamps.
     :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param templates: The template with its metric and threshold, as preloaded by its recogniser; loaded if
+    omitted.
     :return: True if the gesture matches the template, False otherwise.
     """
     # checks if location inputs are valid by assessing number of touch points
@@ -197,20 +145,27 @@ def is_sign_ñ_single_curve(timestamps: List[float], locations: List[List[float]
         return False
 
     # checks if time frame is valid
-    if not timestamp_duration_valid('Ñ', timestamps):
+    if not timestamp_duration_valid('Ñ', timestamps, duration):
         print("Duration too long")
         return False
 
+    # rejects gestures whose geometric features lie outside of those recorded for the sign
+    if not features_valid('Ñ', timestamps, locations, gates=RECOGNISER_GATES['Ñ']):
+        return False
+
+    # removes duplicate and stray touch points as configured for the sign
+    timestamps, locations = preprocess_for_sign('Ñ', timestamps, locations)
+
     # returns control points
     user_curve_control = fit_quartic_bezier_control_points(locations)
 
     # creates full Bezier curve
     user_curve_b = return_quartic_bezier_curve(user_curve_control)
 
-    # loads the template for comparison
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path_b = os.path.join(current_dir, 'bezier_curve_single_template.npy')
-    bezier_curve_single_template = np.load(file_path_b)
+    # takes the template preloaded by the recogniser, or loads it
+    if templates is None:
+        templates = load_sign_templates('Ñ', [TEMPLATE_PATH], [DTW_THRESHOLDS['Ñ']])
+    bezier_curve_single_template, template_pyramid = templates.templates[0], templates.pyramid(0)
 
     # # The code below saves a figure to see how the user curves compare to the templates
     # # Needs to uncomment agg at the top of the file
@@ -230,7 +185,8 @@ def is_sign_ñ_single_curve(timestamps: List[float], locations: List[List[float]
     # plt.close()
 
     # calculates DTW distance
-    distance_template = compare_sequences_fdtw(user_curve_b, bezier_curve_single_template)
+    metric, [threshold] = templates.metric, templates.thresholds
+    distance_template = compare_curves(metric, user_curve_b, bezier_curve_single_template, threshold, template_pyramid)
 
     print(f"distance_template: {distance_template}")
 
@@ -254,7 +210,7 @@ def is_sign_ñ_single_curve(timestamps: List[float], locations: List[List[float]
     #     # closes the figure to free up memory
     #     plt.close()
 
-    if distance_template > 3000.0:
+    if distance_template > threshold:
         return False
 
     return True
@@ -0,0 +1,235 @@
+"""
+Optional capture log of the gestures that the endpoint receives, for replay and for building templates. A request only
+samples its gesture and puts it into a bounded in-memory queue; if the queue is full, the gesture is dropped instead of
+blocking the request. A background thread takes the gestures from the queue in batches and appends each batch as one
+gzip member to the current capture file, which is rotated once it exceeds CAPTURE_MAX_FILE_BYTES.
+
+Every line of a capture file is one gesture in a columnar encoding, i.e. {"sign", "received", "recognised", "t", "x",
+"y"} and "id" if the client sent touch identifiers; read_captures yields them and capture_to_json converts them back
+into the touch data of a request.
+"""
+import glob
+import gzip
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from typing import List, Dict, Union, Optional, Iterator
+from gesture import Gesture
+from templates import PARAMETRIC_DIRECTORY
+
+# whether the endpoint captures the gestures it receives; off unless the environment variable is set to 1 or true
+CAPTURE_ENABLED = os.environ.get('CAPTURE_ENABLED', '').lower() in ('1', 'true')
+# directory of the capture files
+CAPTURE_DIRECTORY = os.path.join(PARAMETRIC_DIRECTORY, 'Captures')
+
+# share of the gestures of each sign that is captured; signs that are not listed use the default
+CAPTURE_SAMPLING: Dict[str, float] = {}
+DEFAULT_CAPTURE_RATE = 1.0
+
+# maximum number of gestures waiting to be written
+CAPTURE_QUEUE_SIZE = 1024
+# maximum number of gestures written at once, and the seconds after which a smaller batch is written
+CAPTURE_BATCH_SIZE = 64
+CAPTURE_FLUSH_INTERVAL = 1.0
+# size in bytes after which a new capture file is started, and the number of capture files that are kept
+CAPTURE_MAX_FILE_BYTES = 16 * 1024 * 1024
+CAPTURE_MAX_FILES = 32
+
+# number of gestures captured, sampled out, dropped and written, and of failed writes, since the server started
+CAPTURE_STATISTICS: Counter = Counter()
+
+
+def encode_capture(sign: Optional[str], json_data: Union[List[Dict[str, Union[float, List[float]]]], Gesture],
+                   recognised: bool, received: float) -> Dict:
+    """
+    Encodes the touch data of a request column by column.
+
+    :param sign: The sign in the header of the request.
+    :param json_data: The touch data detected by the touch screen, in form of a list of dicts, or the gesture read
+    from a binary body.
+    :param recognised: Whether the gesture was recognised as the sign.
+    :param received: The time at which the request was received, in seconds since the epoch.
+    :return: The capture record.
+    """
+    record = {'sign': sign, 'received': received, 'recognised': recognised}
+    if isinstance(json_data, Gesture):
+        record['t'] = (json_data.start_time + json_data.timestamps.astype(float)).tolist()
+        record['x'], record['y'] = json_data.x.tolist(), json_data.y.tolist()
+        if json_data.touch_ids is not None:
+            record['id'] = json_data.touch_ids.tolist()
+        return record
+
+    record['t'] = [item['timestamp'] for item in json_data]
+    record['x'] = [item['location'][0] for item in json_data]
+    record['y'] = [item['location'][1] for item in json_data]
+    if json_data and 'id' in json_data[0]:
+        record['id'] = [item['id'] for item in json_data]
+    return record
+
+
+def capture_to_json(record: Dict) -> List[Dict[str, Union[float, List[float]]]]:
+    """
+    Converts a capture record back into the touch data of the request, e.g. to replay it.
+
+    :param record: The capture record, see encode_capture.
+    :return: The touch data in form of a list of dicts.
+    """
+    json_data = [{'location': [x, y], 'timestamp': t} for t, x, y in zip(record['t'], record['x'], record['y'])]
+    for item, touch_id in zip(json_data, record.get('id', [])):
+        item['id'] = touch_id
+    return json_data
+
+
+class CaptureLog:
+    """
+    The bounded queue of captured gestures and the thread that writes them.
+    """
+    __slots__ = ('directory', 'sampling', 'batch_size', 'flush_interval', 'max_file_bytes', 'max_files', '_queue',
+                 '_thread', '_stopped', '_path')
+
+    def __init__(self, directory: str = CAPTURE_DIRECTORY, sampling: Optional[Dict[str, float]] = None,
+                 queue_size: int = CAPTURE_QUEUE_SIZE, batch_size: int = CAPTURE_BATCH_SIZE,
+                 flush_interval: float = CAPTURE_FLUSH_INTERVAL, max_file_bytes: int = CAPTURE_MAX_FILE_BYTES,
+                 max_files: int = CAPTURE_MAX_FILES):
+        """
+        :param directory: The directory of the capture files.
+        :param sampling: The share of the gestures of each sign that is captured; CAPTURE_SAMPLING if omitted.
+        :param queue_size: The maximum number of gestures waiting to be written.
+        :param batch_size: The maximum number of gestures written at once.
+        :param flush_interval: The seconds after which a smaller batch is written.
+        :param max_file_bytes: The size in bytes after which a new capture file is started.
+        :param max_files: The number of capture files that are kept.
+        """
+        self.directory = directory
+        self.sampling = CAPTURE_SAMPLING if sampling is None else sampling
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._path: Optional[str] = None
+
+    def capture(self, sign: Optional[str], json_data: Union[List[Dict[str, Union[float, List[float]]]], Gesture],
+                recognised: bool) -> bool:
+        """
+        Samples a gesture and queues it for writing, without waiting. The touch data is encoded by the writer.
+
+        :param sign: The sign in the header of the request.
+        :param json_data: The touch data of the request, which must not be modified afterwards.
+        :param recognised: Whether the gesture was recognised as the sign.
+        :return: True if the gesture was queued, False if it was sampled out or dropped because the queue is full.
+        """
+        if random.random() >= self.sampling.get(sign, DEFAULT_CAPTURE_RATE):
+            CAPTURE_STATISTICS['sampled_out'] += 1
+            return False
+        try:
+            self._queue.put_nowait((sign, json_data, recognised, time.time()))
+        except queue.Full:
+            CAPTURE_STATISTICS['dropped'] += 1
+            return False
+        CAPTURE_STATISTICS['captured'] += 1
+        return True
+
+    def start(self) -> 'CaptureLog':
+        """
+        Starts the writer thread.
+
+        :return: The capture log itself.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='capture-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Writes the queued gestures and stops the writer thread.
+
+        :param timeout: The maximum number of seconds to wait for the writer.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        # writes batches until stopped and the queue is empty
+        while not (self._stopped.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write([encode_capture(*entry) for entry in batch])
+            except (OSError, KeyError, IndexError, TypeError) as error:
+                # skips the batch rather than stopping the writer, e.g. for malformed touch data
+                CAPTURE_STATISTICS['failed'] += 1
+                print(f"Capture not written: {error}")
+
+    def write(self, records: List[Dict]):
+        """
+        Appends capture records as one gzip member to the current capture file and rotates the files if needed.
+
+        :param records: The capture records, see encode_capture.
+        """
+        if self._path is None or not os.path.exists(self._path) or os.path.getsize(self._path) >= self.max_file_bytes:
+            self._rotate()
+        lines = ''.join(json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n' for record in records)
+        with open(self._path, 'ab') as file:
+            file.write(gzip.compress(lines.encode('utf-8')))
+        CAPTURE_STATISTICS['written'] += len(records)
+
+    def _rotate(self):
+        # starts a new capture file, which sorts after all existing ones, and removes the oldest ones beyond max_files
+        name = time.strftime('capture_%Y%m%d_%H%M%S')
+        paths = capture_paths(self.directory)
+        if paths:
+            # keeps the order if the clock was set back
+            name = max(name, os.path.basename(paths[-1])[:len(name)])
+        index = 0
+        path = os.path.join(self.directory, f'{name}_{index:03d}.jsonl.gz')
+        while os.path.exists(path) or (paths and path <= paths[-1]):
+            index += 1
+            path = os.path.join(self.directory, f'{name}_{index:03d}.jsonl.gz')
+        self._path = path
+        open(self._path, 'ab').close()
+        for path in capture_paths(self.directory)[:-self.max_files]:
+            os.remove(path)
+
+
+def capture_paths(directory: str = CAPTURE_DIRECTORY) -> List[str]:
+    """
+    Lists the capture files of a directory from the oldest to the newest.
+
+    :param directory: The directory of the capture files.
+    :return: The paths of the capture files.
+    """
+    return sorted(glob.glob(os.path.join(directory, 'capture_*.jsonl.gz')))
+
+
+def read_captures(directory: str = CAPTURE_DIRECTORY, sign: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Reads the captured gestures of a directory from the oldest to the newest.
+
+    :param directory: The directory of the capture files.
+    :param sign: If given, only the gestures sent for this sign are read.
+    :return: An iterator over the capture records, see encode_capture.
+    """
+    for path in capture_paths(directory):
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                record = json.loads(line)
+                if sign is None or record['sign'] == sign:
+                    yield record
@@ -1,27 +1,20 @@
 import json
 import os
-from typing import Callable, Tuple, Union, List, Dict, Optional
+from typing import Tuple, Union, List, Dict, Optional
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import string
-import time
-from concurrent.futures import ThreadPoolExecutor
 from tensorflow import keras
 from ML.utils.layers import *
-from Parametric.sign_g.sign_g import is_sign_g
-from Parametric.sign_h.sign_h import is_sign_h
-from Parametric.sign_j.sign_j import is_sign_j
-from Parametric.sign_ll.sign_ll import is_sign_ll
-from Parametric.sign_rr.sign_rr import is_sign_rr
-from Parametric.sign_v.sign_v import is_sign_v
-from Parametric.sign_w.sign_w import is_sign_w_three_curves
-from Parametric.sign_y.sign_y import is_sign_y
-from Parametric.sign_z.sign_z import is_sign_z_cubic
-from Parametric.sign_ñ.sign_ñ import is_sign_ñ_single_curve
-from Parametric.sign_a.sign_a import is_sign_a
-from Parametric.sign_b.sign_b import is_sign_b
-from Parametric.sign_ch.sign_ch import is_sign_ch
-from extraction import extract_timestamps_and_locations
+from capture import CAPTURE_ENABLED, CaptureLog
+from extraction import extract_gesture
+from gesture import Gesture
+from identification import identify_sign
+from registry import build_registry
+from sessions import MULTI_STROKE_SIGNS, SessionStore
+from template_store import STORE_RELOAD_CALLBACKS, current_template_store, watch_template_store
+from templates import PARAMETRIC_DIRECTORY, DISPLAY_DIRECTORY
+from touch_payload import BINARY_CONTENT_TYPE, parse_binary_touches
 from PIL import Image
 import io
 import numpy as np
@@ -33,162 +26,142 @@ app = Flask(__name__)
 app.secret_key = os.urandom(24)
 # cross-Origin Resource Sharing enabled for all routes
 CORS(app)
-# global variable to hold the result of the first stroke for gesture 'Y' for the parametric approach
-first_stroke_result = None
-# global variable to verify that a second stroke came for gesture `Y` for the parametric approach
-second_stroke_result = None
 
+# sessions of the clients that are drawing a multi-stroke sign
+session_store = SessionStore()
+
+# writes the received gestures for replay and template building, off the request path; started with the server
+capture_log: Optional[CaptureLog] = None
 
-def decorator_receive_json(executor_threads: ThreadPoolExecutor) -> Callable:
-    """
-    Decorator factory for injecting ThreadPoolExecutor instance into the decorated function.
-    The resulting decorator will, when applied, pass the executor_threads argument to the decorated function,
-    making it easy to mock or replace for testing.
 
-    :param executor_threads: ThreadPoolExecutor instance used for managing threads.
-    :return: decorator function which injects executor_threads into the decorated function.
+def start_capture_log():
     """
+    Starts the capture log if CAPTURE_ENABLED, to be called once when the server starts rather than on import, e.g.
+    from the startup hook of a WSGI server.
+    """
+    global capture_log
+    if CAPTURE_ENABLED and capture_log is None:
+        capture_log = CaptureLog().start()
+
+# recognisers of all signs with their templates, built once at startup so that requests do not read from disk
+recognisers = build_registry()
 
-    def decorator(func):
-        def wrapper():
-            return func(executor_threads=executor_threads)
 
-        return wrapper
+def rebuild_recognisers():
+    """
+    Builds the recognisers again from a new version of the template store and swaps them in at once, so that requests
+    use either the previous or the new recognisers without waiting for a lock.
+    """
+    global recognisers
+    recognisers = build_registry()
+
 
-    return decorator
+# swaps in new versions of the template store without a restart
+STORE_RELOAD_CALLBACKS.append(rebuild_recognisers)
+watch_template_store(PARAMETRIC_DIRECTORY)
 
 
-# executor for managing threads
-executor = ThreadPoolExecutor(max_workers=1)
+def read_touch_data() -> Optional[Gesture]:
+    """
+    Reads the touch data of the request into a gesture, which is built once and shared by all stages: a binary body
+    if the Content-Type is BINARY_CONTENT_TYPE, otherwise a JSON file, either as list of dicts or in the columnar
+    format, see touch_payload.py.
+    :return: the gesture, or None if the request has no JSON
+    :raises ValueError: if the touch data is malformed
+    """
+    if request.mimetype == BINARY_CONTENT_TYPE:
+        return parse_binary_touches(request.get_data(cache=False))
+    data = request.get_json()
+    # the touch data is validated here, so that malformed touch points are rejected before recognition
+    return extract_gesture(data) if data else None
 
 
 @app.route('/receive_json', methods=['POST'])
-@decorator_receive_json(executor)
-def receive_json(executor_threads=None) -> Tuple[Response, int]:
+def receive_json() -> Tuple[Response, int]:
     """
-    Receives message from frontend with sign in header and touch data as JSON file.
+    Receives message from frontend with sign in header and touch data as JSON file or binary body.
     :rtype: tuple where first object is flask jsonify response object, second is HTTP status code
     :return: two objects: first object is flask jsonify response object, second is HTTP status code
     """
-
-    # declare use of global variable
-    global first_stroke_result
-    global second_stroke_result
-
     # gets header/indicator for sign
     sign: string = request.headers.get('Sign')
-    # gets JSON file
-    data: Union[List[Dict[str, Union[float, List[float]]]], None] = request.get_json()
+    # gets JSON file or binary body, depending on the Content-Type
+    try:
+        data: Optional[Gesture] = read_touch_data()
+    except ValueError as error:
+        return jsonify({"message": f"Invalid touch data: {error}"}), 400
 
     # if data is none, returns error message
     if not data:
         print("not data")
         return jsonify({"message": "No JSON received"}), 400
 
-    # saves touch data into JSON file into backend
-    with open('Parametric/Templates/data.json', 'w') as file:
-        json.dump(data, file)
-
     # gives json into recogniser
-    response: Tuple[Response, int] = recogniser_function(sign, data)
-
-    # if the sign is incorrect, return the response right away
-    if response[0].json.get("message") == "Sign not correct":
-        # if it is the second stroke for 'Y', set flag for delay_response not to reply
-        if sign == 'Y' and first_stroke_result is not None:
-            second_stroke_result = 'NOT'
-        return response
-
-    if sign == 'Y':
-        # if a previous stroke result exists, return it and clear the result
-        if first_stroke_result is not None and second_stroke_result is None:
-            result = first_stroke_result
-            first_stroke_result = None
-            # set the flag for the second stroke for delay_response
-            second_stroke_result = 'Y'
-            return result
-
-        else:
-            # stores first stroke
-            first_stroke_result = response
-
-            # schedules a function to run after a delay
-            future = executor_threads.submit(delay_response, app, 2)
-            # blocks until the future is done, then returns its result
-            return future.result()
+    response, status, recognised = recogniser_function(sign, data)
+
+    # queues the touch data for the capture log, which writes it in the background
+    if capture_log is not None:
+        capture_log.capture(sign, data, recognised)
+
+    if sign in MULTI_STROKE_SIGNS:
+        # collects the strokes of the sign per client; the session header tells apart clients behind the same address
+        client = request.headers.get('Session-Id') or request.remote_addr
+        num_strokes = session_store.add_stroke(client, sign, recognised)
+        if 0 < num_strokes < MULTI_STROKE_SIGNS[sign]['strokes']:
+            return jsonify({"message": f"Stroke {num_strokes} of sign {sign} correct", "stroke": num_strokes,
+                            "strokes": MULTI_STROKE_SIGNS[sign]['strokes']}), 200
 
     # returns Response (imported from Flask) and HTTP status code
-    return response
+    return response, status
 
 
-def recogniser_function(sign: string, data: List[Dict[str, Union[float, List[float]]]]) -> Tuple[Response, int]:
+def recogniser_function(sign: string, data: Union[List[Dict[str, Union[float, List[float]]]], Gesture]) -> Tuple[
+        Response, int, bool]:
     """
         Extracts timestamps and locations into two individual arrays, and feeds it into respective recognisers,
         depending on the sign. This function is used for the parametric approach.
         :rtype: tuple
         :param sign: the sign that is being passed into the function, represented by a string
-        :param data: the touch data detected by the touch screen, in form of a list of dicts
-        :return: two lists, timestamps and locations
+        :param data: the touch data detected by the touch screen, in form of a list of dicts or as gesture read from a
+        binary body
+        :return: three objects: flask jsonify response object, HTTP status code and whether the sign was recognised
     """
-    # extracts relevant datapoints from JSON; timestamps: List[float], locations: List[List[float]]
-    timestamps, locations = extract_timestamps_and_locations(json_data=data)
-
-    # pass into recognisers depending on sign
-    if sign == 'A' and is_sign_a(timestamps, locations):
-        return jsonify({"message": "Sign A correct"}), 200
-    elif sign == 'B' and is_sign_b(timestamps, locations):
-        return jsonify({"message": "Sign B correct"}), 200
-    elif sign == 'CH' and is_sign_ch(timestamps, locations):
-        return jsonify({"message": "Sign CH correct"}), 200
-    elif sign == 'G' and is_sign_g(timestamps, locations):
-        return jsonify({"message": "Sign G correct"}), 200
-    elif sign == 'H' and is_sign_h(timestamps, locations):
-        return jsonify({"message": "Sign H correct"}), 200
-    elif sign == 'J' and is_sign_j(timestamps, locations):
-        return jsonify({"message": "Sign J correct"}), 200
-    elif sign == 'LL' and is_sign_ll(timestamps, locations):
-        return jsonify({"message": "Sign LL correct"}), 200
-    elif sign == 'Ñ' and is_sign_ñ_single_curve(timestamps, locations):
-        return jsonify({"message": "Sign Ñ correct"}), 200
-    elif sign == 'RR' and is_sign_rr(timestamps, locations):
-        return jsonify({"message": "Sign RR correct"}), 200
-    elif sign == 'V' and is_sign_v(timestamps, locations):
-        return jsonify({"message": "Sign V correct"}), 200
-    elif sign == 'W' and is_sign_w_three_curves(timestamps, locations):
-        return jsonify({"message": "Sign W correct"}), 200
-    elif sign == 'Y' and is_sign_y(timestamps, locations):
-        return jsonify({"message": "Sign Y correct"}), 200
-    elif sign == 'Z' and is_sign_z_cubic(timestamps, locations):
-        return jsonify({"message": "Sign Z correct"}), 200
-
-    # otherwise false
-    return jsonify({"message": "Sign not correct"}), 200
-
-
-def delay_response(application: Flask, delay: int) -> Tuple[Response, int]:
-    """
-    Delays a response to simulate asynchronous behaviour, checking the state of two global variables
-    to determine the appropriate response. Note that this function directly manipulates the global variables
-    'first_stroke_result' and 'second_stroke_result'.
+    # extracts relevant datapoints from JSON once into contiguous arrays; timestamps are relative to the first touch
+    gesture = extract_gesture(json_data=data)
+
+    # passes into the recogniser of the sign; multi-curve recognisers also get the touch identifiers of the fingers
+    recogniser = recognisers.get(sign)
+    recognised = recogniser is not None and recogniser(gesture)
+
+    # the message is built from the result
+    message = f"Sign {sign} correct" if recognised else "Sign not correct"
+    return jsonify({"message": message}), 200, recognised
+
 
-    :param application: Flask application instance required to set up application context.
-    :param delay: The delay time in seconds.
-    :return: A tuple containing a Flask Response object and an HTTP status code.
+@app.route('/identify', methods=['POST'])
+def identify() -> Tuple[Response, int]:
+    """
+    Receives touch data as JSON file without a sign in the header and identifies the parametric sign it matches best,
+    e.g. for free practice.
+    :rtype: tuple where first object is flask jsonify response object, second is HTTP status code
+    :return: two objects: first object is flask jsonify response object, second is HTTP status code
     """
-    with application.app_context():
-        # declares use of global variables
-        global first_stroke_result
-        global second_stroke_result
-        time.sleep(delay)
-        if first_stroke_result is not None and second_stroke_result is None:
-            # if no second stroke has been received after the delay
-            result = (jsonify({"message": "Second stroke not received"}), 200)
-            first_stroke_result = None
-            return result
-        elif second_stroke_result is not None:
-            # if the second stroke has been received, reset second global variable
-            second_stroke_result = None
-            return jsonify({"message": "Second stroke already received"}), 200
+    # gets JSON file or binary body, depending on the Content-Type
+    try:
+        data: Optional[Gesture] = read_touch_data()
+    except ValueError as error:
+        return jsonify({"message": f"Invalid touch data: {error}"}), 400
+
+    # if data is none, returns error message
+    if not data:
+        return jsonify({"message": "No JSON received"}), 400
+
+    # narrows the signs down with the template index and compares the best ranked ones exactly
+    sign, distance, _ = identify_sign(data)
+
+    if sign is None:
+        return jsonify({"message": "No sign identified"}), 200
+    return jsonify({"message": f"Sign {sign} identified", "sign": sign, "distance": distance}), 200
 
 
 @app.route('/get-template', methods=['GET'])
@@ -200,7 +173,12 @@ def get_template() -> Response:
     # retrieves sign
     sign = request.args.get('sign')
     if sign:
-        # reads in the coordinates and returns them
+        # returns the coordinates from the template store if it contains them
+        store = current_template_store()
+        coordinates = store.array(f"{DISPLAY_DIRECTORY}/{sign}.json") if store is not None else None
+        if coordinates is not None:
+            return jsonify(coordinates.tolist())
+        # otherwise reads in the coordinates and returns them
         with open(f"Parametric/Templates/{sign}.json", 'r') as f:
             coordinates = json.load(f)
             return jsonify(coordinates)
@@ -340,5 +318,6 @@ def extract_label(y_pred: np.ndarray, label_mapping: Dict[str, int] = None) -> O
 
 
 if __name__ == '__main__':
+    start_capture_log()
     # make web server listen on port 5000 and makes it externally visible by binding it to 0.0.0.0
     app.run(host='0.0.0.0', port=5000)
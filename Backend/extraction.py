@@ -5,7 +5,9 @@ import json
 import os
 from typing import List, Dict, Tuple, Union
 import numpy as np
+from gesture import Gesture
 from recognition import euclidean_distance
+from touch_payload import parse_columnar_touches
 
 
 def extract_timestamps_and_locations(json_data: List[Dict[str, Union[float, List[float]]]]) -> Tuple[
@@ -29,6 +31,24 @@ def extract_timestamps_and_locations(json_data: List[Dict[str, Union[float, List
     return timestamps, locations
 
 
+def extract_gesture(json_data: Union[List[Dict[str, Union[float, List[float]]]], Dict[str, List[float]], Gesture]) \
+        -> Gesture:
+    """
+    Extracts the touch data into an array-backed gesture, which is built once per request and shared by all stages.
+    The format is detected by its type, see touch_payload.py for the compact formats.
+
+    :param json_data: the touch data detected by the touch screen, in form of a list of dicts, in the columnar format
+    {"t": [...], "x": [...], "y": [...]}, or the gesture already read from a binary body
+    :return: the gesture with contiguous arrays of timestamps and locations
+    :raises ValueError: if touch data in the columnar format is invalid
+    """
+    if isinstance(json_data, Gesture):
+        return json_data
+    if isinstance(json_data, dict):
+        return parse_columnar_touches(json_data)
+    return Gesture.from_json(json_data)
+
+
 def split_touch_locations_two_curves(sign: str, locations: List[List[float]]) -> Tuple[
     List[List[float]], List[List[float]]]:
     """
@@ -126,6 +146,28 @@ def split_touch_locations_three_curves(locations: List[List[float]]) \
     return curve1, curve2, curve3
 
 
+def load_recorded_gestures(parametric_directory: str) -> Dict[str, List[Dict[str, Union[float, List[float]]]]]:
+    """
+    Loads the recorded touch data of every sign, i.e. the 'data_*.json' file within each 'sign_*' directory, which is
+    used to fit the templates and to replay gestures offline.
+
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: A dictionary mapping the upper-case sign (e.g. 'RR') to its touch data, in form of a list of dicts.
+    """
+    recordings = {}
+    for directory in sorted(os.listdir(parametric_directory)):
+        # only sign directories contain recordings
+        if not directory.startswith('sign_'):
+            continue
+        sign = directory[len('sign_'):]
+        file_path = os.path.join(parametric_directory, directory, f'data_{sign}.json')
+        if os.path.exists(file_path):
+            with open(file_path) as file:
+                recordings[sign.upper()] = json.load(file)
+
+    return recordings
+
+
 def numpy_to_json(directory: str, filename: str):
     """
     This function loads a NumPy array from a file, converts it into a list (since NumPy arrays
@@ -0,0 +1,236 @@
+"""
+Cheap geometric features of a gesture that reject clearly wrong gestures before any Bézier curve is fitted. The
+features are compared with per-sign envelopes, i.e. the range of every feature in the recordings of the sign widened
+by a tolerance, which are learned by save_feature_envelopes and stored as JSON file in the parametric directory.
+
+All features work on the raw touch stream, in which the points of simultaneous fingers arrive interleaved: the path
+length links every point to the nearest of its preceding points instead of its predecessor, and the turning angle is
+only used for signs drawn with a single finger.
+"""
+import json
+import math
+import os
+from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, Union, Optional, Sequence, Callable, Tuple
+import numpy as np
+from extraction import extract_timestamps_and_locations
+from preprocessing import ramer_douglas_peucker
+from segmentation import MIN_CURVE_POINTS, TRACK_WINDOW_PER_CURVE, segment_by_time_gap
+from template_bank import recording_paths
+from templates import PARAMETRIC_DIRECTORY, SIGN_TEMPLATES
+
+# file that stores the feature envelopes
+FEATURE_ENVELOPES_FILE = 'feature_envelopes.json'
+
+# tolerance of the positions as share of the diagonal of the recorded bounding box, plus an absolute padding in pixels
+ENVELOPE_MARGIN = 0.25
+ENVELOPE_PADDING = 40.0
+# factor by which the path length may be shorter or longer than recorded
+PATH_LENGTH_RATIO = 2.0
+# maximum distance in pixels of a point removed before the turning angle is summed, which ignores the jitter of touches
+TURNING_EPSILON = 10.0
+# tolerance of the turning angle in radians
+TURNING_TOLERANCE = math.pi
+# step in pixels above which consecutive points are assumed to belong to different fingers
+MAX_FINGER_STEP = 40.0
+
+# gates of features_valid in the order in which they are checked, cheapest first
+FEATURE_GATES = ('strokes', 'bounding_box', 'start', 'end', 'path_length', 'turning_angle')
+# gates that hold for a sign drawn with one finger although its recordings were drawn with several fingers
+POSITION_GATES = ('strokes', 'bounding_box')
+# gates that the recogniser of a sign served by the endpoint checks, if not FEATURE_GATES
+RECOGNISER_GATES: Dict[str, Tuple[str, ...]] = {'Ñ': POSITION_GATES}
+
+# number of gestures per sign rejected by each gate or passed, since the server started
+FEATURE_STATISTICS: Counter = Counter()
+
+
+def nearest_steps(locations: np.ndarray, window: int = TRACK_WINDOW_PER_CURVE) -> np.ndarray:
+    """
+    Calculates the distance of every point to the nearest of its window preceding points, i.e. the step of its finger
+    even if the points of several fingers are interleaved.
+
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :param window: The number of preceding points that are considered.
+    :return: The steps as numpy array of shape (n - 1,), one for every point but the first.
+    """
+    if len(locations) < 2:
+        return np.zeros(0)
+    steps = np.full((min(window, len(locations) - 1), len(locations) - 1), np.inf)
+    for lag in range(1, len(steps) + 1):
+        steps[lag - 1, lag - 1:] = np.linalg.norm(locations[lag:] - locations[:-lag], axis=1)
+    return steps.min(axis=0)
+
+
+def path_length(locations: np.ndarray, window: int = TRACK_WINDOW_PER_CURVE) -> float:
+    """
+    Sums the steps of nearest_steps. For a single finger this is the length of its path; for interleaved fingers it
+    approximates the sum of the lengths of their paths.
+
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :param window: The number of preceding points that are considered.
+    :return: The path length in pixels.
+    """
+    return float(nearest_steps(locations, window).sum())
+
+
+def turning_angle(locations: np.ndarray, epsilon: float = TURNING_EPSILON) -> float:
+    """
+    Sums the absolute changes of direction along the path after decimating it with the Ramer-Douglas-Peucker
+    algorithm, so that a straight line has no turning angle regardless of the jitter of the touches.
+
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :param epsilon: The maximum distance of a removed point to the decimated path.
+    :return: The turning angle in radians.
+    """
+    corners = locations[ramer_douglas_peucker(locations, epsilon)]
+    steps = np.diff(corners, axis=0)
+    headings = np.arctan2(steps[:, 1], steps[:, 0])
+    # wraps every change of direction into [-pi, pi]
+    return float(np.abs(np.angle(np.exp(1j * np.diff(headings)))).sum())
+
+
+def stroke_count(timestamps: Union[List[float], np.ndarray], locations: np.ndarray) -> int:
+    """
+    Counts the strokes of a gesture that are separated by pauses and have MIN_CURVE_POINTS or more points.
+
+    :param timestamps: The timestamps of the touch points.
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :return: The number of strokes.
+    """
+    return sum(1 for segment in segment_by_time_gap(timestamps) if len(segment) >= MIN_CURVE_POINTS)
+
+
+# functions that extract each feature from the timestamps and the locations as numpy array, cheapest first
+FEATURE_EXTRACTORS: Dict[str, Callable[[Union[List[float], np.ndarray], np.ndarray], Union[int, float, np.ndarray]]] = {
+    'strokes': stroke_count,
+    'bounding_box': lambda timestamps, locations: np.concatenate([locations.min(axis=0), locations.max(axis=0)]),
+    'start': lambda timestamps, locations: locations[0],
+    'end': lambda timestamps, locations: locations[-1],
+    'path_length': lambda timestamps, locations: path_length(locations),
+    'turning_angle': lambda timestamps, locations: turning_angle(locations),
+}
+
+
+def gesture_features(timestamps: Union[List[float], np.ndarray], locations: Union[List[List[float]], np.ndarray]) \
+        -> Dict[str, Union[int, float, bool, List[float]]]:
+    """
+    Extracts all geometric features of a gesture.
+
+    :param timestamps: The timestamps of the touch points.
+    :param locations: The touch locations, where each location is a list of x and y coordinates.
+    :return: A dictionary with the number of strokes separated by pauses, the bounding box as min x, min y, max x and
+    max y, the first and the last location, the path length, the turning angle, and whether the points of several
+    fingers are interleaved.
+    """
+    locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+    steps = np.linalg.norm(np.diff(locations, axis=0), axis=1)
+    features = {gate: np.asarray(extractor(timestamps, locations)).tolist()
+                for gate, extractor in FEATURE_EXTRACTORS.items()}
+    features['interleaved'] = bool(np.mean(steps > MAX_FINGER_STEP) > 0.25) if len(steps) else False
+    return features
+
+
+def learn_feature_envelope(recorded_features: List[Dict]) -> Dict[str, Optional[List]]:
+    """
+    Learns the envelope of a sign from the features of its recordings: the range of every feature, widened by the
+    tolerances of this module.
+
+    :param recorded_features: The features of every recording of the sign, see gesture_features.
+    :return: The envelope, mapping each gate to the lower and upper limit of its feature, or None if the gate is not
+    used for the sign.
+    """
+    boxes = np.array([features['bounding_box'] for features in recorded_features])
+    diagonal = float(np.linalg.norm(boxes[:, 2:].max(axis=0) - boxes[:, :2].min(axis=0)))
+    tolerance = ENVELOPE_MARGIN * diagonal + ENVELOPE_PADDING
+
+    def position_range(key: str) -> List[List[float]]:
+        # range of a position feature, widened by the tolerance
+        values = np.array([features[key] for features in recorded_features])
+        return [(values.min(axis=0) - tolerance).tolist(), (values.max(axis=0) + tolerance).tolist()]
+
+    lengths = [features['path_length'] for features in recorded_features]
+    angles = [features['turning_angle'] for features in recorded_features]
+    single_finger = not any(features['interleaved'] for features in recorded_features)
+    return {
+        'strokes': [1, max(features['strokes'] for features in recorded_features)],
+        'bounding_box': position_range('bounding_box'),
+        'start': position_range('start'),
+        'end': position_range('end'),
+        'path_length': [min(lengths) / PATH_LENGTH_RATIO, max(lengths) * PATH_LENGTH_RATIO],
+        'turning_angle': [max(0.0, min(angles) - TURNING_TOLERANCE), max(angles) + TURNING_TOLERANCE]
+        if single_finger else None,
+    }
+
+
+def save_feature_envelopes(parametric_directory: str = PARAMETRIC_DIRECTORY) -> Dict[str, Dict]:
+    """
+    Learns the feature envelope of every sign from all its recordings in its sign directory and stores the envelopes
+    as JSON file in the parametric directory. Needs to be executed again whenever recordings are added.
+
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: A dictionary mapping each sign to its envelope.
+    """
+    envelopes = {}
+    for sign in SIGN_TEMPLATES:
+        recorded_features = []
+        for path in recording_paths(os.path.join(parametric_directory, f'sign_{sign.lower()}'), sign):
+            with open(path) as file:
+                recorded_features.append(gesture_features(*extract_timestamps_and_locations(json.load(file))))
+        if recorded_features:
+            envelopes[sign] = learn_feature_envelope(recorded_features)
+
+    with open(os.path.join(parametric_directory, FEATURE_ENVELOPES_FILE), 'w') as file:
+        json.dump(envelopes, file, indent=2, ensure_ascii=False)
+    return envelopes
+
+
+@lru_cache(maxsize=None)
+def load_feature_envelopes(parametric_directory: str = PARAMETRIC_DIRECTORY) -> Dict[str, Dict]:
+    """
+    Loads the feature envelopes stored by save_feature_envelopes once per process.
+
+    :param parametric_directory: The 'Parametric' directory that contains the feature envelopes.
+    :return: A dictionary mapping each sign to its envelope.
+    """
+    with open(os.path.join(parametric_directory, FEATURE_ENVELOPES_FILE)) as file:
+        return json.load(file)
+
+
+def features_valid(sign: str, timestamps: Union[List[float], np.ndarray],
+                   locations: Union[List[List[float]], np.ndarray], gates: Sequence[str] = FEATURE_GATES) -> bool:
+    """
+    Checks whether every geometric feature of a gesture lies within the envelope of the sign. Signs without envelope
+    always pass. The gate that rejects a gesture is counted in FEATURE_STATISTICS.
+
+    :param sign: A string, indicating which sign is parsed.
+    :param timestamps: The timestamps of the touch points.
+    :param locations: The touch locations, where each location is a list of x and y coordinates.
+    :param gates: The gates that are checked, e.g. POSITION_GATES for single-curve variants of multi-finger signs.
+    :return: True if the gesture may be the sign, False otherwise.
+    """
+    envelope = load_feature_envelopes().get(sign)
+    if envelope is None or len(locations) == 0:
+        return True
+
+    # extracts each feature only once the gates before it have passed
+    locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+    for gate in gates:
+        if envelope[gate] is None:
+            continue
+        lower, upper = envelope[gate]
+        feature = FEATURE_EXTRACTORS[gate](timestamps, locations)
+        if np.any(feature < np.asarray(lower)) or np.any(feature > np.asarray(upper)):
+            FEATURE_STATISTICS[f'{sign}:{gate}'] += 1
+            print(f"Feature {gate} outside of the envelope")
+            return False
+
+    FEATURE_STATISTICS[f'{sign}:passed'] += 1
+    return True
+
+
+# learns the feature envelopes from the recordings of the sign directories; needs to be executed again after recording
+if __name__ == '__main__':
+    for envelope_sign, envelope in save_feature_envelopes().items():
+        print(envelope_sign, {gate: envelope[gate] for gate in ['strokes', 'path_length', 'turning_angle']})
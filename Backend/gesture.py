@@ -0,0 +1,135 @@
+"""
+Array-backed data model for touch gestures. A gesture is built once from the request and carries contiguous float32
+arrays through extraction, fitting and recognition; derived values are computed lazily and cached on the object.
+"""
+from typing import List, Dict, Union, Optional, Tuple
+import numpy as np
+
+
+class Stroke:
+    """
+    A sequence of touch points with timestamps and x and y coordinates. Timestamps are stored as float32 offsets from
+    start_time, which keeps millisecond precision for the absolute timestamps sent by the touchscreen.
+    The stroke can be passed wherever a list of locations is expected, e.g. np.asarray(stroke) yields its locations.
+    """
+    __slots__ = ('start_time', 'timestamps', 'locations', '_cache')
+
+    def __init__(self, timestamps: Union[List[float], np.ndarray], locations: Union[List[List[float]], np.ndarray],
+                 start_time: Optional[float] = None):
+        """
+        :param timestamps: The timestamps of the touch points, absolute or relative to start_time.
+        :param locations: The touch locations, where each location is a list of x and y coordinates.
+        :param start_time: The absolute time of the relative timestamps. If omitted, the timestamps are absolute and
+        the first one becomes the start time.
+        """
+        if start_time is None:
+            timestamps = np.asarray(timestamps, dtype=float)
+            start_time = float(timestamps[0]) if len(timestamps) else 0.0
+            timestamps = timestamps - start_time
+        self.start_time = start_time
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.float32)
+        self.locations = np.ascontiguousarray(np.reshape(locations, (-1, 2)), dtype=np.float32)
+        self._cache = {}
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.locations if dtype is None else self.locations.astype(dtype)
+
+    @property
+    def x(self) -> np.ndarray:
+        """The x coordinates of the touch points."""
+        return self.locations[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        """The y coordinates of the touch points."""
+        return self.locations[:, 1]
+
+    def _cached(self, key: Tuple, compute):
+        # computes a derived value on first access and stores it as read-only array
+        if key not in self._cache:
+            value = compute()
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+            self._cache[key] = value
+        return self._cache[key]
+
+    @property
+    def duration(self) -> float:
+        """The time between the first and the last touch point in seconds."""
+        return self._cached(('duration',),
+                            lambda: float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0)
+
+    @property
+    def bounding_box(self) -> np.ndarray:
+        """The bounding box of the touch points as array of min x, min y, max x and max y."""
+        return self._cached(('bounding_box',), lambda: np.concatenate([self.locations.min(axis=0),
+                                                                         self.locations.max(axis=0)]))
+
+    def select(self, indices: Union[np.ndarray, slice]) -> 'Stroke':
+        """
+        Returns the stroke formed by a subset of the touch points, e.g. one curve of a multi-curve gesture.
+
+        :param indices: The indices, boolean mask or slice of the selected touch points.
+        :return: A new stroke that shares the start time.
+        """
+        return Stroke(self.timestamps[indices], self.locations[indices], start_time=self.start_time)
+
+
+class Gesture(Stroke):
+    """
+    All touch points of one request. Besides the stroke data, a gesture optionally carries the touch identifier of
+    every point, which distinguishes simultaneous fingers.
+    """
+    __slots__ = ('touch_ids',)
+
+    def __init__(self, timestamps: Union[List[float], np.ndarray], locations: Union[List[List[float]], np.ndarray],
+                 touch_ids: Optional[Union[List[int], np.ndarray]] = None, start_time: Optional[float] = None):
+        """
+        :param timestamps: The timestamps of the touch points, absolute or relative to start_time.
+        :param locations: The touch locations, where each location is a list of x and y coordinates.
+        :param touch_ids: Optional identifier of the finger of every touch point.
+        :param start_time: The absolute time of the relative timestamps.
+        """
+        super().__init__(timestamps, locations, start_time)
+        self.touch_ids = None if touch_ids is None else np.ascontiguousarray(touch_ids, dtype=np.int32)
+
+    @classmethod
+    def from_json(cls, json_data: List[Dict[str, Union[float, List[float]]]]) -> 'Gesture':
+        """
+        Builds a gesture from the touch data sent by the touch screen, in form of a list of dicts with 'timestamp',
+        'location' and optionally 'id'. Either every touch point or none has an 'id'.
+
+        :param json_data: The touch data detected by the touch screen.
+        :return: The gesture.
+        :raises ValueError: If a touch point lacks a field, is not numeric, has an 'id' that is no 32-bit integer or
+        only some touch points have an 'id'.
+        """
+        try:
+            timestamps = np.fromiter((item['timestamp'] for item in json_data), dtype=float, count=len(json_data))
+            locations = np.array([item['location'] for item in json_data], dtype=np.float32)
+            touch_ids = [item.get('id') for item in json_data]
+            # booleans are integers in Python, so they would be converted to numbers, as in the columnar format
+            if any(isinstance(item['timestamp'], bool) or any(isinstance(value, bool) for value in item['location'])
+                   for item in json_data):
+                raise ValueError("Touch data contains booleans")
+        except (KeyError, TypeError, AttributeError) as error:
+            raise ValueError(f"Touch point without a valid {error}") from error
+        if len(json_data) and (locations.ndim != 2 or locations.shape[1] != 2):
+            raise ValueError("Touch locations need an x and a y coordinate")
+        if not (np.isfinite(timestamps).all() and np.isfinite(locations).all()):
+            raise ValueError("Touch data contains values that are not finite")
+
+        if all(touch_id is None for touch_id in touch_ids):
+            touch_ids = None
+        elif any(touch_id is None for touch_id in touch_ids):
+            raise ValueError("Only some touch points have an 'id'")
+        else:
+            # identifiers are integers, which are neither truncated from floats nor wrapped around in 32 bits
+            if any(isinstance(touch_id, bool) or not isinstance(touch_id, int) for touch_id in touch_ids):
+                raise ValueError("Touch identifiers are not integers")
+            if not all(np.iinfo(np.int32).min <= touch_id <= np.iinfo(np.int32).max for touch_id in touch_ids):
+                raise ValueError("Touch identifiers out of range")
+        return cls(timestamps, locations.reshape(-1, 2), touch_ids)
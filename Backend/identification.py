@@ -0,0 +1,347 @@
+"""
+Identification of the parametric sign of a gesture without knowing which sign the user intended, e.g. for free
+practice. The signs are narrowed down in three stages of increasing cost:
+
+1. signs whose number of strokes or maximum duration does not fit the gesture are skipped,
+2. the strokes of the raw gesture are embedded once per number of strokes, and every embedding is looked up once in a
+   vantage-point tree over the coarse embeddings of all templates of the template bank; the signs of the
+   IDENTIFY_NEAREST_TEMPLATES nearest templates are the candidates, ranked by their embedding distance,
+3. only the IDENTIFY_TOP_K best ranked signs that pass the feature gates of their recogniser are preprocessed, split
+   and fitted as configured for the sign, and compared exactly with the metric and thresholds of the recogniser that
+   the endpoint serves for the sign, see registry.recogniser_templates.
+"""
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional, Callable
+import numpy as np
+from features import FEATURE_GATES, RECOGNISER_GATES, features_valid
+from gesture import Gesture
+from parameterisation import fit_bezier_batch, evaluate_bezier
+from preprocessing import preprocess_for_sign, preprocess_touches_for_sign, resample_by_arc_length
+from recognition import timestamp_duration_valid
+from registry import recogniser_templates
+from segmentation import SIGN_SEGMENTATION, MIN_CURVE_POINTS, segment_by_touch_id, segment_by_time_gap, \
+    segment_by_nearest_track, segment_curves
+from template_bank import EMBEDDING_NUM_POINTS, TemplateBank, curve_embedding, load_template_bank
+from template_store import STORE_RELOAD_CALLBACKS
+from templates import SIGN_TEMPLATES
+
+# number of best ranked signs that are compared exactly
+IDENTIFY_TOP_K = 3
+
+# number of templates nearest in the embedding that every stroke of the gesture is looked up with
+IDENTIFY_NEAREST_TEMPLATES = 4
+
+# maximum distance in pixels between consecutive points of one finger, with which the raw strokes of a gesture without
+# touch identifiers are split into simultaneous strokes
+IDENTIFY_TRACK_THRESHOLD = 20.0
+
+# maximum number of points in a leaf of the vantage-point tree, whose distances are calculated at once
+VP_TREE_LEAF_SIZE = 8
+
+
+class VantagePointTree:
+    """
+    Vantage-point tree over points with the Euclidean distance. Every inner node splits its points by their distance to
+    a vantage point at the median distance, so that a nearest-neighbour search can skip the half of the node that is
+    farther away than the best neighbours found so far.
+    """
+    __slots__ = ('points', '_nodes')
+
+    def __init__(self, points: np.ndarray, leaf_size: int = VP_TREE_LEAF_SIZE):
+        """
+        :param points: The points as numpy array of shape (t, d).
+        :param leaf_size: The maximum number of points in a leaf.
+        """
+        self.points = np.ascontiguousarray(points, dtype=float).reshape(len(points), -1)
+        # nodes are tuples of vantage point index, radius, inside and outside node, or of point indices for leaves
+        self._nodes: List[tuple] = []
+        self._build(np.arange(len(self.points)), leaf_size)
+
+    def _build(self, indices: np.ndarray, leaf_size: int) -> int:
+        # builds the subtree of the given points and returns the index of its root node
+        node = len(self._nodes)
+        if len(indices) <= leaf_size:
+            self._nodes.append((indices,))
+            return node
+        self._nodes.append(())
+        vantage, others = indices[0], indices[1:]
+        distances = np.linalg.norm(self.points[others] - self.points[vantage], axis=1)
+        radius = float(np.median(distances))
+        inside = self._build(others[distances <= radius], leaf_size)
+        outside = self._build(others[distances > radius], leaf_size)
+        self._nodes[node] = (vantage, radius, inside, outside)
+        return node
+
+    def query(self, point: np.ndarray, k: int = 1, allowed: Optional[Callable[[np.ndarray], np.ndarray]] = None) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k nearest points.
+
+        :param point: The query point as numpy array of shape (d,).
+        :param k: The number of neighbours.
+        :param allowed: Optional function that returns which of the given point indices may be returned.
+        :return: The distances and indices of the neighbours, sorted by distance. Fewer than k if fewer points are
+        allowed.
+        """
+        point = np.asarray(point, dtype=float).ravel()
+        best_distances, best_indices = np.full(0, np.inf), np.full(0, -1)
+        # nodes to visit with a lower bound of the distance of their points, the nearest side on top
+        stack = [(0.0, 0)] if self._nodes else []
+        while stack:
+            lower_bound, node = stack.pop()
+            # skips nodes that cannot contain a nearer point than the k found since they were pushed
+            if len(best_distances) == k and lower_bound > best_distances[-1]:
+                continue
+            node = self._nodes[node]
+
+            if len(node) == 1:
+                candidates = node[0] if allowed is None else node[0][allowed(node[0])]
+                distances = np.linalg.norm(self.points[candidates] - point, axis=1)
+            else:
+                vantage, radius, inside, outside = node
+                candidates = np.array([vantage]) if allowed is None or allowed(np.array([vantage]))[0] \
+                    else np.full(0, -1)
+                distance = float(np.linalg.norm(self.points[vantage] - point))
+                distances = np.full(len(candidates), distance)
+
+            # keeps the k nearest points found so far
+            best_distances = np.concatenate([best_distances, distances])
+            best_indices = np.concatenate([best_indices, candidates])
+            order = np.argsort(best_distances, kind='stable')[:k]
+            best_distances, best_indices = best_distances[order], best_indices[order]
+
+            if len(node) > 1:
+                # pushes the farther side first, so that the nearer side is searched first; skips sides beyond the
+                # bound, which is checked again when a side is popped
+                bound = best_distances[-1] if len(best_distances) == k else np.inf
+                sides = [(max(distance - radius, 0.0), inside), (max(radius - distance, 0.0), outside)]
+                if distance <= radius:
+                    sides.reverse()
+                stack.extend(side for side in sides if side[0] <= bound)
+
+        return best_distances, best_indices
+
+
+class SignIndex:
+    """
+    The template bank with a vantage-point tree over the coarse embeddings of all its templates.
+    """
+    __slots__ = ('bank', 'tree')
+
+    def __init__(self, bank: TemplateBank):
+        """
+        :param bank: The template bank.
+        """
+        self.bank = bank
+        self.tree = VantagePointTree(curve_embedding(bank.curves))
+
+
+@lru_cache(maxsize=None)
+def load_sign_index() -> SignIndex:
+    """
+    Loads the template bank and indexes it once per version of the template store.
+
+    :return: The sign index.
+    """
+    return SignIndex(load_template_bank())
+
+
+# indexes the template bank again from a new version of the template store
+STORE_RELOAD_CALLBACKS.append(load_sign_index.cache_clear)
+
+
+def gesture_strokes(gesture: Gesture) -> Tuple[List[np.ndarray], bool]:
+    """
+    Splits a gesture into its strokes, by its touch identifiers if available and otherwise by pauses between strokes.
+    Simultaneous strokes without touch identifiers are not separated, so the strokes may be merged in that case.
+
+    :param gesture: The gesture.
+    :return: The indices of the points of every stroke of MIN_CURVE_POINTS or more points, and whether the strokes
+    are exact.
+    """
+    if gesture.touch_ids is not None:
+        segments, exact = segment_by_touch_id(gesture.touch_ids), True
+    else:
+        segments, exact = segment_by_time_gap(gesture.timestamps), False
+    return [segment for segment in segments if len(segment) >= MIN_CURVE_POINTS], exact
+
+
+def count_strokes(gesture: Gesture) -> Tuple[int, bool]:
+    """
+    Counts the strokes of a gesture, see gesture_strokes. The count is a lower bound if it is not exact.
+
+    :param gesture: The gesture.
+    :return: The number of strokes of MIN_CURVE_POINTS or more points, and whether the number is exact.
+    """
+    strokes, exact = gesture_strokes(gesture)
+    return len(strokes), exact
+
+
+def raw_strokes(gesture: Gesture, num_strokes: int, strokes: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Splits the raw gesture into a number of strokes, without preprocessing it: into the strokes of gesture_strokes if
+    there are as many, and otherwise into simultaneous strokes by their nearest tracks, see
+    segmentation.segment_by_nearest_track.
+
+    :param gesture: The gesture.
+    :param num_strokes: The number of strokes.
+    :param strokes: The indices of the points of every stroke of the gesture, see gesture_strokes.
+    :return: The touch locations of every stroke.
+    :raises ValueError: If the gesture cannot be split into the strokes.
+    """
+    if len(strokes) == num_strokes:
+        curves = [gesture.locations[stroke] for stroke in strokes]
+    elif num_strokes == 1:
+        curves = [gesture.locations]
+    else:
+        curves = [gesture.locations[track] for track in segment_by_nearest_track(gesture.locations, num_strokes,
+                                                                                  IDENTIFY_TRACK_THRESHOLD)]
+    if any(len(curve) < 2 for curve in curves):
+        raise ValueError(f"Stroke of {num_strokes} strokes is empty")
+    return curves
+
+
+def stroke_embeddings(curves: List[np.ndarray]) -> np.ndarray:
+    """
+    Embeds raw strokes, which are neither preprocessed nor fitted. Every stroke is resampled to the points of the
+    embedding equally spaced along its arc length, which approximates a fitted curve sampled at equally spaced
+    parameter values.
+
+    :param curves: The touch locations of every stroke, each a numpy array of shape (n, 2).
+    :return: The embeddings of the strokes as numpy array of shape (s, 2 * EMBEDDING_NUM_POINTS).
+    """
+    resampled = [resample_by_arc_length(np.zeros(len(curve)), np.asarray(curve, dtype=float), EMBEDDING_NUM_POINTS)[1]
+                 for curve in curves]
+    return curve_embedding(np.array(resampled).reshape(len(curves), EMBEDDING_NUM_POINTS, 2))
+
+
+def candidate_signs(gesture: Gesture, bank: TemplateBank) -> List[str]:
+    """
+    Returns the signs of the template bank whose number of strokes and maximum duration fit the gesture.
+
+    :param gesture: The gesture.
+    :param bank: The template bank.
+    :return: The candidate signs.
+    """
+    num_strokes, exact = count_strokes(gesture)
+    signs = []
+    for sign in sorted(set(bank.signs.tolist())):
+        expected = bank.num_strokes(sign)
+        if (num_strokes == expected if exact else num_strokes <= expected) \
+                and timestamp_duration_valid(sign, gesture.timestamps):
+            signs.append(sign)
+    return signs
+
+
+def rank_signs(gesture: Gesture, index: SignIndex, signs: List[str],
+               num_templates: int = IDENTIFY_NEAREST_TEMPLATES) -> List[Tuple[float, str]]:
+    """
+    Ranks signs by the embedding distance of the raw strokes of a gesture to their nearest templates. The gesture is
+    split and embedded once per number of strokes, and every embedding is looked up once in the vantage-point tree of
+    the index, so that the cost does not grow with the number of signs. A sign is ranked if one of its templates is
+    among the nearest templates of a stroke; a stroke whose nearest templates are all of other signs adds the
+    distance of the farthest of them, a lower bound of the distance to the templates of the sign.
+
+    :param gesture: The gesture.
+    :param index: The sign index.
+    :param signs: The candidate signs, see candidate_signs.
+    :param num_templates: The number of nearest templates that every stroke is looked up with.
+    :return: The embedding distance and sign of every ranked sign, sorted by distance.
+    """
+    signs_by_count: Dict[int, List[str]] = {}
+    for sign in signs:
+        signs_by_count.setdefault(index.bank.num_strokes(sign), []).append(sign)
+
+    strokes, _ = gesture_strokes(gesture)
+    ranking = []
+    for num_strokes, count_signs in signs_by_count.items():
+        try:
+            embeddings = stroke_embeddings(raw_strokes(gesture, num_strokes, strokes))
+        except ValueError:
+            continue
+        distances, hit = dict.fromkeys(count_signs, 0.0), set()
+        for embedding in embeddings:
+            template_distances, templates = index.tree.query(embedding, num_templates)
+            nearest: Dict[str, float] = {}
+            for distance, template in zip(template_distances.tolist(), templates.tolist()):
+                nearest.setdefault(str(index.bank.signs[template]), distance)
+            bound = float(template_distances[-1]) if len(template_distances) else np.inf
+            for sign in count_signs:
+                distances[sign] += nearest.get(sign, bound)
+            hit.update(nearest)
+        ranking.extend((distances[sign], sign) for sign in count_signs if sign in hit)
+    ranking.sort(key=lambda entry: entry[0])
+    return ranking
+
+
+def user_curves(sign: str, gesture: Gesture, num_strokes: int) -> List[np.ndarray]:
+    """
+    Preprocesses the gesture as configured for a sign, splits it into the strokes of the sign and fits each stroke
+    with the degree of the sign's recogniser.
+
+    :param sign: The sign.
+    :param gesture: The gesture.
+    :param num_strokes: The number of strokes of the sign in the template bank.
+    :return: The user curves, each a numpy array of shape (100, 2).
+    :raises ValueError: If the gesture cannot be split into the strokes of the sign.
+    """
+    if gesture.touch_ids is None:
+        timestamps, locations = preprocess_for_sign(sign, gesture.timestamps, gesture.locations)
+        touch_ids = None
+    else:
+        timestamps, locations, touch_ids = preprocess_touches_for_sign(sign, gesture.timestamps, gesture.locations,
+                                                                       gesture.touch_ids)
+    if num_strokes == 1:
+        strokes = [locations]
+    elif SIGN_SEGMENTATION.get(sign, {}).get('num_curves') == num_strokes:
+        strokes = list(segment_curves(sign, timestamps, locations, touch_ids))
+    else:
+        raise ValueError(f"Sign {sign} cannot be split into {num_strokes} strokes")
+    if any(len(stroke) < 2 for stroke in strokes):
+        raise ValueError(f"Stroke of sign {sign} is empty")
+    return list(evaluate_bezier(fit_bezier_batch(strokes, degree=SIGN_TEMPLATES[sign]['degree'])))
+
+
+def identify_sign(gesture: Gesture, index: Optional[SignIndex] = None, top_k: int = IDENTIFY_TOP_K) \
+        -> Tuple[Optional[str], float, Dict[str, int]]:
+    """
+    Identifies the parametric sign of a gesture, see the module docstring. Of all signs within their threshold, the
+    sign with the smallest distance relative to its threshold is returned.
+
+    :param gesture: The gesture.
+    :param index: The sign index. Loaded from the template bank if omitted.
+    :param top_k: The number of best ranked signs that are compared exactly.
+    :return: The identified sign, or None, its distance on the metric of its recogniser summed over its strokes, and
+    the number of signs left after each stage.
+    """
+    index = load_sign_index() if index is None else index
+    signs = candidate_signs(gesture, index.bank)
+    statistics = {'signs': len(set(index.bank.signs.tolist())), 'filtered': len(signs), 'ranked': 0, 'accepted': 0}
+
+    # fits the user curves of the best ranked signs that pass the feature gates of their recogniser and that the
+    # gesture can be split into
+    compared = []
+    for _, sign in rank_signs(gesture, index, signs):
+        if len(compared) == top_k:
+            break
+        if not features_valid(sign, gesture.timestamps, gesture.locations, RECOGNISER_GATES.get(sign, FEATURE_GATES)):
+            continue
+        try:
+            compared.append((sign, user_curves(sign, gesture, index.bank.num_strokes(sign))))
+        except ValueError:
+            continue
+    statistics['ranked'] = len(compared)
+
+    # compares the best ranked signs exactly with the metric and thresholds of their recogniser
+    best_sign, best_distance, best_score = None, np.inf, np.inf
+    for sign, curves in compared:
+        templates = recogniser_templates(sign)
+        strokes, distances = index.bank.match(sign, curves, templates.thresholds, templates.metric)
+        if np.any(strokes < 0) or len(set(strokes.tolist())) < len(strokes):
+            continue
+        statistics['accepted'] += 1
+        score = float(np.max(distances / np.asarray(templates.thresholds)[strokes]))
+        if score < best_score:
+            best_sign, best_distance, best_score = sign, float(np.sum(distances)), score
+
+    return best_sign, best_distance, statistics
@@ -0,0 +1,382 @@
+"""
+Functions to match user curves against a stack of templates. Candidates are pruned with lower bounds of the Dynamic
+Time Warping distance before the exact distance is calculated: LB_Kim compares the first and the last points, and
+LB_Keogh compares every point with the envelope of the template, i.e. the bounding box of the template points inside
+the Sakoe-Chiba band. The envelopes are stored next to the template files.
+"""
+import itertools
+import os
+from collections import Counter
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional, Sequence, Union
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.optimize import linear_sum_assignment
+from recognition import DTW_BAND, CURVE_METRICS, COARSE_MARGIN, curve_pyramid, compare_sequences_coarse_to_fine, \
+    downsample_curve, dtw_distance_batch, current_sign_metric
+from template_store import STORE_RELOAD_CALLBACKS, current_template_store
+
+# suffix of the envelope file that is stored next to each template file
+ENVELOPE_SUFFIX = '_envelope.npy'
+
+# number of candidate templates per stage, summed over all matches since the server started
+MATCH_STATISTICS: Counter = Counter()
+
+# largest number of curves whose assignments to templates are all enumerated; more curves are assigned with the
+# Hungarian algorithm
+MAX_BRUTE_FORCE_CURVES = 4
+
+
+def template_envelope(template: np.ndarray, band: int = DTW_BAND) -> np.ndarray:
+    """
+    Calculates the envelope of a template: for every point, the minimum and maximum x and y coordinates of the
+    template points that a warping path within the Sakoe-Chiba band can match with it.
+
+    :param template: The template curve as numpy array of shape (m, 2).
+    :param band: The radius of the Sakoe-Chiba band in points.
+    :return: A numpy array of shape (2, m, 2) with the lower and the upper envelope.
+    """
+    template = np.asarray(template, dtype=float)
+    windows_lower = sliding_window_view(np.pad(template, ((band, band), (0, 0)), constant_values=np.inf),
+                                       2 * band + 1, axis=0)
+    windows_upper = sliding_window_view(np.pad(template, ((band, band), (0, 0)), constant_values=-np.inf),
+                                        2 * band + 1, axis=0)
+    return np.stack([windows_lower.min(axis=-1), windows_upper.max(axis=-1)])
+
+
+def lower_bound_kim(curve: np.ndarray, templates: np.ndarray) -> np.ndarray:
+    """
+    Calculates the LB_Kim lower bound of the Dynamic Time Warping distance between a curve and every template: every
+    warping path starts with the first and ends with the last points of both sequences.
+
+    :param curve: The user curve as numpy array of shape (n, 2).
+    :param templates: The templates as numpy array of shape (t, m, 2).
+    :return: A numpy array of shape (t,) with the lower bound for every template.
+    """
+    first = np.linalg.norm(templates[:, 0] - curve[0], axis=1)
+    last = np.linalg.norm(templates[:, -1] - curve[-1], axis=1)
+    # a sequence of a single point matches its first and last point in the same cell
+    if len(curve) == 1 or templates.shape[1] == 1:
+        return np.maximum(first, last)
+    return first + last
+
+
+def lower_bound_keogh(curve: np.ndarray, envelopes: np.ndarray) -> np.ndarray:
+    """
+    Calculates the LB_Keogh lower bound of the Dynamic Time Warping distance between a curve and every template: every
+    point of the curve is matched with at least one template point inside the band, which is at least as far away as
+    the envelope of the template at that point. The curve and the templates need to have the same number of points.
+
+    :param curve: The user curve as numpy array of shape (n, 2).
+    :param envelopes: The envelopes of the templates as numpy array of shape (t, 2, n, 2).
+    :return: A numpy array of shape (t,) with the lower bound for every template.
+    """
+    below = np.maximum(envelopes[:, 0] - curve, 0)
+    above = np.maximum(curve - envelopes[:, 1], 0)
+    return np.linalg.norm(below + above, axis=2).sum(axis=1)
+
+
+def nearest_template(curve: np.ndarray, templates: np.ndarray, envelopes: Optional[np.ndarray] = None,
+                     threshold: float = np.inf, pyramids: Optional[Dict[int, np.ndarray]] = None,
+                     metric: str = 'dtw') -> Tuple[int, float, Dict[str, int]]:
+    """
+    Finds the template with the smallest Dynamic Time Warping distance to the curve, if it is within the threshold.
+    Templates whose LB_Kim or LB_Keogh bound exceeds the threshold are pruned. The remaining templates are compared in
+    the order of their LB_Keogh bound, and each comparison is rejected on the coarse curves or abandoned once it
+    exceeds the best distance so far. The lower bounds only hold for Dynamic Time Warping, so with any other metric
+    every template is compared.
+
+    :param curve: The user curve as numpy array of shape (n, 2).
+    :param templates: The templates as numpy array of shape (t, m, 2).
+    :param envelopes: The envelopes of the templates as numpy array of shape (t, 2, m, 2). Calculated if omitted.
+    :param threshold: The threshold of the sign.
+    :param pyramids: The pyramids of the templates, mapping the number of points to an array of shape (t, n, 2).
+    Built on the fly if omitted.
+    :param metric: The name of the metric in CURVE_METRICS.
+    :return: The index of the nearest template, or -1 if no template is within the threshold, its distance, and the
+    number of candidates, templates pruned by each bound, and distance calculations.
+    """
+    curve = np.asarray(curve, dtype=float)
+    statistics = {'candidates': len(templates), 'pruned_kim': 0, 'pruned_keogh': 0, 'dtw': 0}
+
+    if metric != 'dtw':
+        distances = np.array([CURVE_METRICS[metric](curve, template, threshold) for template in templates])
+        statistics[metric] = len(templates)
+        MATCH_STATISTICS.update(statistics)
+        best_index = int(np.argmin(distances))
+        if distances[best_index] > threshold:
+            return -1, np.inf, statistics
+        return best_index, float(distances[best_index]), statistics
+
+    # prunes templates whose first or last point is too far away
+    bounds = lower_bound_kim(curve, templates)
+    candidates = np.flatnonzero(bounds <= threshold)
+    statistics['pruned_kim'] = len(templates) - len(candidates)
+
+    # tightens the bound with the envelopes if the curve has the length of the templates
+    if len(candidates) and len(curve) == templates.shape[1]:
+        if envelopes is None:
+            envelopes = np.stack([template_envelope(template) for template in templates[candidates]])
+        else:
+            envelopes = envelopes[candidates]
+        bounds[candidates] = np.maximum(bounds[candidates], lower_bound_keogh(curve, envelopes))
+
+    best_index, best_distance = -1, threshold
+    for candidate in candidates[np.argsort(bounds[candidates], kind='stable')]:
+        # candidates are sorted by their bound, so all remaining ones are pruned as well
+        if bounds[candidate] > best_distance:
+            break
+        statistics['dtw'] += 1
+        # clear rejections are decided on the coarse curves, accepted templates are ranked by their exact distance
+        pyramid = None if pyramids is None else {num_points: level[candidate] for num_points, level in pyramids.items()}
+        distance = compare_sequences_coarse_to_fine(curve, templates[candidate], best_distance, pyramid,
+                                                    accept_coarse=False)
+        if distance <= best_distance:
+            best_index, best_distance = int(candidate), distance
+
+    statistics['pruned_keogh'] = len(candidates) - statistics['dtw']
+    MATCH_STATISTICS.update(statistics)
+    return best_index, (best_distance if best_index >= 0 else np.inf), statistics
+
+
+def match_curves_to_templates(curves: Sequence[np.ndarray], templates: np.ndarray,
+                              envelopes: Optional[np.ndarray] = None, threshold: float = np.inf,
+                              pyramids: Optional[Dict[int, np.ndarray]] = None, metric: str = 'dtw') \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assigns every user curve of a gesture to its nearest template.
+
+    :param curves: The user curves, each a numpy array of shape (n, 2).
+    :param templates: The templates as numpy array of shape (t, m, 2).
+    :param envelopes: The envelopes of the templates as numpy array of shape (t, 2, m, 2). Calculated if omitted.
+    :param threshold: The threshold of the sign.
+    :param pyramids: The pyramids of the templates, mapping the number of points to an array of shape (t, n, 2).
+    :param metric: The name of the metric in CURVE_METRICS.
+    :return: The index of the nearest template of every curve, -1 if none is within the threshold, and the
+    distances, infinity if no template is within the threshold.
+    """
+    matches = [nearest_template(curve, templates, envelopes, threshold, pyramids, metric)[:2] for curve in curves]
+    return np.array([index for index, _ in matches]), np.array([distance for _, distance in matches])
+
+
+def curve_cost_matrix(curves: Sequence[np.ndarray], templates: np.ndarray, thresholds: Union[float, Sequence[float]],
+                      envelopes: Optional[np.ndarray] = None, metric: str = 'dtw',
+                      pyramids: Optional[Dict[int, np.ndarray]] = None, accept_coarse: bool = True) -> np.ndarray:
+    """
+    Compares every user curve with every template. With Dynamic Time Warping, the pairs whose LB_Kim or LB_Keogh
+    bound exceeds the threshold of the template are pruned, the remaining pairs are compared in one batch on each
+    level of the template pyramids, and pairs whose coarse distance is clearly below or above the threshold are
+    decided before the next level, as in compare_sequences_coarse_to_fine.
+
+    :param curves: The user curves, each a numpy array of shape (n, 2).
+    :param templates: The templates as numpy array of shape (t, n, 2).
+    :param thresholds: The threshold of every template, or one threshold for all.
+    :param envelopes: The envelopes of the templates as numpy array of shape (t, 2, n, 2). Only LB_Kim is used if
+    omitted.
+    :param metric: The name of the metric in CURVE_METRICS.
+    :param pyramids: The pyramids of the templates, mapping the number of points to an array of shape (t, n, 2). Only
+    the full-resolution curves are compared if omitted.
+    :param accept_coarse: Whether coarse estimates clearly below the threshold are kept as distances. Otherwise only
+    rejections are decided coarsely.
+    :return: A numpy array of shape (k, t) with the distance of every curve to every template, infinity if it exceeds
+    the threshold of the template.
+    """
+    curves = np.asarray(curves, dtype=float)
+    thresholds = np.broadcast_to(np.asarray(thresholds, dtype=float), (len(templates),))
+    costs = np.full((len(curves), len(templates)), np.inf)
+    MATCH_STATISTICS['candidates'] += costs.size
+
+    if metric != 'dtw':
+        for row, column in np.ndindex(costs.shape):
+            costs[row, column] = CURVE_METRICS[metric](curves[row], templates[column], thresholds[column])
+        MATCH_STATISTICS[metric] += costs.size
+        return costs
+
+    bounds = np.stack([lower_bound_kim(curve, templates) for curve in curves])
+    if envelopes is not None and curves.shape[1] == templates.shape[1]:
+        bounds = np.maximum(bounds, np.stack([lower_bound_keogh(curve, envelopes) for curve in curves]))
+    rows, columns = np.nonzero(bounds <= thresholds)
+    MATCH_STATISTICS['pruned_bounds'] += costs.size - len(rows)
+
+    # rejects pairs on the coarse curves; the distance sums the distances of matched points, hence it is scaled
+    full_resolution = templates.shape[1]
+    for num_points in sorted(pyramids or {}):
+        if num_points >= full_resolution or not len(rows):
+            break
+        scale = full_resolution / num_points
+        coarse_curves = np.stack([downsample_curve(curve, num_points) for curve in curves])
+        estimates = dtw_distance_batch(coarse_curves[rows], pyramids[num_points][columns],
+                                       band=max(1, DTW_BAND * num_points // full_resolution),
+                                       thresholds=thresholds[columns] * (1 + COARSE_MARGIN) / scale) * scale
+        rejected = estimates > thresholds[columns] * (1 + COARSE_MARGIN)
+        accepted = ~rejected & (estimates < thresholds[columns] * (1 - COARSE_MARGIN)) if accept_coarse else False
+        costs[rows[accepted], columns[accepted]] = estimates[accepted]
+        MATCH_STATISTICS[f'rejected_{num_points}'] += int(np.sum(rejected))
+        MATCH_STATISTICS[f'accepted_{num_points}'] += int(np.sum(accepted))
+        kept = ~rejected & ~accepted
+        rows, columns = rows[kept], columns[kept]
+
+    costs[rows, columns] = dtw_distance_batch(curves[rows], templates[columns], thresholds=thresholds[columns])
+    MATCH_STATISTICS['dtw'] += len(rows)
+    return costs
+
+
+def assign_curves(costs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assigns every user curve to a different template such that the sum of their distances is minimal. Up to
+    MAX_BRUTE_FORCE_CURVES curves, all assignments are enumerated; otherwise the Hungarian algorithm is used.
+
+    :param costs: The distances of every curve to every template as numpy array of shape (k, t), infinity for pairs
+    beyond the threshold.
+    :return: The template of every curve, -1 if the curve cannot be assigned within the thresholds, and the
+    distances, infinity if the curve cannot be assigned.
+    """
+    num_curves, num_templates = costs.shape
+    # pairs beyond the threshold cost more than any assignment within the thresholds, so that as many curves as
+    # possible are assigned
+    finite = np.where(np.isinf(costs), np.max(costs[np.isfinite(costs)], initial=0) * num_curves + 1, costs)
+    if num_curves <= min(MAX_BRUTE_FORCE_CURVES, num_templates):
+        permutations = np.array(list(itertools.permutations(range(num_templates), num_curves))).reshape(-1, num_curves)
+        assignments = permutations[int(np.argmin(finite[np.arange(num_curves), permutations].sum(axis=1)))]
+    else:
+        rows, columns = linear_sum_assignment(finite)
+        assignments = np.full(num_curves, -1)
+        assignments[rows] = columns
+
+    distances = np.array([costs[row, column] if column >= 0 else np.inf for row, column in enumerate(assignments)])
+    return np.where(np.isinf(distances), -1, assignments), distances
+
+
+def match_curves_optimally(curves: Sequence[np.ndarray], templates: np.ndarray,
+                           thresholds: Union[float, Sequence[float]], envelopes: Optional[np.ndarray] = None,
+                           metric: str = 'dtw', pyramids: Optional[Dict[int, np.ndarray]] = None) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assigns the user curves of a gesture to different templates with the smallest total distance, see
+    curve_cost_matrix and assign_curves. Unlike match_curves_to_templates, two curves never share a template.
+
+    :param curves: The user curves, each a numpy array of shape (n, 2).
+    :param templates: The templates as numpy array of shape (t, n, 2).
+    :param thresholds: The threshold of every template, or one threshold for all.
+    :param envelopes: The envelopes of the templates as numpy array of shape (t, 2, n, 2).
+    :param metric: The name of the metric in CURVE_METRICS.
+    :param pyramids: The pyramids of the templates, mapping the number of points to an array of shape (t, n, 2).
+    :return: The template of every curve, -1 if the curve cannot be assigned within the thresholds, and the
+    distances, infinity if the curve cannot be assigned.
+    """
+    return assign_curves(curve_cost_matrix(curves, templates, thresholds, envelopes, metric, pyramids))
+
+
+def save_template_envelope(template_path: str, band: int = DTW_BAND):
+    """
+    Calculates the envelope of a template file and stores it next to the template. Needs to be executed again
+    whenever the template is refitted or DTW_BAND changes.
+
+    :param template_path: The path to the .npy file of the template.
+    :param band: The radius of the Sakoe-Chiba band in points.
+    """
+    np.save(template_path[:-len('.npy')] + ENVELOPE_SUFFIX, template_envelope(np.load(template_path), band))
+
+
+@lru_cache(maxsize=None)
+def load_template(template_path: str) -> Tuple[np.ndarray, np.ndarray, Dict[int, np.ndarray]]:
+    """
+    Loads a template with its stored envelope and builds its pyramid of coarse curves, from the template store if it
+    contains the template and otherwise from the template file. Each template is loaded once per version of the store;
+    the arrays are shared between all callers and therefore read-only. A missing envelope is calculated.
+
+    :param template_path: The path to the .npy file of the template.
+    :return: The template of shape (m, 2), its envelope of shape (2, m, 2) and its pyramid.
+    """
+    envelope_path = template_path[:-len('.npy')] + ENVELOPE_SUFFIX
+
+    # takes the arrays from the memory-mapped template store if it contains the template
+    store = current_template_store()
+    if store is not None and store.key(template_path) in store:
+        template = store.array(store.key(template_path))
+        envelope = store.array(store.key(envelope_path))
+    else:
+        template = np.load(template_path)
+        envelope = np.load(envelope_path) if os.path.exists(envelope_path) else None
+    if envelope is None:
+        envelope = template_envelope(template)
+    pyramid = curve_pyramid(template)
+    for array in [template, envelope, *pyramid.values()]:
+        array.setflags(write=False)
+    return template, envelope, pyramid
+
+
+@lru_cache(maxsize=None)
+def _load_template_stack(template_paths: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray, Dict[int, np.ndarray]]:
+    # stacks the templates, envelopes and pyramid levels of several template files once
+    loaded = [load_template(template_path) for template_path in template_paths]
+    templates = np.stack([template for template, _, _ in loaded])
+    envelopes = np.stack([envelope for _, envelope, _ in loaded])
+    pyramids = {num_points: np.stack([pyramid[num_points] for _, _, pyramid in loaded])
+                for num_points in loaded[0][2]}
+    for array in [templates, envelopes, *pyramids.values()]:
+        array.setflags(write=False)
+    return templates, envelopes, pyramids
+
+
+# loads the templates again from a new version of the template store
+STORE_RELOAD_CALLBACKS.extend([load_template.cache_clear, _load_template_stack.cache_clear])
+
+
+def load_templates(directory: str, filenames: List[str]) -> Tuple[np.ndarray, np.ndarray, Dict[int, np.ndarray]]:
+    """
+    Loads templates of the same length together with their stored envelopes and pyramids, see load_template.
+
+    :param directory: The directory of the template files.
+    :param filenames: The names of the .npy files of the templates.
+    :return: The templates as numpy array of shape (t, m, 2), their envelopes of shape (t, 2, m, 2) and their
+    pyramids, mapping the number of points to an array of shape (t, n, 2).
+    """
+    return _load_template_stack(tuple(os.path.join(directory, filename) for filename in filenames))
+
+
+class SignTemplates:
+    """
+    The templates that a recogniser of a sign compares with, stacked together with their envelopes and pyramids, and
+    the metric and threshold of every template, loaded once when the recogniser is built.
+    """
+    __slots__ = ('templates', 'envelopes', 'pyramids', 'metric', 'thresholds')
+
+    def __init__(self, templates: np.ndarray, envelopes: np.ndarray, pyramids: Dict[int, np.ndarray], metric: str,
+                 thresholds: List[float]):
+        """
+        :param templates: The templates as numpy array of shape (t, m, 2).
+        :param envelopes: Their envelopes as numpy array of shape (t, 2, m, 2).
+        :param pyramids: Their pyramids, mapping the number of points to an array of shape (t, n, 2).
+        :param metric: The name of the metric of the recogniser, see recognition.CURVE_METRICS.
+        :param thresholds: The threshold of every template on the scale of the metric.
+        """
+        self.templates = templates
+        self.envelopes = envelopes
+        self.pyramids = pyramids
+        self.metric = metric
+        self.thresholds = thresholds
+
+    def pyramid(self, index: int) -> Dict[int, np.ndarray]:
+        """
+        Returns the pyramid of one template.
+
+        :param index: The index of the template.
+        :return: The pyramid, mapping the number of points to an array of shape (n, 2).
+        """
+        return {num_points: level[index] for num_points, level in self.pyramids.items()}
+
+
+def load_sign_templates(sign: str, template_paths: List[str], dtw_thresholds: List[float]) -> SignTemplates:
+    """
+    Loads the templates of a recogniser of a sign, see load_templates, with the metric and thresholds of the
+    recogniser, see recognition.current_sign_metric.
+
+    :param sign: A string, indicating which sign is recognised.
+    :param template_paths: The path of every template file of the recogniser.
+    :param dtw_thresholds: The Dynamic Time Warping threshold of every template of the recogniser.
+    :return: The templates with their metric and thresholds.
+    """
+    templates, envelopes, pyramids = _load_template_stack(tuple(template_paths))
+    metric, thresholds = current_sign_metric(sign, template_paths, dtw_thresholds)
+    return SignTemplates(templates, envelopes, pyramids, metric, thresholds)
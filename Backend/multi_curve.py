@@ -0,0 +1,81 @@
+"""
+The recogniser shared by all signs that are drawn as several curves, e.g. with two or three fingers at once. Each sign
+is described by its entry in templates.MULTI_CURVE_SIGNS; the gesture is split into that many curves, each curve is
+fitted with a Bézier curve of the sign's degree, and the curves are assigned to different templates with the smallest
+total distance, see matching.match_curves_optimally.
+"""
+import os
+from typing import List, Optional
+import numpy as np
+from features import features_valid
+from matching import SignTemplates, load_sign_templates, match_curves_optimally
+from parameterisation import fit_bezier_batch, evaluate_bezier
+from point_cloud import is_sign_point_cloud, sign_engine
+from preprocessing import preprocess_for_sign, preprocess_touches_for_sign
+from recognition import timestamp_duration_valid
+from segmentation import segment_curves
+from templates import PARAMETRIC_DIRECTORY, MULTI_CURVE_SIGNS
+
+def is_multi_curve_sign(sign: str, timestamps: List[float], locations: List[List[float]],
+                        touch_ids: Optional[np.ndarray] = None, duration: Optional[float] = None,
+                        templates: Optional[SignTemplates] = None) -> bool:
+    """
+    Checks whether a gesture matches the templates of a multi-curve sign. Every template needs to be matched by a
+    different user curve within its threshold.
+
+    :param sign: A string, indicating which sign is parsed; a key of MULTI_CURVE_SIGNS.
+    :param timestamps: A list of timestamps.
+    :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param touch_ids: Optional touch identifier of every point, which separates the fingers.
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param templates: The templates with their metric and thresholds, as preloaded by its recogniser; loaded if
+    omitted.
+    :return: True if the gesture matches the templates, False otherwise.
+    """
+    spec = MULTI_CURVE_SIGNS[sign]
+
+    # checks if time frame is valid
+    if not timestamp_duration_valid(sign, timestamps, duration):
+        print("Duration too long")
+        return False
+
+    # rejects gestures whose geometric features lie outside of those recorded for the sign
+    if not features_valid(sign, timestamps, locations):
+        return False
+
+    # compares the point clouds instead of the Bézier curves if selected for the sign
+    if sign_engine(sign) == 'point_cloud':
+        return is_sign_point_cloud(sign, timestamps, locations)
+
+    # removes duplicate and stray touch points as configured for the sign
+    if touch_ids is None:
+        timestamps, locations = preprocess_for_sign(sign, timestamps, locations)
+    else:
+        timestamps, locations, touch_ids = preprocess_touches_for_sign(sign, timestamps, locations, touch_ids)
+
+    try:
+        # splits the touch locations into the curves of the sign
+        curves = segment_curves(sign, timestamps, locations, touch_ids)
+    except ValueError as error:
+        print(f"ValueError: {error}")
+        return False
+    if len(curves) != spec['num_curves'] or any(len(curve) < 2 for curve in curves):
+        print("Curve is empty")
+        return False
+
+    # fits all curves at once
+    user_curves = evaluate_bezier(fit_bezier_batch(curves, degree=spec['degree']))
+
+    # assigns the user curves to different templates; pairs whose lower bound exceeds the threshold are pruned
+    if templates is None:
+        templates = load_sign_templates(sign, [os.path.join(PARAMETRIC_DIRECTORY, path) for path in spec['templates']],
+                                        spec['thresholds'])
+    assignments, distances = match_curves_optimally(user_curves, templates.templates, templates.thresholds,
+                                                    templates.envelopes, templates.metric, templates.pyramids)
+
+    for index, distance in enumerate(distances):
+        # prints the distance of every curve to its template
+        print(f"distance{index + 1}_template: {distance}")
+
+    # each template needs to be matched by a different curve
+    return bool(np.all(assignments >= 0))
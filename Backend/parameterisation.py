@@ -2,9 +2,395 @@
 Functions to fit Bezier curves.
 """
 
-from typing import List, Tuple
+import math
+from functools import lru_cache
+from typing import List, Tuple, Optional, Sequence
 import numpy as np
-from scipy.optimize import minimize
+
+# relative cut-off for singular values when solving normal equations; squaring the basis squares its condition, so
+# directions that are unconstrained by the touch locations only vanish up to round-off
+NORMAL_EQUATIONS_RCOND = 1e-10
+# number of touch points whose normal equations are summed at once when fitting strokes with individual parameters
+FIT_CHUNK_POINTS = 1 << 16
+
+""" ***************************************** Least-squares Bezier fitting ***************************************** """
+
+
+def bernstein_basis(degree: int, t: np.ndarray) -> np.ndarray:
+    """
+    Evaluates all Bernstein basis polynomials of the given degree at the parameter values t.
+
+    :param degree: The degree of the Bézier curve.
+    :param t: The parameter values, ranging from 0 to 1. It is a numpy array.
+    :return: A numpy array of shape (len(t), degree + 1), where column k holds the k-th basis polynomial.
+    """
+    t = np.asarray(t, dtype=float)
+
+    # powers t^k and (1 - t)^(degree - k) by repeated multiplication, which is cheaper than element-wise pow
+    t_powers = [np.ones_like(t)]
+    s_powers = [np.ones_like(t)]
+    for _ in range(degree):
+        t_powers.append(t_powers[-1] * t)
+        s_powers.append(s_powers[-1] * (1 - t))
+
+    return np.stack([math.comb(degree, k) * t_powers[k] * s_powers[degree - k] for k in range(degree + 1)], axis=-1)
+
+
+@lru_cache(maxsize=None)
+def bezier_fitting_operator(degree: int, num_points: int) -> np.ndarray:
+    """
+    Precomputes the linear operator that maps equally spaced touch locations onto the least-squares control points of
+    a Bézier curve of the given degree whose endpoints are fixed to the first and last location.
+
+    The inner control points are expressed as offsets from the straight line between both endpoints, so that the
+    minimum-norm solution of an under-determined fit (fewer points than control points) is a straight line.
+    The operator is cached per (degree, num_points), hence one fit amounts to a single matrix multiplication.
+
+    :param degree: The degree of the Bézier curve.
+    :param num_points: The number of touch locations that are fitted.
+    :return: A read-only numpy array of shape (degree + 1, num_points).
+    """
+    # equally spaced parameter values, as used by all recognisers
+    t = np.linspace(0, 1, num_points)
+    basis = bernstein_basis(degree, t)
+
+    # selects the first and last touch location as endpoints
+    endpoints = np.zeros((2, num_points))
+    endpoints[0, 0] = 1
+    endpoints[1, -1] = 1
+
+    # straight line between both endpoints, sampled at t and at the inner control point positions
+    line_samples = np.stack([1 - t, t], axis=1)
+    s = np.arange(1, degree) / degree
+    line_control = np.stack([1 - s, s], axis=1)
+
+    # least-squares solution for the offsets of the inner control points from the straight line
+    inner_pinv = np.linalg.pinv(basis[:, 1:-1])
+    inner = line_control @ endpoints + inner_pinv - (inner_pinv @ line_samples) @ endpoints
+
+    operator = np.vstack([endpoints[:1], inner, endpoints[1:]])
+    operator.setflags(write=False)
+    return operator
+
+
+def fit_bezier_control_points(coordinates: List[List[float]], degree: int) -> np.ndarray:
+    """
+    Fits a Bézier curve of any degree to the given coordinates by linear least squares. The endpoints are fixed to the
+    first and last coordinate, and the coordinates are assumed to be equally spaced in the parameter t.
+
+    :param coordinates: A list of touch locations, where each location is a list of x and y coordinates.
+    :param degree: The degree of the Bézier curve.
+    :return: The degree + 1 control points of the Bézier curve as a numpy array.
+    """
+    coordinates_np = np.asarray(coordinates, dtype=float)
+    return bezier_fitting_operator(degree, len(coordinates_np)) @ coordinates_np
+
+
+def normal_equation_sums(degree: int, t: np.ndarray, coordinates: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Sums the per-point products of the normal equations of the inner control points per stroke, for concatenated
+    strokes with individual parameter values.
+
+    :param degree: The degree of the Bézier curves.
+    :param t: The concatenated parameter values of the strokes.
+    :param coordinates: The concatenated touch locations of the strokes, as numpy array of shape (n, 2).
+    :param offsets: The index of the first point of each stroke.
+    :return: A numpy array with one row per stroke, holding the sums of the inner basis B, of B * t, B * x and B * y,
+    and of the upper triangle of B * B^T.
+    """
+    # the products are stored as rows, so that the reduction runs along contiguous memory
+    inner_basis = np.ascontiguousarray(bernstein_basis(degree, t)[:, 1:-1].T)
+    num_inner = degree - 1
+    rows, columns = np.triu_indices(num_inner)
+    products = np.empty((4 * num_inner + len(rows), len(t)))
+    products[:num_inner] = inner_basis
+    np.multiply(inner_basis, t, out=products[num_inner:2 * num_inner])
+    np.multiply(inner_basis, coordinates[:, 0], out=products[2 * num_inner:3 * num_inner])
+    np.multiply(inner_basis, coordinates[:, 1], out=products[3 * num_inner:4 * num_inner])
+    np.multiply(inner_basis[rows], inner_basis[columns], out=products[4 * num_inner:])
+    return np.add.reduceat(products, offsets, axis=1).T
+
+
+def fit_bezier_batch(strokes: Sequence[List[List[float]]], degree: int,
+                     parameters: Optional[Sequence[np.ndarray]] = None) -> np.ndarray:
+    """
+    Fits one Bézier curve of the given degree to each of many strokes in one vectorised pass. The strokes may have
+    different lengths and no optimiser is run per stroke. As for the single fit, the endpoints are fixed to the first
+    and last location of each stroke.
+
+    :param strokes: A sequence of k strokes, where each stroke is a list of x and y coordinates.
+    :param degree: The degree of the Bézier curves.
+    :param parameters: Optional per-stroke parameter vectors between 0 and 1 (e.g. normalised arc length), which are
+    solved through batched normal equations. If omitted, the locations of each stroke are assumed to be equally
+    spaced in t and the cached fitting operators are used.
+    :return: The control points of all strokes as a numpy array of shape (k, degree + 1, 2).
+    :raises ValueError: If a stroke has fewer than two points or its parameter vector differs in length.
+    """
+    arrays = [np.asarray(stroke, dtype=float).reshape(-1, 2) for stroke in strokes]
+    if not arrays:
+        return np.zeros((0, degree + 1, 2))
+    lengths = np.array([len(array) for array in arrays])
+    if lengths.min() < 2:
+        raise ValueError("Every stroke needs at least two points to be fitted")
+
+    # equally spaced strokes: strokes of equal length share one cached operator, so each group of lengths costs a
+    # single matrix product
+    if parameters is None:
+        control_points = np.zeros((len(arrays), degree + 1, 2))
+        for length in np.unique(lengths):
+            group = np.flatnonzero(lengths == length)
+            stacked = np.stack([arrays[i] for i in group])
+            control_points[group] = bezier_fitting_operator(degree, int(length)) @ stacked
+        return control_points
+
+    # strokes with individual parameter vectors are concatenated and their normal equations are summed per stroke
+    t = np.concatenate([np.asarray(parameter, dtype=float).ravel() for parameter in parameters])
+    if len(parameters) != len(arrays) or any(len(parameter) != length for parameter, length in zip(parameters,
+                                                                                                    lengths)):
+        raise ValueError("Every stroke needs a parameter vector of its own length")
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    coordinates = np.concatenate(arrays)
+    first = coordinates[offsets]
+    last = coordinates[offsets + lengths - 1]
+
+    # the per-stroke sums of the normal equations are accumulated over chunks of whole strokes, which keeps the
+    # temporary arrays small enough to be reused instead of allocating memory for all points at once
+    num_inner = degree - 1
+    sums = np.empty((len(arrays), 4 * num_inner + num_inner * (num_inner + 1) // 2))
+    ends = offsets + lengths
+    start = 0
+    while start < len(arrays):
+        stop = max(start + 1, int(np.searchsorted(ends, offsets[start] + FIT_CHUNK_POINTS, side='right')))
+        points = slice(offsets[start], ends[stop - 1])
+        sums[start:stop] = normal_equation_sums(degree, t[points], coordinates[points], offsets[start:stop] -
+                                                offsets[start])
+        start = stop
+    basis_sums, weighted_sums = sums[:, :num_inner], sums[:, num_inner:2 * num_inner]
+    location_sums = np.stack([sums[:, 2 * num_inner:3 * num_inner], sums[:, 3 * num_inner:4 * num_inner]], axis=-1)
+    rows, columns = np.triu_indices(num_inner)
+
+    # normal equations for the offsets of the inner control points from the straight line between the endpoints,
+    # whose residual is x - (1 - t) * first - t * last
+    normal_matrix = np.zeros((len(arrays), num_inner, num_inner))
+    normal_matrix[:, rows, columns] = sums[:, 4 * num_inner:]
+    normal_matrix[:, columns, rows] = sums[:, 4 * num_inner:]
+    normal_rhs = (location_sums - (basis_sums - weighted_sums)[:, :, None] * first[:, None]
+                  - weighted_sums[:, :, None] * last[:, None])
+    line_offsets = np.linalg.pinv(normal_matrix, rcond=NORMAL_EQUATIONS_RCOND, hermitian=True) @ normal_rhs
+
+    # inner control points are the evenly spaced points on the straight line plus the offsets
+    s = (np.arange(1, degree) / degree)[None, :, None]
+    inner = (1 - s) * first[:, None] + s * last[:, None] + line_offsets
+
+    return np.concatenate([first[:, None], inner, last[:, None]], axis=1)
+
+
+class IncrementalBezierFitter:
+    """
+    Fits a Bézier curve of the given degree while touch locations arrive one at a time or in chunks. The fitter keeps
+    the power sums of the point indices and of the index-weighted locations, from which the least-squares normal
+    equations over equally spaced parameter values are rebuilt for any number of points. Adding a point therefore
+    costs O(degree) and querying the control points O(degree²) plus a solve of the (degree - 1) inner control points,
+    independent of the length of the gesture. The result equals fit_bezier_control_points on all points seen so far.
+    """
+
+    def __init__(self, degree: int):
+        """
+        :param degree: The degree of the Bézier curve, e.g. 1 for linear, 3 for cubic and 4 for quartic curves.
+        """
+        self.degree = degree
+        self.count = 0
+        self.first = None
+        self.last = None
+        # sums of i^m over the point indices i for m = 0..2 * degree + 1
+        self._index_sums = np.zeros(2 * degree + 2)
+        # sums of i^m * location_i for m = 0..degree
+        self._location_sums = np.zeros((degree + 1, 2))
+        # monomial coefficients of the Bernstein polynomials: B_k(t) = sum_m coefficients[k, m] * t^m
+        self._coefficients = np.array([[math.comb(degree, k) * math.comb(degree - k, m - k) * (-1) ** (m - k)
+                                        if m >= k else 0.0 for m in range(degree + 1)] for k in range(degree + 1)])
+
+    def add_point(self, location: List[float]):
+        """
+        Adds a single touch location to the fit.
+
+        :param location: The x and y coordinates of the touch location.
+        """
+        self.add_points([location])
+
+    def add_points(self, locations: List[List[float]]):
+        """
+        Adds a chunk of touch locations to the fit.
+
+        :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+        """
+        locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+        if len(locations) == 0:
+            return
+
+        # point indices of the new locations and their powers
+        indices = np.arange(self.count, self.count + len(locations), dtype=float)
+        powers = indices[:, None] ** np.arange(2 * self.degree + 2)
+
+        # updates the running statistics
+        self._index_sums += powers.sum(axis=0)
+        self._location_sums += powers[:, :self.degree + 1].T @ locations
+        if self.first is None:
+            self.first = locations[0]
+        self.last = locations[-1]
+        self.count += len(locations)
+
+    def control_points(self) -> np.ndarray:
+        """
+        Returns the current best control points of the curve given all touch locations added so far.
+
+        :return: The degree + 1 control points of the Bézier curve as a numpy array.
+        """
+        if self.count == 0:
+            raise ValueError("No touch locations added.")
+
+        # straight line between both endpoints; equals the fit if there are no inner control points to solve for
+        s = np.arange(self.degree + 1) / self.degree
+        line = (1 - s)[:, None] * self.first + s[:, None] * self.last
+        if self.count == 1 or self.degree < 2:
+            return line
+
+        # moments of the equally spaced parameter values t_i = i / (count - 1)
+        scale = (self.count - 1.0) ** -np.arange(2 * self.degree + 2)
+        moments = self._index_sums * scale
+        location_moments = self._location_sums * scale[:self.degree + 1, None]
+
+        # sums of B_j(t) * B_k(t), B_j(t), B_j(t) * t and B_j(t) * location over all points
+        order = np.arange(self.degree + 1)
+        gram = self._coefficients @ moments[order[:, None] + order] @ self._coefficients.T
+        basis_sums = self._coefficients @ moments[:self.degree + 1]
+        basis_t_sums = self._coefficients @ moments[1:self.degree + 2]
+        basis_location_sums = self._coefficients @ location_moments
+
+        # normal equations for the offsets of the inner control points from the straight line
+        rhs = basis_location_sums - np.outer(basis_sums - basis_t_sums, self.first) \
+            - np.outer(basis_t_sums, self.last)
+        offsets = np.linalg.pinv(gram[1:-1, 1:-1], rcond=NORMAL_EQUATIONS_RCOND, hermitian=True) @ rhs[1:-1]
+
+        control_points = line.copy()
+        control_points[1:-1] += offsets
+        return control_points
+
+
+""" ***************************************** Vectorised Bezier evaluation ***************************************** """
+
+
+@lru_cache(maxsize=None)
+def bernstein_matrix(degree: int, num_points: int) -> np.ndarray:
+    """
+    Returns the Bernstein basis of the given degree sampled at num_points equally spaced parameter values.
+    The matrix is memoized per (degree, num_points) and shared between all callers, hence it is read-only.
+
+    :param degree: The degree of the Bézier curve.
+    :param num_points: The number of equally spaced parameter values between 0 and 1.
+    :return: A read-only numpy array of shape (num_points, degree + 1).
+    """
+    basis = bernstein_basis(degree, np.linspace(0, 1, num_points))
+    basis.setflags(write=False)
+    return basis
+
+
+def evaluate_bezier(control_points: np.ndarray, num_points: int = 100) -> np.ndarray:
+    """
+    Samples one or several Bézier curves of any degree at num_points equally spaced parameter values through a single
+    matrix product with the cached Bernstein matrix.
+
+    :param control_points: The control points as an array of shape (degree + 1, 2), or a stack of curves of the same
+    degree with shape (k, degree + 1, 2).
+    :param num_points: The number of points to generate on each curve.
+    :return: The sampled curve(s) with shape (num_points, 2) or (k, num_points, 2).
+    """
+    control_points = np.asarray(control_points, dtype=float)
+    degree = control_points.shape[-2] - 1
+    return bernstein_matrix(degree, num_points) @ control_points
+
+
+def evaluate_bezier_derivative(control_points: np.ndarray, order: int = 1, num_points: int = 100) -> np.ndarray:
+    """
+    Samples the derivative of the given order of one or several Bézier curves. The derivative of a Bézier curve is
+    itself a Bézier curve of lower degree whose control points are scaled differences of the original ones.
+
+    :param control_points: The control points as an array of shape (degree + 1, 2) or (k, degree + 1, 2).
+    :param order: The order of the derivative, e.g. 1 for tangents and 2 for curvature.
+    :param num_points: The number of points to generate on each curve.
+    :return: The sampled derivative(s) with shape (num_points, 2) or (k, num_points, 2).
+    """
+    control_points = np.asarray(control_points, dtype=float)
+    degree = control_points.shape[-2] - 1
+
+    # derivatives of an order larger than the degree vanish
+    if order > degree:
+        return np.zeros(control_points.shape[:-2] + (num_points, control_points.shape[-1]))
+
+    # n! / (n - order)! * forward differences of the control points
+    scale = math.perm(degree, order)
+    derivative_control = scale * np.diff(control_points, n=order, axis=-2)
+
+    return evaluate_bezier(derivative_control, num_points)
+
+
+def bezier_curvature(control_points: np.ndarray, num_points: int = 100) -> np.ndarray:
+    """
+    Calculates the signed curvature of one or several Bézier curves at num_points equally spaced parameter values.
+
+    :param control_points: The control points as an array of shape (degree + 1, 2) or (k, degree + 1, 2).
+    :param num_points: The number of points at which the curvature is calculated.
+    :return: The curvature with shape (num_points,) or (k, num_points); zero where the tangent vanishes.
+    """
+    first = evaluate_bezier_derivative(control_points, 1, num_points)
+    second = evaluate_bezier_derivative(control_points, 2, num_points)
+
+    # k = (x'y'' - y'x'') / |B'|^3
+    cross = first[..., 0] * second[..., 1] - first[..., 1] * second[..., 0]
+    speed = np.linalg.norm(first, axis=-1) ** 3
+    return np.divide(cross, speed, out=np.zeros_like(cross), where=speed > 0)
+
+
+@lru_cache(maxsize=None)
+def bernstein_gram_matrix(degree: int) -> np.ndarray:
+    """
+    Returns the Gram matrix of the Bernstein basis, i.e. the integrals of the products of two basis polynomials over
+    the parameter interval [0, 1]. For the difference D of the control points of two curves of the same degree,
+    the squared L2 distance between the curves is the sum of G[i, j] * D[i] · D[j].
+
+    :param degree: The degree of the Bézier curves.
+    :return: A read-only numpy array of shape (degree + 1, degree + 1).
+    """
+    indices = np.arange(degree + 1)
+    binomials = np.array([math.comb(degree, i) for i in indices], dtype=float)
+    # the integral of b_i * b_j is C(n, i) * C(n, j) / ((2n + 1) * C(2n, i + j))
+    double_binomials = np.array([math.comb(2 * degree, k) for k in range(2 * degree + 1)], dtype=float)
+    gram = np.outer(binomials, binomials) / ((2 * degree + 1) * double_binomials[indices[:, None] + indices[None, :]])
+    gram.setflags(write=False)
+    return gram
+
+
+@lru_cache(maxsize=None)
+def degree_elevation_matrix(degree: int, target_degree: int) -> np.ndarray:
+    """
+    Returns the matrix that elevates the control points of a Bézier curve to a higher degree without changing the
+    curve. Each elevation by one replaces the control points by convex combinations of neighbouring ones.
+
+    :param degree: The degree of the Bézier curve.
+    :param target_degree: The degree after elevation, at least degree.
+    :return: A read-only numpy array of shape (target_degree + 1, degree + 1).
+    """
+    elevation = np.eye(degree + 1)
+    for current in range(degree, target_degree):
+        # Q_i = i / (n + 1) * P_(i-1) + (1 - i / (n + 1)) * P_i
+        weights = np.arange(current + 2) / (current + 1)
+        step = np.zeros((current + 2, current + 1))
+        step[np.arange(1, current + 2), np.arange(current + 1)] = weights[1:]
+        step[np.arange(current + 1), np.arange(current + 1)] += 1 - weights[:-1]
+        elevation = step @ elevation
+    elevation.setflags(write=False)
+    return elevation
+
 
 """ ******************************************* Linear Bezier function ******************************************* """
 
@@ -31,16 +417,10 @@ def generate_linear_bezier(locations: List[List[float]]) -> np.ndarray:
     """
 
     # control points: fits curves into linear Bézier curve
-    P0_curve = np.array(locations[0])
-    P1_curve = np.array(locations[-1])
-
-    # assigns parameter values
-    t = np.linspace(0, 1, num=100)
-
-    # calculates points for curve1
-    bezier = linear_bezier_curve(P0_curve, P1_curve, t=t)
+    control_points = np.array([locations[0], locations[-1]], dtype=float)
 
-    return bezier
+    # calculates 100 points on the curve
+    return evaluate_bezier(control_points)
 
 
 def generate_two_linear_beziers(curve1: List[List[float]], curve2: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
@@ -52,23 +432,11 @@ def generate_two_linear_beziers(curve1: List[List[float]], curve2: List[List[flo
     :return: Two numpy arrays, each representing a linear Bézier curve.
     """
 
-    # fits curves into linear Bézier curves
-    # control points for curve1
-    P0_curve1 = np.array(curve1[0])
-    P1_curve1 = np.array(curve1[-1])
-
-    # control points for curve2
-    P0_curve2 = np.array(curve2[0])
-    P1_curve2 = np.array(curve2[-1])
-
-    # assigns parameter values
-    t = np.linspace(0, 1, num=100)
+    # fits curves into linear Bézier curves; control points are the first and last location of each curve
+    control_points = np.array([[curve1[0], curve1[-1]], [curve2[0], curve2[-1]]], dtype=float)
 
-    # calculates points for curve1
-    bezier1 = linear_bezier_curve(P0_curve1, P1_curve1, t=t)
-
-    # calculates points for curve2
-    bezier2 = linear_bezier_curve(P0_curve2, P1_curve2, t=t)
+    # calculates points for both curves at once
+    bezier1, bezier2 = evaluate_bezier(control_points)
 
     return bezier1, bezier2
 
@@ -102,10 +470,9 @@ def error_function_quadratic(control: np.array, coordinates: np.ndarray, times:
     :param times: Array of equally spaced time instances.
     :return: The calculated error.
     """
-    p0, p2 = coordinates[0], coordinates[-1]
-    p1 = np.array(control)
-    estimate = np.array([calculate_bezier_point_quadratic(t, p0, p1, p2) for t in times])
-    return np.sum((coordinates - estimate).flatten() ** 2)
+    control_points = np.vstack([coordinates[0], np.reshape(control, (1, -1)), coordinates[-1]])
+    estimate = bernstein_basis(2, times) @ control_points
+    return np.sum((coordinates - estimate) ** 2)
 
 
 def fit_quadratic_bezier_curve(coordinates: List[List[float]]) -> np.ndarray:
@@ -115,16 +482,8 @@ def fit_quadratic_bezier_curve(coordinates: List[List[float]]) -> np.ndarray:
     :param coordinates: The coordinates through which the curve should pass.
     :return: The control points for the fitted Bézier curve as a np.ndarray.
     """
-    # converts coordinates to numpy array for processing
-    coordinates_np = np.array(coordinates)
-
-    times = np.linspace(0, 1, len(coordinates_np))
-    initial_guess = coordinates_np.mean(axis=0)
-    result = minimize(error_function_quadratic, initial_guess, args=(coordinates_np, times), method='BFGS')
-    control = result.x
-
-    # packages results as a np.ndarray
-    return np.array([coordinates_np[0], control, coordinates_np[-1]])
+    # solves the linear least-squares problem for the middle control point
+    return fit_bezier_control_points(coordinates, degree=2)
 
 
 """ ******************************************* Qubic Bezier function ******************************************* """
@@ -154,12 +513,11 @@ def error_function_cubic(control: np.array, coordinates: np.ndarray, times: np.n
     :param times: Array of equally spaced time instances.
     :return: The calculated error.
     """
-    # separates end and control points
-    p0, p3 = coordinates[0], coordinates[-1]
-    p1, p2 = control.reshape(2, -1)
+    # joins end and control points
+    control_points = np.vstack([coordinates[0], np.reshape(control, (2, -1)), coordinates[-1]])
 
-    # estimates the curve points by calculating Bézier points for all time values
-    estimate = np.array([calculate_cubic_bezier_point(t, p0, p1, p2, p3) for t in times])
+    # estimates the curve points for all time values at once
+    estimate = bernstein_basis(3, times) @ control_points
 
     # calculates and return the error as sum of squares of the difference between coordinates and estimate
     return np.sum((coordinates - estimate) ** 2)
@@ -172,23 +530,11 @@ def fit_cubic_bezier_curve(coordinates: List[List[float]]) -> np.ndarray:
     :param coordinates: A list of touch locations, where each location is a list of x and y coordinates.
     :return: The four control points of a cubic Bézier curve.
     """
-    # converts to numpy for numerical calculations
-    coordinates_np = np.array(coordinates)
-    # creates an array with equally spaced times between 0 and 1 to parametrize the Bézier curve
-    times = np.linspace(0, 1, len(coordinates_np))
-
-    # uses the mean of all coordinates as the initial guess for the control points of the Bézier curve
-    # the initial guess has four points (hence the repeat)
-    initial_guess = np.repeat(coordinates_np.mean(axis=0), 2)
+    # solves the linear least-squares problem for the two inner control points
+    return fit_bezier_control_points(coordinates, degree=3)
 
-    # uses the BFGS method to minimize the error function and returns the optimal control points that
-    # minimize the difference between the Bézier curve and the given coordinates.
-    result = minimize(error_function_cubic, initial_guess, args=(coordinates_np, times), method='BFGS')
-    control = result.x.reshape(2, -1)
-    return np.array([coordinates_np[0], control[0], control[1], coordinates_np[-1]])
 
-
-def return_cubic_bezier(locations: List[List[float]]) -> List[np.ndarray]:
+def return_cubic_bezier(locations: List[List[float]]) -> np.ndarray:
     """
     Calculates the control points for the curve, generates 100 evenly spaced points,
     and calculates the corresponding point on the Bézier curve for each 't' using the control points.
@@ -198,11 +544,8 @@ def return_cubic_bezier(locations: List[List[float]]) -> List[np.ndarray]:
     """
     # calculates the control points for the curve
     bezier_control_points = fit_cubic_bezier_curve(locations)
-    # generates 100 evenly spaced points, representing the parameter t
-    t_values = np.linspace(0, 1, 100)
-    # calculates the corresponding point on the Bézier curve for each 't' using the control points
-    curve_points = [calculate_cubic_bezier_point(t, *bezier_control_points) for t in t_values]
-    return curve_points
+    # calculates the points on the Bézier curve for 100 evenly spaced values of 't'
+    return evaluate_bezier(bezier_control_points, 100)
 
 
 """ ******************************************* Quartic Bezier function ******************************************* """
@@ -217,13 +560,11 @@ def error_function_quartic(control: np.array, coordinates: np.ndarray, times: np
     :param times: Array of equally spaced time instances.
     :return: The calculated error.
     """
-    # separates end and control points
-    p0, p4 = coordinates[0], coordinates[-1]
-    p1, p2, p3 = control.reshape(3, -1)
+    # joins end and control points
+    control_points = np.vstack([coordinates[0], np.reshape(control, (3, -1)), coordinates[-1]])
 
-    # estimates the curve points by calculating Bézier points for all time values
-    estimate = np.array([(1 - t) ** 4 * p0 + 4 * (1 - t) ** 3 * t * p1 + 6 * (1 - t) ** 2 * t ** 2 * p2 + 4 * (
-            1 - t) * t ** 3 * p3 + t ** 4 * p4 for t in times])
+    # estimates the curve points for all time values at once
+    estimate = bernstein_basis(4, times) @ control_points
 
     # calculates and return the error as sum of squares of the difference between coordinates and estimate
     return np.sum((coordinates - estimate) ** 2)
@@ -236,20 +577,8 @@ def fit_quartic_bezier_control_points(coordinates: List[List[float]]) -> np.ndar
     :param coordinates: A list of touch locations, where each location is a list of x and y coordinates.
     :return: The five control points of a quartic Bézier curve.
     """
-    # converts to numpy for numerical calculations
-    coordinates_np = np.array(coordinates)
-    # creates an array with equally spaced times between 0 and 1 to parametrize the Bézier curve
-    times = np.linspace(0, 1, len(coordinates_np))
-
-    # uses the mean of all coordinates as the initial guess for the control points of the Bézier curve
-    # the initial guess has five points (hence the repeat)
-    initial_guess = np.repeat(coordinates_np.mean(axis=0), 3)
-
-    # uses the BFGS method to minimize the error function and returns the optimal control points that
-    # minimizes the difference between the Bézier curve and the given coordinates.
-    result = minimize(error_function_quartic, initial_guess, args=(coordinates_np, times), method='BFGS')
-    control = result.x.reshape(3, -1)
-    return np.array([coordinates_np[0], control[0], control[1], control[2], coordinates_np[-1]])
+    # solves the linear least-squares problem for the three inner control points
+    return fit_bezier_control_points(coordinates, degree=4)
 
 
 def generate_two_quartic_beziers_control_points(curve1: List[List[float]], curve2: List[List[float]]) \
@@ -262,9 +591,8 @@ def generate_two_quartic_beziers_control_points(curve1: List[List[float]], curve
     :return: Two numpy arrays, each representing a quartic Bézier curve.
     """
 
-    # fits curves into quartic Bézier curves
-    curve_points1 = fit_quartic_bezier_control_points(curve1)
-    curve_points2 = fit_quartic_bezier_control_points(curve2)
+    # fits both curves into quartic Bézier curves in one pass
+    curve_points1, curve_points2 = fit_bezier_batch([curve1, curve2], degree=4)
 
     return curve_points1, curve_points2
 
@@ -277,12 +605,7 @@ def calculate_quartic_bezier_curve_point(t: float, control_points: np.ndarray) -
     :param control_points: The five control points of the quartic Bézier curve.
     :return: The point on the Bézier curve at the given parameter.
     """
-    assert 0 <= t <= 1, "Parameter t must be between 0 and 1."
-
-    P0, P1, P2, P3, P4 = control_points
-    B_t = ((1 - t) ** 4) * P0 + 4 * ((1 - t) ** 3) * t * P1 + 6 * ((1 - t) ** 2) * (t ** 2) * P2 + 4 * (1 - t) * (
-            t ** 3) * P3 + (t ** 4) * P4
-    return B_t
+    return bernstein_basis(4, t) @ np.asarray(control_points, dtype=float)
 
 
 def return_quartic_bezier_curve(control_points: np.ndarray, num_points: int = 100) -> np.ndarray:
@@ -293,9 +616,7 @@ def return_quartic_bezier_curve(control_points: np.ndarray, num_points: int = 10
     :param num_points: The number of points to generate on the curve.
     :return: A numpy array of points on the Bézier curve.
     """
-    t_values = np.linspace(0, 1, num_points)
-    curve_points = np.array([calculate_quartic_bezier_curve_point(t, control_points) for t in t_values])
-    return curve_points
+    return evaluate_bezier(control_points, num_points)
 
 
 def return_two_quartic_bezier_curves(bezier1_control: np.ndarray, bezier2_control: np.ndarray) -> \
@@ -307,6 +628,6 @@ def return_two_quartic_bezier_curves(bezier1_control: np.ndarray, bezier2_contro
     :param bezier2_control: The control points for the second quartic Bézier curve, in a numpy array.
     :return: A tuple of two numpy arrays, each representing a quartic Bézier curve.
     """
-    bezier1_curve = return_quartic_bezier_curve(bezier1_control)
-    bezier2_curve = return_quartic_bezier_curve(bezier2_control)
+    # evaluates both curves with one matrix product
+    bezier1_curve, bezier2_curve = evaluate_bezier(np.stack([bezier1_control, bezier2_control]))
     return bezier1_curve, bezier2_curve
@@ -0,0 +1,143 @@
+"""
+A second recognition engine besides the Bézier curves, after the $P point-cloud recogniser: a gesture is reduced to a
+cloud of POINT_CLOUD_NUM_POINTS points spread evenly along its strokes, and compared with the cloud of the sign's
+templates by the mean distance of an optimal one-to-one matching of their points. A cloud ignores the order and the
+direction of the strokes, so multi-finger gestures need neither be split into curves nor be paired with templates.
+
+Unlike $P, the clouds are not normalised in position and scale, as the signs are drawn at fixed places of the hand,
+and the points are matched optimally with the Hungarian algorithm instead of greedily, which is as fast at this size.
+The engine of each sign is selected in SIGN_ENGINES; the template clouds are built from the templates of
+SIGN_TEMPLATES.
+"""
+import os
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial.distance import cdist
+from features import MAX_FINGER_STEP, nearest_steps
+from matching import load_template
+from preprocessing import preprocess_for_sign
+from template_store import STORE_RELOAD_CALLBACKS
+from templates import PARAMETRIC_DIRECTORY, SIGN_TEMPLATES
+
+# number of points of every cloud
+POINT_CLOUD_NUM_POINTS = 32
+
+# recognition engine of the multi-curve recognisers of each sign, 'bezier' or 'point_cloud'; signs that are not listed
+# use the Bézier curves
+SIGN_ENGINES: Dict[str, str] = {}
+
+# thresholds of the mean point distance in pixels, which agree best with the multi-curve Bézier recognisers;
+# calibrated with Parametric/Benchmarks/benchmark_point_cloud.py
+POINT_CLOUD_THRESHOLDS = {'CH': 12.2, 'LL': 85.6, 'RR': 60.5, 'V': 59.6, 'W': 63.6, 'Ñ': 12.8}
+
+
+def sample_cloud(locations: np.ndarray, steps: np.ndarray, num_points: int = POINT_CLOUD_NUM_POINTS) -> np.ndarray:
+    """
+    Selects the points that lie at equally spaced positions along the accumulated steps, so that the points are spread
+    evenly along the strokes regardless of the drawing speed.
+
+    :param locations: The points as numpy array of shape (n, 2).
+    :param steps: The step from the previous point of its stroke to every point but the first, 0 for the first point
+    of a stroke, as numpy array of shape (n - 1,).
+    :param num_points: The number of points of the cloud.
+    :return: The cloud as numpy array of shape (num_points, 2).
+    """
+    arc_length = np.concatenate([[0], np.cumsum(steps)])
+    if arc_length[-1] == 0:
+        return locations[np.linspace(0, len(locations) - 1, num_points).round().astype(int)]
+    positions = np.searchsorted(arc_length, np.linspace(0, arc_length[-1], num_points)).clip(0, len(locations) - 1)
+    return locations[positions]
+
+
+def gesture_cloud(sign: str, timestamps: List[float], locations: List[List[float]],
+                  num_points: int = POINT_CLOUD_NUM_POINTS) -> np.ndarray:
+    """
+    Reduces a gesture to its cloud. The strokes of simultaneous fingers may be interleaved, as every point is linked
+    to the nearest of its preceding points, see nearest_steps; steps longer than MAX_FINGER_STEP start a new stroke.
+
+    :param sign: A string, indicating which sign is parsed; selects the preprocessing.
+    :param timestamps: A list of timestamps.
+    :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param num_points: The number of points of the cloud.
+    :return: The cloud as numpy array of shape (num_points, 2).
+    """
+    _, locations = preprocess_for_sign(sign, timestamps, locations)
+    steps = nearest_steps(locations)
+    return sample_cloud(locations, np.where(steps > MAX_FINGER_STEP, 0, steps), num_points)
+
+
+def curves_cloud(curves: Sequence[np.ndarray], num_points: int = POINT_CLOUD_NUM_POINTS) -> np.ndarray:
+    """
+    Reduces separate curves, e.g. the template curves of a sign, to one cloud.
+
+    :param curves: The curves, each a numpy array of shape (n, 2).
+    :param num_points: The number of points of the cloud.
+    :return: The cloud as numpy array of shape (num_points, 2).
+    """
+    locations = np.concatenate([np.asarray(curve, dtype=float) for curve in curves])
+    # no step from the end of one curve to the start of the next
+    steps = np.concatenate([np.concatenate([[0], np.linalg.norm(np.diff(curve, axis=0), axis=1)]) for curve in curves])
+    return sample_cloud(locations, steps[1:], num_points)
+
+
+@lru_cache(maxsize=None)
+def template_cloud(sign: str, parametric_directory: str = PARAMETRIC_DIRECTORY) -> np.ndarray:
+    """
+    Loads the template curves of a sign from SIGN_TEMPLATES once per version of the template store and reduces them
+    to one cloud.
+
+    :param sign: The sign.
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: The read-only cloud as numpy array of shape (POINT_CLOUD_NUM_POINTS, 2).
+    """
+    cloud = curves_cloud([load_template(os.path.join(parametric_directory, path))[0]
+                          for path in SIGN_TEMPLATES[sign]['templates']])
+    cloud.setflags(write=False)
+    return cloud
+
+
+# builds the clouds again from a new version of the template store
+STORE_RELOAD_CALLBACKS.append(template_cloud.cache_clear)
+
+
+def cloud_distance(cloud1: np.ndarray, cloud2: np.ndarray) -> float:
+    """
+    Calculates the mean distance between the points of two clouds of equal size that are matched one to one such that
+    the sum of the distances is minimal.
+
+    :param cloud1: The first cloud as numpy array of shape (n, 2).
+    :param cloud2: The second cloud as numpy array of shape (n, 2).
+    :return: The mean distance in pixels.
+    """
+    distances = cdist(cloud1, cloud2)
+    rows, columns = linear_sum_assignment(distances)
+    return float(distances[rows, columns].mean())
+
+
+def sign_engine(sign: str) -> str:
+    """
+    Returns the recognition engine of the multi-curve recognisers of a sign, see SIGN_ENGINES.
+
+    :param sign: The sign.
+    :return: 'bezier' or 'point_cloud'.
+    """
+    return SIGN_ENGINES.get(sign, 'bezier')
+
+
+def is_sign_point_cloud(sign: str, timestamps: List[float], locations: List[List[float]],
+                        threshold: Optional[float] = None) -> bool:
+    """
+    Checks whether a gesture matches the templates of a sign with the point-cloud engine.
+
+    :param sign: A string, indicating which sign is parsed.
+    :param timestamps: A list of timestamps.
+    :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :param threshold: The threshold of the mean point distance. POINT_CLOUD_THRESHOLDS of the sign if omitted.
+    :return: True if the gesture matches the templates, False otherwise.
+    """
+    threshold = POINT_CLOUD_THRESHOLDS[sign] if threshold is None else threshold
+    distance = cloud_distance(gesture_cloud(sign, timestamps, locations), template_cloud(sign))
+    print(f"cloud_distance: {distance}")
+    return distance <= threshold
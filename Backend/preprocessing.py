@@ -0,0 +1,214 @@
+"""
+Functions to clean and reduce touch data before fitting Bézier curves.
+"""
+
+from typing import List, Tuple, Dict, Union, Optional
+import numpy as np
+
+# preprocessing options per sign; options that are not listed are switched off. Resampling and decimation are not
+# enabled by default, because the templates and thresholds were derived from full-resolution touch data
+# (see Parametric/Benchmarks/benchmark_preprocessing.py for the trade-off). Multi-curve signs must not be resampled
+# or decimated before the curves are split, as this would bridge the gap between the curves.
+SIGN_PREPROCESSING: Dict[str, Dict[str, Union[bool, int, float]]] = {
+    'CH': {'remove_duplicates': True},
+    'G': {'remove_duplicates': True},
+    'H': {'remove_duplicates': True},
+    'J': {'remove_duplicates': True},
+    'LL': {'remove_duplicates': True},
+    'RR': {'remove_duplicates': True},
+    'V': {'remove_duplicates': True},
+    'W': {'remove_duplicates': True},
+    'Y': {'remove_duplicates': True},
+    'Z': {'remove_duplicates': True},
+    # stray touch points at the end of the gesture distort the fit of 'Ñ'
+    'Ñ': {'remove_duplicates': True, 'outlier_factor': 8.0},
+}
+
+
+def remove_duplicate_points(timestamps: np.ndarray, locations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Removes consecutive touch points with identical locations, which the touchscreen reports while a finger rests.
+
+    :param timestamps: The timestamps as a numpy array of shape (n,).
+    :param locations: The touch locations as a numpy array of shape (n, 2).
+    :return: The timestamps and locations without consecutive duplicates.
+    """
+    keep = np.ones(len(locations), dtype=bool)
+    keep[1:] = np.any(locations[1:] != locations[:-1], axis=1)
+    return timestamps[keep], locations[keep]
+
+
+def remove_outliers(timestamps: np.ndarray, locations: np.ndarray, factor: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Removes isolated touch points that are far away from both of their neighbours, e.g. stray touches when a gesture
+    terminates. A point is an outlier if its distance to every neighbour exceeds factor times the median step length.
+    Jumps between two curves are kept, as the point after the jump is close to its successor.
+
+    :param timestamps: The timestamps as a numpy array of shape (n,).
+    :param locations: The touch locations as a numpy array of shape (n, 2).
+    :param factor: The multiple of the median step length above which a step counts as a jump.
+    :return: The timestamps and locations without outliers.
+    """
+    if len(locations) < 3:
+        return timestamps, locations
+
+    # length of the step between consecutive points and whether it is a jump
+    steps = np.linalg.norm(np.diff(locations, axis=0), axis=1)
+    jumps = steps > factor * max(np.median(steps), np.finfo(float).eps)
+
+    # a point is an outlier if the steps on both of its sides are jumps; endpoints have only one side
+    jump_before = np.concatenate([[True], jumps])
+    jump_after = np.concatenate([jumps, [True]])
+    keep = ~(jump_before & jump_after)
+    return timestamps[keep], locations[keep]
+
+
+def ramer_douglas_peucker(locations: np.ndarray, epsilon: float) -> np.ndarray:
+    """
+    Decimates a polyline with the Ramer-Douglas-Peucker algorithm. The distances of all points of a segment to its
+    chord are calculated at once; segments are processed from a stack instead of recursively.
+
+    :param locations: The touch locations as a numpy array of shape (n, 2).
+    :param epsilon: The maximum distance of a removed point to the decimated polyline.
+    :return: A boolean mask of shape (n,) that marks the points which are kept.
+    """
+    keep = np.zeros(len(locations), dtype=bool)
+    if len(locations) == 0:
+        return keep
+    keep[[0, -1]] = True
+
+    stack = [(0, len(locations) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        # perpendicular distance of the inner points to the chord between start and end
+        chord = locations[end] - locations[start]
+        offsets = locations[start + 1:end] - locations[start]
+        chord_length = np.hypot(*chord)
+        if chord_length == 0:
+            distances = np.linalg.norm(offsets, axis=1)
+        else:
+            distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / chord_length
+
+        # keeps the farthest point and splits the segment if it is farther away than epsilon
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > epsilon:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return keep
+
+
+def resample_by_arc_length(timestamps: np.ndarray, locations: np.ndarray, num_points: int) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Resamples a stroke to num_points locations that are equally spaced along its arc length. Timestamps are
+    interpolated accordingly.
+
+    :param timestamps: The timestamps as a numpy array of shape (n,).
+    :param locations: The touch locations as a numpy array of shape (n, 2).
+    :param num_points: The number of points after resampling.
+    :return: The resampled timestamps of shape (num_points,) and locations of shape (num_points, 2).
+    """
+    # cumulative arc length at each touch point
+    arc_length = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(locations, axis=0), axis=1))])
+
+    # a stroke without extent is resampled by its index instead
+    if len(locations) < 2 or arc_length[-1] == 0:
+        arc_length = np.arange(len(locations), dtype=float)
+
+    targets = np.linspace(0, arc_length[-1], num_points)
+    resampled = np.stack([np.interp(targets, arc_length, locations[:, 0]),
+                          np.interp(targets, arc_length, locations[:, 1])], axis=1)
+    return np.interp(targets, arc_length, timestamps), resampled
+
+
+def _kept_indices(locations: np.ndarray, remove_duplicates: bool, outlier_factor: Optional[float],
+                  rdp_epsilon: Optional[float]) -> np.ndarray:
+    """
+    Runs the preprocessing steps that remove touch points and returns the indices of the remaining points, so that
+    further per-point data such as touch identifiers can be filtered in the same way.
+
+    :param locations: The touch locations as a numpy array of shape (n, 2).
+    :param remove_duplicates: Whether consecutive duplicate locations are removed.
+    :param outlier_factor: If given, removes isolated points whose steps exceed this multiple of the median step.
+    :param rdp_epsilon: If given, decimates the stroke with this Ramer-Douglas-Peucker tolerance in pixels.
+    :return: The sorted indices of the kept touch points.
+    """
+    kept = np.arange(len(locations))
+
+    # every step works on the points kept by the previous steps and therefore carries their indices along
+    if remove_duplicates:
+        kept, _ = remove_duplicate_points(kept, locations[kept])
+    if outlier_factor is not None:
+        kept, _ = remove_outliers(kept, locations[kept], outlier_factor)
+    if rdp_epsilon is not None:
+        kept = kept[ramer_douglas_peucker(locations[kept], rdp_epsilon)]
+
+    return kept
+
+
+def preprocess_locations(timestamps: List[float], locations: List[List[float]], remove_duplicates: bool = False,
+                         outlier_factor: Optional[float] = None, rdp_epsilon: Optional[float] = None,
+                         resample: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs the selected preprocessing steps in a fixed order: duplicate removal, outlier removal, Ramer-Douglas-Peucker
+    decimation and arc-length resampling.
+
+    :param timestamps: List of timestamps.
+    :param locations: List of locations where each location is a list of x and y coordinates.
+    :param remove_duplicates: Whether consecutive duplicate locations are removed.
+    :param outlier_factor: If given, removes isolated points whose steps exceed this multiple of the median step.
+    :param rdp_epsilon: If given, decimates the stroke with this Ramer-Douglas-Peucker tolerance in pixels.
+    :param resample: If given, resamples the stroke to this number of points along its arc length.
+    :return: The preprocessed timestamps and locations as numpy arrays.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+
+    kept = _kept_indices(locations, remove_duplicates, outlier_factor, rdp_epsilon)
+    timestamps, locations = timestamps[kept], locations[kept]
+    if resample is not None:
+        timestamps, locations = resample_by_arc_length(timestamps, locations, resample)
+
+    return timestamps, locations
+
+
+def preprocess_for_sign(sign: str, timestamps: List[float], locations: List[List[float]]) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Preprocesses touch data with the options that are configured for the sign in SIGN_PREPROCESSING.
+
+    :param sign: A string indicating which sign is parsed.
+    :param timestamps: List of timestamps.
+    :param locations: List of locations where each location is a list of x and y coordinates.
+    :return: The preprocessed timestamps and locations as numpy arrays.
+    """
+    return preprocess_locations(timestamps, locations, **SIGN_PREPROCESSING.get(sign, {}))
+
+
+def preprocess_touches_for_sign(sign: str, timestamps: List[float], locations: List[List[float]],
+                                touch_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Preprocesses touch data together with the touch identifier of every point, so that the identifiers stay aligned
+    with the remaining points. Resampling creates new points without identifiers and is therefore not supported.
+
+    :param sign: A string indicating which sign is parsed.
+    :param timestamps: List of timestamps.
+    :param locations: List of locations where each location is a list of x and y coordinates.
+    :param touch_ids: The touch identifier of every point as numpy array of shape (n,).
+    :return: The preprocessed timestamps, locations and touch identifiers as numpy arrays.
+    """
+    options = dict(SIGN_PREPROCESSING.get(sign, {}))
+    if options.pop('resample', None) is not None:
+        raise ValueError(f"Touch identifiers cannot be resampled for sign {sign}")
+
+    timestamps = np.asarray(timestamps, dtype=float)
+    locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+    kept = _kept_indices(locations, options.get('remove_duplicates', False), options.get('outlier_factor'),
+                         options.get('rdp_epsilon'))
+    return timestamps[kept], locations[kept], np.asarray(touch_ids)[kept]
@@ -3,58 +3,526 @@ Functions to compare Bezier curves.
 """
 
 import math
-from typing import List
+from collections import Counter
+from typing import List, Optional, Union, Dict, Sequence, Callable, Tuple
 import numpy as np
-from fastdtw import fastdtw
-from scipy.spatial.distance import euclidean
+from scipy.spatial import cKDTree
+from parameterisation import bernstein_gram_matrix, degree_elevation_matrix
+from preprocessing import resample_by_arc_length
+from template_store import current_template_store
 
+# radius of the Sakoe-Chiba band in points; a warping path may deviate at most this far from the diagonal
+DTW_BAND = 20
 
-def timestamp_duration_valid(sign: str, timestamps: List[float]) -> bool:
+# number of points of the coarse curves that are compared first, and the relative margin around the threshold within
+# which the coarse distance is not conclusive and the full-resolution curves are compared
+COARSE_NUM_POINTS = 25
+COARSE_MARGIN = 0.3
+
+# number of comparisons decided at each stage since the server started
+COARSE_TO_FINE_STATISTICS: Counter = Counter()
+
+# maximum duration of every sign in seconds; signs that are not listed use the default
+SIGN_DURATIONS = {'CH': 2, 'G': 2, 'H': 2, 'J': 2, 'LL': 4, 'RR': 4, 'V': 2, 'W': 4, 'Y': 1, 'Z': 3, 'Ñ': 4}
+DEFAULT_DURATION = 2
+
+# Dynamic Time Warping thresholds of the recognisers used by the endpoint, per curve
+DTW_THRESHOLDS = {'CH': 5000.0, 'G': 2000.0, 'H': 2000.0, 'J': 3000.0, 'LL': 7000.0, 'RR': 5000.0, 'V': 5000.0,
+                  'W': 5000.0, 'Y': 5000.0, 'Z': 3000.0, 'Ñ': 3000.0}
+
+# number of points that both curves are resampled to by arc length before their L2 distance is calculated
+L2_NUM_POINTS = 64
+
+# metric of the recognisers of each sign, see CURVE_METRICS; signs that are not listed use Dynamic Time Warping
+SIGN_METRICS: Dict[str, str] = {}
+
+# thresholds of the other metrics in pixels, which correspond to the Dynamic Time Warping thresholds of the signs in
+# DTW_THRESHOLDS, so that they only apply to the recognisers at those thresholds; calibrated with
+# Parametric/Benchmarks/benchmark_metrics.py
+METRIC_THRESHOLDS: Dict[str, Dict[str, float]] = {
+    'frechet': {'CH': 89.4, 'G': 45.4, 'H': 44.4, 'J': 67.0, 'LL': 127.7, 'RR': 77.0, 'V': 70.9, 'W': 84.9, 'Y': 72.7,
+                'Z': 64.3, 'Ñ': 66.1},
+    'hausdorff': {'CH': 89.4, 'G': 45.4, 'H': 44.4, 'J': 67.0, 'LL': 114.4, 'RR': 75.5, 'V': 65.4, 'W': 74.0, 'Y': 72.7,
+                  'Z': 64.3, 'Ñ': 53.4},
+    'l2': {'CH': 62.4, 'G': 27.2, 'H': 34.8, 'J': 42.1, 'LL': 79.4, 'RR': 59.3, 'V': 53.2, 'W': 61.2, 'Y': 56.9,
+           'Z': 41.6, 'Ñ': 41.4},
+}
+
+# thresholds of the L2 distance between Bézier curves in pixels, which correspond to the Dynamic Time Warping
+# thresholds of the signs; calibrated with Parametric/Benchmarks/calibrate_control_point_distance.py
+CONTROL_POINT_THRESHOLDS = {'CH': 67.1, 'G': 24.5, 'H': 26.7, 'J': 42.5, 'LL': 75.4, 'RR': 55.7, 'V': 53.7,
+                            'W': 58.0, 'Y': 62.0, 'Z': 39.9, 'Ñ': 36.2}
+
+
+def timestamp_duration_valid(sign: str, timestamps: List[float], duration: Optional[float] = None) -> bool:
     """
     Checks whether the difference between the first and the last timestamp is larger than a given time period,
     depending on the sign.
 
     :param sign: A string, indicating which sign is parsed.
     :param timestamps: List of timestamps
-    :return: True if the duration is less than or equal to 3 seconds, False otherwise
-    """
-    time_period = 2
-    if sign == 'CH':
-        time_period = 2
-    elif sign == 'G':
-        time_period = 2
-    elif sign == 'H':
-        time_period = 2
-    elif sign == 'J':
-        time_period = 2
-    elif sign == 'LL':
-        time_period = 4
-    elif sign == 'RR':
-        time_period = 4
-    elif sign == 'V':
-        time_period = 2
-    elif sign == 'W':
-        time_period = 4
-    elif sign == 'Y':
-        time_period = 1
-    elif sign == 'Z':
-        time_period = 3
-    elif sign == 'Ñ':
-        time_period = 4
-
-    return timestamps[-1] - timestamps[0] <= time_period
+    :param duration: The maximum duration of the sign in seconds, as preloaded by its recogniser; looked up in
+    SIGN_DURATIONS if omitted.
+    :return: True if the duration is less than or equal to the maximum duration of the sign, False otherwise
+    """
+    if duration is None:
+        duration = SIGN_DURATIONS.get(sign, DEFAULT_DURATION)
+    return timestamps[-1] - timestamps[0] <= duration
+
+
+def pairwise_distances(seq1: np.ndarray, seq2: np.ndarray, squared: bool = False) -> np.ndarray:
+    """
+    Calculates the distances between all points of two sequences at once, using the expansion
+    |a - b|^2 = |a|^2 + |b|^2 - 2ab.
+
+    :param seq1: The first sequence as numpy array of shape (n, 2).
+    :param seq2: The second sequence as numpy array of shape (m, 2).
+    :param squared: Whether the squared Euclidean distances are returned, which saves the square roots.
+    :return: A numpy array of shape (n, m) with the distance between every pair of points.
+    """
+    squared_distances = np.einsum('ij,ij->i', seq1, seq1)[:, None] + np.einsum('ij,ij->i', seq2, seq2)[None, :] \
+        - 2 * seq1 @ seq2.T
+    # rounding errors can make the distance of identical points slightly negative
+    np.maximum(squared_distances, 0, out=squared_distances)
+    return squared_distances if squared else np.sqrt(squared_distances)
+
+
+def dtw_distance(seq1: np.ndarray, seq2: np.ndarray, band: Optional[int] = DTW_BAND,
+                 threshold: Optional[float] = None, squared: bool = False) -> float:
+    """
+    Calculates the exact Dynamic Time Warping distance between two sequences within a Sakoe-Chiba band. The
+    accumulated cost is computed one anti-diagonal at a time, as all cells of an anti-diagonal only depend on the two
+    previous ones. Since a warping path visits at least one of every two consecutive anti-diagonals, the calculation
+    is abandoned as soon as both exceed the threshold.
+
+    :param seq1: The first sequence as numpy array of shape (n, 2).
+    :param seq2: The second sequence as numpy array of shape (m, 2).
+    :param band: The radius of the Sakoe-Chiba band in points, or None for an unconstrained warping path. The band is
+    widened to the difference of the sequence lengths, so that a path always exists.
+    :param threshold: If given, returns infinity as soon as the distance is known to exceed the threshold.
+    :param squared: Whether the squared Euclidean distance between points is accumulated instead.
+    :return: The Dynamic Time Warping distance, or infinity if the calculation was abandoned.
+    """
+    seq1 = np.asarray(seq1, dtype=float).reshape(-1, 2)
+    seq2 = np.asarray(seq2, dtype=float).reshape(-1, 2)
+    n, m = len(seq1), len(seq2)
+    costs = pairwise_distances(seq1, seq2, squared)
+    if band is None:
+        band = max(n, m)
+    band = max(band, abs(n - m))
+
+    # accumulated costs of the two previous anti-diagonals, indexed by row + 1; row -1 holds the origin of the path
+    previous = np.full(n + 1, np.inf)
+    before_previous = np.full(n + 1, np.inf)
+    before_previous[0] = 0.0
+    current = np.full(n + 1, np.inf)
+
+    for diagonal in range(n + m - 1):
+        # rows of the cells on this anti-diagonal that lie inside the matrix and the band, i.e. |row - column| <= band
+        first_row = max(0, diagonal - m + 1, (diagonal - band + 1) // 2)
+        last_row = min(n - 1, diagonal, (diagonal + band) // 2)
+        rows = np.arange(first_row, last_row + 1)
+
+        # cell (i, j) continues the path from (i - 1, j), (i, j - 1) or (i - 1, j - 1)
+        current.fill(np.inf)
+        current[rows + 1] = costs[rows, diagonal - rows] + np.minimum(
+            np.minimum(previous[rows], previous[rows + 1]), before_previous[rows])
+
+        # abandons if every path through either of the last two anti-diagonals exceeds the threshold
+        if threshold is not None and min(current[rows + 1].min(initial=np.inf), previous.min()) > threshold:
+            return math.inf
+
+        before_previous, previous, current = previous, current, before_previous
+
+    return float(previous[n])
+
+
+def dtw_distance_batch(seqs1: np.ndarray, seqs2: np.ndarray, band: Optional[int] = DTW_BAND,
+                       thresholds: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Calculates the Dynamic Time Warping distances of many pairs of sequences at once, see dtw_distance. All pairs
+    advance one anti-diagonal per step, so the loop runs once for the whole batch instead of once per pair.
+
+    :param seqs1: The first sequences as numpy array of shape (p, n, 2).
+    :param seqs2: The second sequences as numpy array of shape (p, m, 2).
+    :param band: The radius of the Sakoe-Chiba band in points, or None for an unconstrained warping path.
+    :param thresholds: If given, the threshold of every pair as numpy array of shape (p,). Pairs that exceed their
+    threshold are infinity, and the calculation is abandoned once all pairs exceed theirs.
+    :return: The distances as numpy array of shape (p,).
+    """
+    seqs1 = np.asarray(seqs1, dtype=float)
+    seqs2 = np.asarray(seqs2, dtype=float)
+    p, n, m = len(seqs1), seqs1.shape[1], seqs2.shape[1]
+    if p == 0:
+        return np.zeros(0)
+    costs = np.sqrt(np.maximum(np.einsum('pij,pij->pi', seqs1, seqs1)[:, :, None]
+                               + np.einsum('pij,pij->pi', seqs2, seqs2)[:, None, :]
+                               - 2 * seqs1 @ seqs2.transpose(0, 2, 1), 0))
+    if band is None:
+        band = max(n, m)
+    band = max(band, abs(n - m))
+
+    previous = np.full((p, n + 1), np.inf)
+    before_previous = np.full((p, n + 1), np.inf)
+    before_previous[:, 0] = 0.0
+    current = np.full((p, n + 1), np.inf)
+    # smallest accumulated cost of every pair on the previous anti-diagonal
+    previous_minimum = np.zeros(p)
+
+    for diagonal in range(n + m - 1):
+        first_row = max(0, diagonal - m + 1, (diagonal - band + 1) // 2)
+        last_row = min(n - 1, diagonal, (diagonal + band) // 2)
+        rows = np.arange(first_row, last_row + 1)
+
+        current.fill(np.inf)
+        cells = costs[:, rows, diagonal - rows] + np.minimum(
+            np.minimum(previous[:, rows], previous[:, rows + 1]), before_previous[:, rows])
+        current[:, rows + 1] = cells
+
+        if thresholds is not None:
+            minimum = cells.min(axis=1)
+            if np.all(np.minimum(minimum, previous_minimum) > thresholds):
+                return np.full(p, np.inf)
+            previous_minimum = minimum
+
+        before_previous, previous, current = previous, current, before_previous
+
+    distances = previous[:, n].copy()
+    if thresholds is not None:
+        distances[distances > thresholds] = np.inf
+    return distances
+
+
+def compare_sequences_dtw(seq1: np.ndarray, seq2: np.ndarray, threshold: Optional[float] = None) -> float:
+    """
+    Compares two sequences (Bézier curves) using exact banded Dynamic Time Warping on the Euclidean distance between
+    points, which is the scale of the thresholds of the signs.
+
+    :param seq1: The first sequence. It is a numpy array.
+    :param seq2: The second sequence. It is a numpy array.
+    :param threshold: The threshold of the sign. If given, the comparison stops once the distance exceeds it.
+    :return: The Dynamic Time Warping distance between the sequences as a float, or infinity if it exceeds the
+    threshold.
+    """
+    return dtw_distance(seq1, seq2, threshold=threshold)
+
+
+def discrete_frechet_distance(seq1: np.ndarray, seq2: np.ndarray, threshold: Optional[float] = None) -> float:
+    """
+    Calculates the discrete Fréchet distance between two sequences, i.e. the largest distance between matched points
+    along the warping path that minimises it. Like dtw_distance, the coupling is computed one anti-diagonal at a time
+    and abandoned as soon as the last two anti-diagonals exceed the threshold.
+
+    :param seq1: The first sequence as numpy array of shape (n, 2).
+    :param seq2: The second sequence as numpy array of shape (m, 2).
+    :param threshold: If given, returns infinity as soon as the distance is known to exceed the threshold.
+    :return: The discrete Fréchet distance in pixels, or infinity if the calculation was abandoned.
+    """
+    seq1 = np.asarray(seq1, dtype=float).reshape(-1, 2)
+    seq2 = np.asarray(seq2, dtype=float).reshape(-1, 2)
+    n, m = len(seq1), len(seq2)
+    costs = pairwise_distances(seq1, seq2)
+
+    # couplings of the two previous anti-diagonals, indexed by row + 1; row -1 holds the origin of the path
+    previous = np.full(n + 1, np.inf)
+    before_previous = np.full(n + 1, np.inf)
+    before_previous[0] = 0.0
+    current = np.full(n + 1, np.inf)
+
+    for diagonal in range(n + m - 1):
+        rows = np.arange(max(0, diagonal - m + 1), min(n - 1, diagonal) + 1)
+
+        # cell (i, j) continues the path from (i - 1, j), (i, j - 1) or (i - 1, j - 1)
+        current.fill(np.inf)
+        current[rows + 1] = np.maximum(costs[rows, diagonal - rows], np.minimum(
+            np.minimum(previous[rows], previous[rows + 1]), before_previous[rows]))
+
+        # abandons if every path through either of the last two anti-diagonals exceeds the threshold
+        if threshold is not None and min(current[rows + 1].min(initial=np.inf), previous.min()) > threshold:
+            return math.inf
+
+        before_previous, previous, current = previous, current, before_previous
+
+    if threshold is not None and previous[n] > threshold:
+        return math.inf
+    return float(previous[n])
+
+
+def hausdorff_distance(seq1: np.ndarray, seq2: np.ndarray, threshold: Optional[float] = None) -> float:
+    """
+    Calculates the symmetric Hausdorff distance between the points of two sequences, i.e. the largest distance of a
+    point to the nearest point of the other sequence. The nearest points are found with a KD-tree of each sequence.
+    The order of the points is ignored, so a curve drawn backwards has the same distance.
+
+    :param seq1: The first sequence as numpy array of shape (n, 2).
+    :param seq2: The second sequence as numpy array of shape (m, 2).
+    :param threshold: If given, returns infinity if the distance exceeds the threshold; the second direction is then
+    only searched up to the threshold.
+    :return: The Hausdorff distance in pixels, or infinity if it exceeds the threshold.
+    """
+    seq1 = np.asarray(seq1, dtype=float).reshape(-1, 2)
+    seq2 = np.asarray(seq2, dtype=float).reshape(-1, 2)
+    upper_bound = np.inf if threshold is None else threshold
+    distance = cKDTree(seq2).query(seq1, distance_upper_bound=upper_bound)[0].max()
+    if distance > upper_bound:
+        return math.inf
+    distance = max(distance, cKDTree(seq1).query(seq2, distance_upper_bound=upper_bound)[0].max())
+    return math.inf if distance > upper_bound else float(distance)
+
+
+def resampled_l2_distance(seq1: np.ndarray, seq2: np.ndarray, threshold: Optional[float] = None) -> float:
+    """
+    Calculates the root mean square distance between corresponding points of two sequences after both have been
+    resampled to L2_NUM_POINTS points that are equally spaced along their arc length, so that the distance does not
+    depend on the speed at which a curve was drawn or sampled.
+
+    :param seq1: The first sequence as numpy array of shape (n, 2).
+    :param seq2: The second sequence as numpy array of shape (m, 2).
+    :param threshold: If given, returns infinity if the distance exceeds the threshold.
+    :return: The L2 distance in pixels, or infinity if it exceeds the threshold.
+    """
+    _, resampled1 = resample_by_arc_length(np.zeros(len(seq1)), np.asarray(seq1, dtype=float), L2_NUM_POINTS)
+    _, resampled2 = resample_by_arc_length(np.zeros(len(seq2)), np.asarray(seq2, dtype=float), L2_NUM_POINTS)
+    distance = float(np.sqrt(np.mean(np.sum((resampled1 - resampled2) ** 2, axis=1))))
+    if threshold is not None and distance > threshold:
+        return math.inf
+    return distance
+
+
+def downsample_curve(curve: np.ndarray, num_points: int) -> np.ndarray:
+    """
+    Reduces a sampled curve to num_points points at equally spaced parameter values by linear interpolation between
+    the samples.
+
+    :param curve: The curve as numpy array of shape (n, 2), sampled at equally spaced parameter values.
+    :param num_points: The number of points of the reduced curve.
+    :return: A numpy array of shape (num_points, 2).
+    """
+    curve = np.asarray(curve, dtype=float)
+    positions = np.linspace(0, len(curve) - 1, num_points)
+    indices = np.arange(len(curve))
+    return np.stack([np.interp(positions, indices, curve[:, 0]), np.interp(positions, indices, curve[:, 1])], axis=1)
+
+
+def curve_pyramid(curve: np.ndarray, levels: Sequence[int] = (COARSE_NUM_POINTS,)) -> Dict[int, np.ndarray]:
+    """
+    Builds the reduced versions of a curve that are compared before the full-resolution curve. Templates build their
+    pyramid once when they are loaded.
+
+    :param curve: The curve as numpy array of shape (n, 2).
+    :param levels: The numbers of points of the reduced curves.
+    :return: A dictionary mapping the number of points to the curve, including the full-resolution curve.
+    """
+    curve = np.asarray(curve, dtype=float)
+    pyramid = {num_points: downsample_curve(curve, num_points) for num_points in levels if num_points < len(curve)}
+    pyramid[len(curve)] = curve
+    return pyramid
+
+
+def compare_sequences_coarse_to_fine(seq1: np.ndarray, seq2: np.ndarray, threshold: float,
+                                     template_pyramid: Optional[Dict[int, np.ndarray]] = None,
+                                     margin: float = COARSE_MARGIN, accept_coarse: bool = True) -> float:
+    """
+    Compares a user curve with a template in stages of increasing resolution. The Dynamic Time Warping distance of
+    the coarse curves is scaled to the full resolution; if it is clearly below the threshold, i.e. outside the
+    relative margin around it, this estimate is returned, and if it is clearly above, the template is rejected,
+    without comparing the full-resolution curves.
+
+    :param seq1: The user curve as numpy array of shape (n, 2), sampled at equally spaced parameter values.
+    :param seq2: The template as numpy array of shape (m, 2).
+    :param threshold: The threshold of the sign.
+    :param template_pyramid: The pyramid of the template from curve_pyramid. Built on the fly if omitted.
+    :param margin: The relative margin around the threshold within which the next stage is compared.
+    :param accept_coarse: Whether a coarse estimate below the threshold is returned. Otherwise only rejections are
+    decided coarsely, e.g. when the exact distances of accepted templates are ranked.
+    :return: The Dynamic Time Warping distance or its coarse estimate, or infinity if the distance exceeds the
+    threshold, as with compare_sequences_dtw.
+    """
+    if template_pyramid is None:
+        template_pyramid = curve_pyramid(seq2)
+    full_resolution = len(seq2)
+
+    for num_points in sorted(template_pyramid):
+        if num_points >= full_resolution:
+            break
+        # the distance sums the distances of matched points, hence it grows with the number of points
+        band = max(1, DTW_BAND * num_points // full_resolution)
+        estimate = dtw_distance(downsample_curve(seq1, num_points), template_pyramid[num_points], band=band,
+                                threshold=threshold * (1 + margin) * num_points / full_resolution)
+        estimate *= full_resolution / num_points
+        if accept_coarse and estimate < threshold * (1 - margin):
+            COARSE_TO_FINE_STATISTICS[f'accepted_{num_points}'] += 1
+            return estimate
+        if estimate > threshold * (1 + margin):
+            COARSE_TO_FINE_STATISTICS[f'rejected_{num_points}'] += 1
+            return np.inf
+
+    COARSE_TO_FINE_STATISTICS['full_resolution'] += 1
+    return dtw_distance(seq1, seq2, threshold=threshold)
+
+
+def coarse_to_fine_hit_rates() -> Dict[str, float]:
+    """
+    Returns the share of comparisons that were decided at each stage of compare_sequences_coarse_to_fine, e.g. to
+    tune COARSE_MARGIN against real traffic.
+
+    :return: A dictionary mapping the stage to its share of all comparisons.
+    """
+    total = sum(COARSE_TO_FINE_STATISTICS.values())
+    return {stage: count / total for stage, count in COARSE_TO_FINE_STATISTICS.items()} if total else {}
+
+
+# distances between a user curve and a template by name; each is called with both curves and an optional threshold,
+# beyond which it returns infinity
+CURVE_METRICS: Dict[str, Callable[[np.ndarray, np.ndarray, Optional[float]], float]] = {
+    'dtw': compare_sequences_dtw,
+    'frechet': discrete_frechet_distance,
+    'hausdorff': hausdorff_distance,
+    'l2': resampled_l2_distance,
+}
+
+
+def sign_metric(sign: str, dtw_threshold: float) -> Tuple[str, float]:
+    """
+    Returns the metric that a recogniser of a sign uses, see SIGN_METRICS, and the threshold on its scale. The
+    thresholds of the other metrics are calibrated against DTW_THRESHOLDS, so a recogniser with another Dynamic Time
+    Warping threshold, e.g. a variant with its own template, keeps Dynamic Time Warping.
+
+    :param sign: A string, indicating which sign is recognised.
+    :param dtw_threshold: The Dynamic Time Warping threshold of the recogniser, used if it keeps that metric.
+    :return: The name of the metric and its threshold.
+    """
+    metric = SIGN_METRICS.get(sign, 'dtw')
+    if metric == 'dtw' or dtw_threshold != DTW_THRESHOLDS[sign]:
+        return 'dtw', dtw_threshold
+    return metric, METRIC_THRESHOLDS[metric][sign]
+
+
+def recogniser_metric(sign: str, dtw_thresholds: List[float]) -> Tuple[str, List[float]]:
+    """
+    Returns the metric that a recogniser of a sign uses and the threshold of every template on its scale, as given by
+    the code, see sign_metric.
+
+    :param sign: A string, indicating which sign is recognised.
+    :param dtw_thresholds: The Dynamic Time Warping threshold of every template of the recogniser.
+    :return: The name of the metric and the threshold of every template.
+    """
+    metrics = [sign_metric(sign, threshold) for threshold in dtw_thresholds]
+    # a recogniser compares all its templates on the same metric
+    if len({metric for metric, _ in metrics}) > 1:
+        return 'dtw', list(dtw_thresholds)
+    return metrics[0][0], [threshold for _, threshold in metrics]
+
+
+def current_sign_metric(sign: str, template_paths: List[str], dtw_thresholds: List[float]) -> Tuple[str, List[float]]:
+    """
+    Returns the metric that a recogniser of a sign uses and the threshold of every template on its scale. The threshold
+    of a template is taken from the template store that is currently served if the store holds one for that template
+    on the same metric, so that edited thresholds take effect when a new version of the store is swapped in, and
+    otherwise from recogniser_metric.
+
+    :param sign: A string, indicating which sign is recognised.
+    :param template_paths: The path of every template file of the recogniser.
+    :param dtw_thresholds: The Dynamic Time Warping threshold of every template of the recogniser.
+    :return: The name of the metric and the threshold of every template.
+    """
+    metric, thresholds = recogniser_metric(sign, dtw_thresholds)
+    store = current_template_store()
+    if store is None:
+        return metric, thresholds
+    for i, path in enumerate(template_paths):
+        stored = store.thresholds.get(store.key(path))
+        if stored is not None and stored['metric'] == metric:
+            thresholds[i] = stored['threshold']
+    return metric, thresholds
+
+
+def compare_curves(metric: str, seq1: np.ndarray, seq2: np.ndarray, threshold: float,
+                   template_pyramid: Optional[Dict[int, np.ndarray]] = None) -> float:
+    """
+    Compares a user curve with a template using one of the CURVE_METRICS. Dynamic Time Warping is compared coarse to
+    fine.
+
+    :param metric: The name of the metric.
+    :param seq1: The user curve as numpy array of shape (n, 2).
+    :param seq2: The template as numpy array of shape (m, 2).
+    :param threshold: The threshold of the sign on the scale of the metric.
+    :param template_pyramid: The pyramid of the template from curve_pyramid, only used by Dynamic Time Warping.
+    :return: The distance, or infinity if it exceeds the threshold.
+    """
+    if metric == 'dtw':
+        return compare_sequences_coarse_to_fine(seq1, seq2, threshold, template_pyramid)
+    return CURVE_METRICS[metric](seq1, seq2, threshold)
 
 
 def compare_sequences_fdtw(seq1: np.ndarray, seq2: np.ndarray) -> float:
     """
-    Compares two sequences (Bézier curves) using Dynamic Time Warping.
+    Compares two sequences (Bézier curves) using Dynamic Time Warping. Kept for compatibility; the approximate
+    FastDTW has been replaced by the exact banded calculation of compare_sequences_dtw.
 
     :param seq1: The first sequence. It is a numpy array.
     :param seq2: The second sequence. It is a numpy array.
     :return: The Dynamic Time Warping distance between the sequences as a float.
     """
-    distance, _ = fastdtw(seq1, seq2, dist=euclidean)
+    return compare_sequences_dtw(seq1, seq2)
+
+
+def _common_degree(controls1: np.ndarray, controls2: np.ndarray) -> np.ndarray:
+    """
+    Elevates the control points of two Bézier curves to the higher of both degrees and returns their difference.
 
+    :param controls1: The control points of the first curve(s) with shape (..., degree1 + 1, 2).
+    :param controls2: The control points of the second curve(s) with shape (..., degree2 + 1, 2).
+    :return: The difference of the control points with shape (..., max(degree1, degree2) + 1, 2).
+    """
+    controls1 = np.asarray(controls1, dtype=float)
+    controls2 = np.asarray(controls2, dtype=float)
+    degree = max(controls1.shape[-2], controls2.shape[-2]) - 1
+    return degree_elevation_matrix(controls1.shape[-2] - 1, degree) @ controls1 \
+        - degree_elevation_matrix(controls2.shape[-2] - 1, degree) @ controls2
+
+
+def bezier_l2_distance(controls1: np.ndarray, controls2: np.ndarray) -> Union[float, np.ndarray]:
+    """
+    Calculates the exact L2 distance between two Bézier curves from their control points, i.e. the root of the
+    integral of the squared distance between corresponding points over the parameter interval [0, 1]. Curves of
+    different degrees are compared after degree elevation.
+
+    :param controls1: The control points of the first curve(s) with shape (degree1 + 1, 2) or (k, degree1 + 1, 2).
+    :param controls2: The control points of the second curve(s) with shape (degree2 + 1, 2) or (k, degree2 + 1, 2).
+    :return: The L2 distance in pixels, or an array of k distances.
+    """
+    difference = _common_degree(controls1, controls2)
+    gram = bernstein_gram_matrix(difference.shape[-2] - 1)
+    squared = np.einsum('...ic,ij,...jc->...', difference, gram, difference)
+    return np.sqrt(np.maximum(squared, 0))
+
+
+def bezier_distance_bound(controls1: np.ndarray, controls2: np.ndarray) -> Union[float, np.ndarray]:
+    """
+    Calculates an upper bound of the largest distance between corresponding points of two Bézier curves, which also
+    bounds their Hausdorff and Fréchet distances: the difference of both curves is a Bézier curve whose control points
+    are the differences of their control points, and it lies in their convex hull.
+
+    :param controls1: The control points of the first curve(s) with shape (degree1 + 1, 2) or (k, degree1 + 1, 2).
+    :param controls2: The control points of the second curve(s) with shape (degree2 + 1, 2) or (k, degree2 + 1, 2).
+    :return: The bound in pixels, or an array of k bounds.
+    """
+    return np.linalg.norm(_common_degree(controls1, controls2), axis=-1).max(axis=-1)
+
+
+def compare_control_points(controls1: np.ndarray, controls2: np.ndarray, threshold: Optional[float] = None) -> float:
+    """
+    Compares two Bézier curves by the L2 distance between them, calculated from their control points alone.
+
+    :param controls1: The control points of the first curve.
+    :param controls2: The control points of the second curve.
+    :param threshold: The control point threshold of the sign. If given, returns infinity if the distance exceeds it.
+    :return: The L2 distance between the curves in pixels, or infinity if it exceeds the threshold.
+    """
+    distance = float(bezier_l2_distance(controls1, controls2))
+    if threshold is not None and distance > threshold:
+        return math.inf
     return distance
 
 
@@ -0,0 +1,241 @@
+"""
+Declarative region templates of the tap signs. The touchscreen does not detect the whole area of a tap, only a few
+individual points, hence a tap sign is recognised if all of its points fall into the region of the sign.
+
+A region is stored as JSON file in the sign directory and is one of
+    {"type": "circle", "center": [x, y], "radius": r}
+    {"type": "rectangle", "top_left": [x1, y1], "bottom_right": [x2, y2]}
+    {"type": "polygon", "vertices": [[x, y], ...]}
+    {"type": "union", "regions": [...]} or {"type": "intersection", "regions": [...]}
+The regions are packed into the template store with the templates of the other signs. Every region is loaded once per
+version of the store, with the bounding box of every shape precomputed, and all points are tested at once; points
+outside of the bounding box of a shape are rejected before the shape itself is tested.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import List, Dict, Union, Callable, Optional
+import numpy as np
+from recognition import timestamp_duration_valid
+from template_store import STORE_RELOAD_CALLBACKS, current_template_store
+from templates import PARAMETRIC_DIRECTORY
+
+# region of every tap sign relative to the parametric directory, and the maximum number of touch points of a tap
+TAP_SIGNS: Dict[str, Dict[str, Union[str, int]]] = {
+    'A': {'region': 'sign_a/region_template.json', 'max_points': 15},
+    'B': {'region': 'sign_b/region_template.json', 'max_points': 20},
+}
+
+
+def circle_contains(region: Dict, points: np.ndarray) -> np.ndarray:
+    """
+    Tests which points lie inside a circle, including its boundary.
+
+    :param region: The circle with 'center' and 'radius'.
+    :param points: The points as numpy array of shape (n, 2).
+    :return: A boolean numpy array of shape (n,).
+    """
+    return ((points - region['center']) ** 2).sum(axis=1) <= region['radius'] ** 2
+
+
+def rectangle_contains(region: Dict, points: np.ndarray) -> np.ndarray:
+    """
+    Tests which points lie inside an axis-aligned rectangle, including its boundary. The rectangle equals its
+    bounding box, which has already been tested.
+
+    :param region: The rectangle with 'top_left' and 'bottom_right'; y-values increase going down.
+    :param points: The points as numpy array of shape (n, 2).
+    :return: A boolean numpy array of shape (n,).
+    """
+    return np.ones(len(points), dtype=bool)
+
+
+def polygon_contains(region: Dict, points: np.ndarray) -> np.ndarray:
+    """
+    Tests which points lie inside a simple polygon with the even-odd rule, i.e. whether a ray from the point to the
+    right crosses the edges of the polygon an odd number of times.
+
+    :param region: The polygon with 'vertices' as numpy array of shape (k, 2).
+    :param points: The points as numpy array of shape (n, 2).
+    :return: A boolean numpy array of shape (n,).
+    """
+    start = region['vertices']
+    end = np.roll(start, -1, axis=0)
+    x, y = points[:, :1], points[:, 1:]
+
+    # edges that span the height of the point, and the x-coordinate at which they cross it
+    spans = (start[:, 1] > y) != (end[:, 1] > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = start[:, 0] + (y - start[:, 1]) * (end[:, 0] - start[:, 0]) / (end[:, 1] - start[:, 1])
+    return (spans & (x < crossing)).sum(axis=1) % 2 == 1
+
+
+def union_contains(region: Dict, points: np.ndarray) -> np.ndarray:
+    """
+    Tests which points lie inside any of the regions of a union.
+
+    :param region: The union with its 'regions'.
+    :param points: The points as numpy array of shape (n, 2).
+    :return: A boolean numpy array of shape (n,).
+    """
+    inside = np.zeros(len(points), dtype=bool)
+    for part in region['regions']:
+        # only tests the points that are not inside yet
+        outside = ~inside
+        inside[outside] = points_inside_region(part, points[outside])
+    return inside
+
+
+def intersection_contains(region: Dict, points: np.ndarray) -> np.ndarray:
+    """
+    Tests which points lie inside all regions of an intersection.
+
+    :param region: The intersection with its 'regions'.
+    :param points: The points as numpy array of shape (n, 2).
+    :return: A boolean numpy array of shape (n,).
+    """
+    inside = np.ones(len(points), dtype=bool)
+    for part in region['regions']:
+        # only tests the points that are still inside
+        inside[inside] = points_inside_region(part, points[inside])
+    return inside
+
+
+# test of every region type, given the points inside the bounding box of the region
+REGION_TESTS: Dict[str, Callable[[Dict, np.ndarray], np.ndarray]] = {
+    'circle': circle_contains,
+    'rectangle': rectangle_contains,
+    'polygon': polygon_contains,
+    'union': union_contains,
+    'intersection': intersection_contains,
+}
+
+
+def compile_region(spec: Dict) -> Dict:
+    """
+    Converts a region as stored in its JSON file into numpy arrays and precomputes the bounding box of the region and
+    all of its parts.
+
+    :param spec: The region as loaded from JSON.
+    :return: The region with numpy arrays and a 'bounding_box' of shape (2, 2) holding the minimum and maximum corner.
+    :raises ValueError: If the region type is unknown or a shape is degenerate.
+    """
+    region_type = spec.get('type')
+    if region_type not in REGION_TESTS:
+        raise ValueError(f"Unknown region type: {region_type}")
+    region = dict(spec)
+
+    if region_type == 'circle':
+        region['center'] = np.asarray(spec['center'], dtype=float)
+        region['bounding_box'] = np.stack([region['center'] - spec['radius'], region['center'] + spec['radius']])
+    elif region_type == 'rectangle':
+        region['bounding_box'] = np.sort(np.array([spec['top_left'], spec['bottom_right']], dtype=float), axis=0)
+    elif region_type == 'polygon':
+        region['vertices'] = np.asarray(spec['vertices'], dtype=float).reshape(-1, 2)
+        if len(region['vertices']) < 3:
+            raise ValueError("A polygon needs at least three vertices")
+        region['bounding_box'] = np.stack([region['vertices'].min(axis=0), region['vertices'].max(axis=0)])
+    else:
+        region['regions'] = [compile_region(part) for part in spec['regions']]
+        if not region['regions']:
+            raise ValueError(f"A {region_type} needs at least one region")
+        corners = np.stack([part['bounding_box'] for part in region['regions']])
+        if region_type == 'union':
+            region['bounding_box'] = np.stack([corners[:, 0].min(axis=0), corners[:, 1].max(axis=0)])
+        else:
+            # an empty intersection gets an inverted bounding box, which contains no point
+            region['bounding_box'] = np.stack([corners[:, 0].max(axis=0), corners[:, 1].min(axis=0)])
+
+    return region
+
+
+@lru_cache(maxsize=None)
+def load_region(path: str) -> Dict:
+    """
+    Loads and compiles a region template once per version of the template store, from the store if it contains the
+    region and otherwise from its JSON file.
+
+    :param path: The path of the JSON file of the region.
+    :return: The compiled region, see compile_region.
+    """
+    store = current_template_store()
+    if store is not None and store.key(path) in store.regions:
+        return compile_region(store.regions[store.key(path)])
+    with open(path) as file:
+        return compile_region(json.load(file))
+
+
+# loads the regions again from a new version of the template store
+STORE_RELOAD_CALLBACKS.append(load_region.cache_clear)
+
+
+def sign_region(sign: str, parametric_directory: str = PARAMETRIC_DIRECTORY) -> Dict:
+    """
+    Returns the compiled region of a tap sign.
+
+    :param sign: A string, indicating which sign is parsed; a key of TAP_SIGNS.
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: The compiled region, see compile_region.
+    """
+    return load_region(os.path.join(parametric_directory, TAP_SIGNS[sign]['region']))
+
+
+def points_inside_region(region: Dict, points: np.ndarray) -> np.ndarray:
+    """
+    Tests which points lie inside a region. Points outside of the bounding box are rejected before the shape itself
+    is tested.
+
+    :param region: The compiled region, see compile_region.
+    :param points: The points as numpy array of shape (n, 2).
+    :return: A boolean numpy array of shape (n,).
+    """
+    lower, upper = region['bounding_box']
+    inside = ((points >= lower) & (points <= upper)).all(axis=1)
+    if inside.all():
+        # avoids copying the points in the common case of a tap inside the bounding box
+        return REGION_TESTS[region['type']](region, points)
+    if inside.any():
+        inside[inside] = REGION_TESTS[region['type']](region, points[inside])
+    return inside
+
+
+def locations_inside_region(region: Dict, locations: Union[List[List[float]], np.ndarray]) -> bool:
+    """
+    Checks whether all locations lie inside a region.
+
+    :param region: The compiled region, see compile_region.
+    :param locations: A list of locations where each location is a list of x and y coordinates.
+    :return: True if all locations are inside the region, False otherwise.
+    """
+    points = np.asarray(locations, dtype=float).reshape(-1, 2)
+    return bool(points_inside_region(region, points).all())
+
+
+def is_tap_sign(sign: str, timestamps: List[float], locations: List[List[float]], duration: Optional[float] = None,
+                region: Optional[Dict] = None) -> bool:
+    """
+    Checks whether a touch event is a tap sign: the number of touch points does not exceed the maximum of the sign,
+    the duration is valid and all locations are inside the region of the sign.
+
+    :param sign: A string, indicating which sign is parsed; a key of TAP_SIGNS.
+    :param timestamps: List of timestamps
+    :param locations: List of locations where each location is a list of x and y coordinates
+    :param duration: The maximum duration of the sign, as preloaded by its recogniser; looked up if omitted.
+    :param region: The compiled region of the sign, as preloaded by its recogniser; loaded if omitted.
+    :return: True if the gesture satisfies all three conditions, False otherwise
+    """
+    if len(timestamps) > TAP_SIGNS[sign]['max_points']:
+        print("Too many touch points")
+        return False
+
+    if not timestamp_duration_valid(sign, timestamps, duration):
+        print("Duration too long")
+        return False
+
+    if region is None:
+        region = sign_region(sign)
+    if not locations_inside_region(region, locations):
+        print(f"Location not inside {region['type']}")
+        return False
+
+    return True
@@ -0,0 +1,141 @@
+"""
+Registry of the recognisers that the endpoint dispatches to by sign. The registry is built once at startup and again
+whenever a new version of the template store is swapped in: the template store is memory-mapped, and every recogniser
+is registered with its maximum duration and either its templates with their envelopes, pyramids, metric and thresholds
+or its tap region, which are passed to the recogniser on every call. The feature envelopes and point clouds are loaded
+into the caches of their modules, so that recognising a gesture does not touch the disk.
+"""
+import os
+from typing import List, Dict, Tuple, Callable, Optional
+from features import load_feature_envelopes
+from gesture import Gesture
+from matching import SignTemplates, load_sign_templates
+from point_cloud import sign_engine, template_cloud
+from recognition import DTW_THRESHOLDS, SIGN_DURATIONS, DEFAULT_DURATION
+from regions import TAP_SIGNS, sign_region
+from template_store import reload_template_store
+from templates import PARAMETRIC_DIRECTORY, SIGN_TEMPLATES, MULTI_CURVE_SIGNS
+from Parametric.sign_a.sign_a import is_sign_a
+from Parametric.sign_b.sign_b import is_sign_b
+from Parametric.sign_ch.sign_ch import is_sign_ch
+from Parametric.sign_g.sign_g import is_sign_g
+from Parametric.sign_h.sign_h import is_sign_h
+from Parametric.sign_j.sign_j import is_sign_j
+from Parametric.sign_ll.sign_ll import is_sign_ll
+from Parametric.sign_rr.sign_rr import is_sign_rr
+from Parametric.sign_v.sign_v import is_sign_v
+from Parametric.sign_w.sign_w import is_sign_w_three_curves
+from Parametric.sign_y.sign_y import is_sign_y
+from Parametric.sign_z.sign_z import is_sign_z_cubic
+from Parametric.sign_ñ.sign_ñ import is_sign_ñ_single_curve
+
+# recogniser of every sign served by the endpoint, and whether it separates the fingers by their touch identifiers,
+# which only the multi-curve recognisers of multi_curve.py do
+SIGN_RECOGNISERS: Dict[str, Tuple[Callable[..., bool], bool]] = {
+    'A': (is_sign_a, False),
+    'B': (is_sign_b, False),
+    'CH': (is_sign_ch, True),
+    'G': (is_sign_g, False),
+    'H': (is_sign_h, False),
+    'J': (is_sign_j, False),
+    'LL': (is_sign_ll, True),
+    'Ñ': (is_sign_ñ_single_curve, False),
+    'RR': (is_sign_rr, True),
+    'V': (is_sign_v, True),
+    'W': (is_sign_w_three_curves, True),
+    'Y': (is_sign_y, False),
+    'Z': (is_sign_z_cubic, False),
+}
+
+
+class Recogniser:
+    """
+    The recogniser of a sign together with the data it works with, which is loaded when the recogniser is built and
+    passed to the recogniser on every call.
+    """
+    __slots__ = ('sign', 'function', 'uses_touch_ids', 'duration', 'templates', 'region')
+
+    def __init__(self, sign: str, function: Callable[..., bool], uses_touch_ids: bool, duration: float,
+                 templates: Optional[SignTemplates] = None, region: Optional[Dict] = None):
+        """
+        :param sign: The sign.
+        :param function: The recogniser, called with the timestamps and locations of a gesture.
+        :param uses_touch_ids: Whether the recogniser is also passed the touch identifiers of the gesture.
+        :param duration: The maximum duration of the sign in seconds.
+        :param templates: The templates of the recogniser with their metric and thresholds; None for tap signs.
+        :param region: The compiled region of a tap sign; None for the other signs.
+        """
+        self.sign = sign
+        self.function = function
+        self.uses_touch_ids = uses_touch_ids
+        self.duration = duration
+        self.templates = templates
+        self.region = region
+
+    def __call__(self, gesture: Gesture) -> bool:
+        """
+        Checks whether a gesture matches the sign.
+
+        :param gesture: The gesture.
+        :return: True if the gesture matches the sign, False otherwise.
+        """
+        data = {'region': self.region} if self.sign in TAP_SIGNS else {'templates': self.templates}
+        if self.uses_touch_ids:
+            return self.function(gesture.timestamps, gesture.locations, gesture.touch_ids, duration=self.duration,
+                                 **data)
+        return self.function(gesture.timestamps, gesture.locations, duration=self.duration, **data)
+
+
+def recogniser_templates(sign: str, parametric_directory: str = PARAMETRIC_DIRECTORY) -> SignTemplates:
+    """
+    Loads the templates of the recogniser of a sign with its metric and thresholds, from MULTI_CURVE_SIGNS for the
+    multi-curve recognisers and from SIGN_TEMPLATES and DTW_THRESHOLDS otherwise.
+
+    :param sign: The sign; a key of SIGN_RECOGNISERS that is no tap sign.
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: The templates with their metric and thresholds.
+    """
+    if SIGN_RECOGNISERS[sign][1]:
+        template_paths = MULTI_CURVE_SIGNS[sign]['templates']
+        dtw_thresholds = MULTI_CURVE_SIGNS[sign]['thresholds']
+    else:
+        template_paths = SIGN_TEMPLATES[sign]['templates']
+        dtw_thresholds = [DTW_THRESHOLDS[sign]] * len(template_paths)
+    return load_sign_templates(sign, [os.path.join(parametric_directory, path) for path in template_paths],
+                               dtw_thresholds)
+
+
+def build_recogniser(sign: str, parametric_directory: str = PARAMETRIC_DIRECTORY) -> Recogniser:
+    """
+    Builds the recogniser of a sign and loads everything it reads from disk.
+
+    :param sign: The sign; a key of SIGN_RECOGNISERS.
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: The recogniser.
+    """
+    function, uses_touch_ids = SIGN_RECOGNISERS[sign]
+    duration = SIGN_DURATIONS.get(sign, DEFAULT_DURATION)
+
+    if sign in TAP_SIGNS:
+        return Recogniser(sign, function, uses_touch_ids, duration, region=sign_region(sign, parametric_directory))
+
+    # the point cloud is cached under the same arguments with which the recogniser requests it
+    if sign_engine(sign) == 'point_cloud':
+        template_cloud(sign)
+
+    return Recogniser(sign, function, uses_touch_ids, duration, recogniser_templates(sign, parametric_directory))
+
+
+def build_registry(parametric_directory: str = PARAMETRIC_DIRECTORY,
+                   signs: Optional[List[str]] = None) -> Dict[str, Recogniser]:
+    """
+    Builds the recognisers of all signs, to be called once at startup. Loads the template store of the directory if
+    it has one and it is not loaded yet.
+
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :param signs: The signs to register; all signs of SIGN_RECOGNISERS if omitted.
+    :return: A dictionary mapping each sign to its recogniser.
+    """
+    reload_template_store(parametric_directory)
+    load_feature_envelopes()
+    return {sign: build_recogniser(sign, parametric_directory) for sign in (signs or SIGN_RECOGNISERS)}
@@ -0,0 +1,169 @@
+"""
+Functions to segment the touch points of a multi-curve gesture into its curves. Points are grouped by the touch
+identifier of the client if available, by gaps between their timestamps for strokes drawn one after the other, and
+otherwise by nearest-track assignment of simultaneous fingers, whose points arrive interleaved.
+"""
+from typing import List, Tuple, Dict, Union, Optional
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+from extraction import split_touch_locations_two_curves, split_touch_locations_three_curves
+
+# number of curves and maximum distance in pixels between consecutive points of one finger per multi-curve sign
+SIGN_SEGMENTATION: Dict[str, Dict[str, Union[int, float]]] = {
+    'CH': {'num_curves': 2, 'threshold': 10},
+    # both curves are far from each other for LL
+    'LL': {'num_curves': 2, 'threshold': 100},
+    # curves are closer together
+    'Ñ': {'num_curves': 2, 'threshold': 20},
+    'RR': {'num_curves': 2, 'threshold': 50},
+    'V': {'num_curves': 2, 'threshold': 50},
+    'W': {'num_curves': 3, 'threshold': 25},
+}
+
+# minimum pause in seconds between two strokes that are drawn one after the other
+MIN_TIME_GAP = 0.15
+# number of preceding points per curve in which the next point of the same finger is searched; simultaneous fingers
+# are reported alternately, but the touchscreen occasionally reports several points of one finger in a row
+TRACK_WINDOW_PER_CURVE = 8
+# minimum number of points of a curve, which also keeps the touch points of a hesitant first touch from being
+# mistaken for a stroke of their own
+MIN_CURVE_POINTS = 5
+
+
+def _order_by_first_point(labels: np.ndarray) -> List[np.ndarray]:
+    """
+    Groups point indices by their label, ordered by the first point of each group.
+
+    :param labels: The group label of every point as numpy array of shape (n,).
+    :return: A list of sorted index arrays, one per group.
+    """
+    _, first_indices, inverse, counts = np.unique(labels, return_index=True, return_inverse=True, return_counts=True)
+    # stable sort keeps the points of each group in their original order
+    groups = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+    return [groups[group] for group in np.argsort(first_indices)]
+
+
+def _is_complete(segments: List[np.ndarray], num_curves: int) -> bool:
+    """
+    Checks whether a segmentation yields the curves of a sign.
+
+    :param segments: A list of index arrays, one per segment.
+    :param num_curves: The number of curves of the sign.
+    :return: True if there are num_curves segments with at least MIN_CURVE_POINTS points each, False otherwise.
+    """
+    return len(segments) == num_curves and all(len(segment) >= MIN_CURVE_POINTS for segment in segments)
+
+
+def segment_by_touch_id(touch_ids: np.ndarray) -> List[np.ndarray]:
+    """
+    Segments touch points by the touch identifier that the client assigns to every finger.
+
+    :param touch_ids: The touch identifier of every point as numpy array of shape (n,).
+    :return: A list of index arrays, one per finger, ordered by the first touch of the finger.
+    """
+    return _order_by_first_point(np.asarray(touch_ids))
+
+
+def segment_by_time_gap(timestamps: np.ndarray, min_gap: float = MIN_TIME_GAP) -> List[np.ndarray]:
+    """
+    Segments touch points into strokes wherever the time between two consecutive points exceeds min_gap.
+
+    :param timestamps: The timestamps as numpy array of shape (n,).
+    :param min_gap: The minimum pause in seconds between two strokes.
+    :return: A list of index arrays, one per stroke, in temporal order.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    breaks = np.flatnonzero(np.diff(timestamps) > min_gap) + 1
+    return np.split(np.arange(len(timestamps)), breaks)
+
+
+def segment_by_nearest_track(locations: np.ndarray, num_curves: int, threshold: float,
+                             window: Optional[int] = None) -> List[np.ndarray]:
+    """
+    Segments the interleaved touch points of simultaneous fingers. Two points belong to the same track if they are at
+    most threshold pixels apart and at most window points apart in the sequence; the pairs are found by comparing
+    every point with its window preceding points, and the tracks are the connected components of the resulting graph.
+    The num_curves largest tracks form the curves, and the points of smaller tracks are assigned to the curve with the
+    nearest point.
+
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :param num_curves: The number of curves of the gesture.
+    :param threshold: The maximum distance in pixels between consecutive points of one finger.
+    :param window: The maximum distance in the sequence between consecutive points of one finger. Defaults to
+    TRACK_WINDOW_PER_CURVE points per curve.
+    :return: A list of num_curves index arrays, ordered by the first point of each curve.
+    """
+    locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+    num_points = len(locations)
+    if window is None:
+        window = TRACK_WINDOW_PER_CURVE * num_curves
+
+    # pairs of points close in the sequence that are also close in space, compared lag by lag, which is linear in the
+    # number of points however densely they lie
+    starts, ends = [], []
+    for lag in range(1, min(window, num_points - 1) + 1):
+        close = np.flatnonzero(np.linalg.norm(locations[lag:] - locations[:-lag], axis=1) <= threshold)
+        starts.append(close)
+        ends.append(close + lag)
+    starts = np.concatenate(starts) if starts else np.zeros(0, dtype=int)
+    ends = np.concatenate(ends) if ends else np.zeros(0, dtype=int)
+
+    # connected components of the graph of close pairs are the tracks
+    graph = coo_matrix((np.ones(len(starts)), (starts, ends)), shape=(num_points, num_points))
+    num_tracks, labels = connected_components(graph, directed=False)
+    if num_tracks < num_curves:
+        raise ValueError(f"Found {num_tracks} of {num_curves} curves")
+
+    # assigns the points of small tracks, e.g. stray touches, to the largest track with the nearest point
+    largest = np.argsort(np.bincount(labels, minlength=num_tracks), kind='stable')[::-1][:num_curves]
+    in_largest = np.isin(labels, largest)
+    if not np.all(in_largest):
+        _, nearest = cKDTree(locations[in_largest]).query(locations[~in_largest])
+        labels[~in_largest] = labels[in_largest][nearest]
+
+    return _order_by_first_point(labels)
+
+
+def segment_curves(sign: str, timestamps: np.ndarray, locations: np.ndarray,
+                   touch_ids: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Splits the touch locations of a multi-curve sign into its curves. Touch identifiers are used if they distinguish
+    exactly as many fingers as the sign has curves, then timestamp gaps if they yield exactly as many strokes of
+    MIN_CURVE_POINTS or more points, and otherwise nearest-track assignment. If the tracks of the fingers touch, the
+    sequential split of the extraction module is used as last resort.
+
+    :param sign: A string indicating which sign is parsed.
+    :param timestamps: The timestamps as numpy array of shape (n,).
+    :param locations: The touch locations as numpy array of shape (n, 2).
+    :param touch_ids: Optional touch identifier of every point as numpy array of shape (n,).
+    :return: A tuple of curves, each a numpy array of touch locations, ordered by their first point.
+    """
+    num_curves = SIGN_SEGMENTATION[sign]['num_curves']
+    threshold = SIGN_SEGMENTATION[sign]['threshold']
+    locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+
+    # uses the touch identifiers of the client
+    if touch_ids is not None:
+        segments = segment_by_touch_id(touch_ids)
+        if _is_complete(segments, num_curves):
+            return tuple(locations[segment] for segment in segments)
+
+    # splits strokes drawn one after the other
+    segments = segment_by_time_gap(timestamps)
+    if _is_complete(segments, num_curves):
+        return tuple(locations[segment] for segment in segments)
+
+    # separates simultaneous fingers
+    try:
+        return tuple(locations[segment] for segment in segment_by_nearest_track(locations, num_curves, threshold))
+    except ValueError:
+        pass
+
+    # assigns the points one by one to the curve with the closest last point
+    if num_curves == 2:
+        curves = split_touch_locations_two_curves(sign, locations)
+    else:
+        curves = split_touch_locations_three_curves(locations)
+    return tuple(np.asarray(curve, dtype=float).reshape(-1, 2) for curve in curves)
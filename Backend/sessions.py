@@ -0,0 +1,108 @@
+"""
+Per-client sessions of signs that are drawn in several strokes, each sent as a separate request, e.g. the two lines of
+sign 'Y'. Every stroke is recognised on its own and answered immediately; the session of the client collects the
+correct strokes until the sign is complete. A session expires if the next stroke does not arrive within the join
+window of the sign. The deadlines are kept in a heap and expired sessions are removed whenever a stroke arrives, so
+that no thread waits for a stroke.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import List, Dict, Tuple, Callable, Union
+
+# number of strokes of every multi-stroke sign and the seconds within which the next stroke needs to arrive
+MULTI_STROKE_SIGNS: Dict[str, Dict[str, Union[int, float]]] = {
+    'Y': {'strokes': 2, 'join_window': 2.0},
+}
+
+
+class StrokeSession:
+    """
+    The correct strokes of a multi-stroke sign that one client has sent so far.
+    """
+    __slots__ = ('identifier', 'sign', 'strokes', 'deadline')
+
+    def __init__(self, identifier: int, sign: str, deadline: float):
+        """
+        :param identifier: The number of the session, which tells it apart from a later session of the same client.
+        :param sign: The sign.
+        :param deadline: The time at which the session expires, on the clock of the store.
+        """
+        self.identifier = identifier
+        self.sign = sign
+        self.strokes = 0
+        self.deadline = deadline
+
+
+class SessionStore:
+    """
+    Sessions of multi-stroke signs keyed by client, with a heap of their deadlines. The heap may hold outdated
+    deadlines of sessions that were extended or closed, which are skipped when they are popped.
+    """
+    __slots__ = ('clock', '_sessions', '_deadlines', '_identifiers', '_lock')
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        :param clock: The clock of the deadlines in seconds, replaceable for tests.
+        """
+        self.clock = clock
+        self._sessions: Dict[str, StrokeSession] = {}
+        self._deadlines: List[Tuple[float, int, str]] = []
+        self._identifiers = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float) -> int:
+        # removes the sessions whose deadline has passed; needs to be called with the lock held
+        expired = 0
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, identifier, client = heapq.heappop(self._deadlines)
+            session = self._sessions.get(client)
+            if session is not None and session.identifier == identifier and session.deadline == deadline:
+                del self._sessions[client]
+                expired += 1
+        return expired
+
+    def expire(self) -> int:
+        """
+        Removes the sessions whose join window has passed.
+
+        :return: The number of removed sessions.
+        """
+        with self._lock:
+            return self._expire(self.clock())
+
+    def add_stroke(self, client: str, sign: str, correct: bool) -> int:
+        """
+        Adds a recognised stroke of a multi-stroke sign to the session of a client. An incorrect stroke discards the
+        session, and a stroke of another sign or after the join window starts a new one. The session is closed as soon
+        as it holds all strokes of the sign.
+
+        :param client: The identifier of the client.
+        :param sign: The sign; a key of MULTI_STROKE_SIGNS.
+        :param correct: Whether the stroke was recognised as a stroke of the sign.
+        :return: The number of correct strokes of the session including this one, 0 if the stroke was incorrect.
+        """
+        spec = MULTI_STROKE_SIGNS[sign]
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            session = self._sessions.get(client)
+
+            if not correct:
+                self._sessions.pop(client, None)
+                return 0
+            if session is None or session.sign != sign:
+                session = StrokeSession(next(self._identifiers), sign, now)
+                self._sessions[client] = session
+
+            session.strokes += 1
+            if session.strokes >= spec['strokes']:
+                del self._sessions[client]
+            else:
+                session.deadline = now + spec['join_window']
+                heapq.heappush(self._deadlines, (session.deadline, session.identifier, client))
+            return session.strokes
@@ -0,0 +1,287 @@
+"""
+A packed bank of several templates per sign and stroke, e.g. fitted from the recordings of different users. All
+template curves are held as one contiguous array together with their envelopes and per-template metadata. The bank is
+read from the template store, see template_store.py: the template files of SIGN_TEMPLATES are in the store anyway, and
+the curves fitted from recordings are packed into it under BANK_KEY_PREFIX, so that the bank is reloaded together with
+all other templates.
+
+Within each sign and stroke, the templates are indexed by a KD-tree over a coarse embedding of their curves, i.e. the
+curve reduced to EMBEDDING_NUM_POINTS points. A query takes the NUM_CANDIDATES templates nearest to the user curve in
+this embedding, in logarithmic time, and only these are passed to nearest_template, which compares them exactly. No
+lower bound of the banded Dynamic Time Warping distance is tight enough to be indexed, so the search is approximate;
+Parametric/Benchmarks/benchmark_template_bank.py reports how often it agrees with the exhaustive search.
+"""
+import glob
+import json
+import os
+from typing import List, Dict, Tuple, Optional, Sequence
+import numpy as np
+from scipy.spatial import cKDTree
+from extraction import extract_timestamps_and_locations
+from matching import template_envelope, nearest_template, MATCH_STATISTICS
+from parameterisation import fit_bezier_batch, evaluate_bezier
+from recognition import curve_pyramid, downsample_curve, dtw_distance
+from template_store import TemplateStore, current_template_store
+from templates import PARAMETRIC_DIRECTORY, SIGN_TEMPLATES, BANK_KEY_PREFIX, split_recording, save_template_store
+
+# number of points of the coarse curves that index the templates
+EMBEDDING_NUM_POINTS = 8
+
+# number of templates nearest in the embedding that are compared exactly
+NUM_CANDIDATES = 32
+
+# recordings whose curves are closer than this Dynamic Time Warping distance to a template of the bank are not added
+DUPLICATE_THRESHOLD = 100.0
+
+
+def curve_embedding(curves: np.ndarray) -> np.ndarray:
+    """
+    Maps curves to the flat vector of their coarse curve with EMBEDDING_NUM_POINTS points.
+
+    :param curves: A curve as numpy array of shape (n, 2), or curves of shape (t, n, 2).
+    :return: A numpy array of shape (2 * EMBEDDING_NUM_POINTS,) or (t, 2 * EMBEDDING_NUM_POINTS).
+    """
+    curves = np.asarray(curves, dtype=float)
+    if curves.ndim == 2:
+        return downsample_curve(curves, EMBEDDING_NUM_POINTS).ravel()
+    return np.stack([downsample_curve(curve, EMBEDDING_NUM_POINTS).ravel() for curve in curves]) if len(curves) \
+        else np.empty((0, 2 * EMBEDDING_NUM_POINTS))
+
+
+class TemplateBank:
+    """
+    Template curves of all signs with their envelopes, pyramids and metadata. The arrays are read-only and shared
+    between all requests; the templates of one sign and stroke are selected with an index array.
+    """
+    __slots__ = ('curves', 'envelopes', 'pyramids', 'signs', 'strokes', 'degrees', 'sources', '_groups')
+
+    def __init__(self, curves: np.ndarray, signs: Sequence[str], strokes: Sequence[int], degrees: Sequence[int],
+                 sources: Sequence[str], envelopes: Optional[np.ndarray] = None):
+        """
+        :param curves: The template curves as numpy array of shape (t, n, 2).
+        :param signs: The sign of every template.
+        :param strokes: The index of the stroke of its sign that every template describes.
+        :param degrees: The Bézier degree of every template.
+        :param sources: The template file or recording that every template was fitted from.
+        :param envelopes: The envelopes of the templates as numpy array of shape (t, 2, n, 2). Calculated if omitted.
+        """
+        self.curves = np.ascontiguousarray(curves, dtype=float).reshape(len(signs), -1, 2)
+        if envelopes is None:
+            envelopes = np.stack([template_envelope(curve) for curve in self.curves]) if len(self.curves) \
+                else np.empty((0, 2) + self.curves.shape[1:])
+        self.envelopes = np.ascontiguousarray(envelopes, dtype=float)
+        self.signs = np.asarray(signs, dtype=str)
+        self.strokes = np.asarray(strokes, dtype=np.int16)
+        self.degrees = np.asarray(degrees, dtype=np.int8)
+        self.sources = np.asarray(sources, dtype=str)
+
+        # builds the pyramids of all templates at once, as all templates have the same length
+        levels = [curve_pyramid(curve) for curve in self.curves]
+        self.pyramids = {num_points: np.stack([pyramid[num_points] for pyramid in levels])
+                         for num_points in (levels[0] if levels else {})}
+        for array in [self.curves, self.envelopes, self.signs, self.strokes, self.degrees, self.sources,
+                      *self.pyramids.values()]:
+            array.setflags(write=False)
+
+        # indexes the templates of every sign and stroke by their embedding
+        self._groups: Dict[Tuple[str, int], Tuple[np.ndarray, cKDTree]] = {}
+        for sign, stroke in sorted(set(zip(self.signs.tolist(), self.strokes.tolist()))):
+            indices = np.flatnonzero((self.signs == sign) & (self.strokes == stroke))
+            self._groups[(sign, stroke)] = (indices, cKDTree(curve_embedding(self.curves[indices])))
+
+    def __len__(self) -> int:
+        return len(self.curves)
+
+    def num_strokes(self, sign: str) -> int:
+        """
+        Returns the number of strokes of a sign, i.e. the number of curves of its gestures.
+
+        :param sign: The sign.
+        :return: The number of strokes, 0 if the bank has no templates of the sign.
+        """
+        return sum(1 for group_sign, _ in self._groups if group_sign == sign)
+
+    def templates(self, sign: str, stroke: int = 0) -> np.ndarray:
+        """
+        Returns the indices of all templates of a stroke of a sign.
+
+        :param sign: The sign.
+        :param stroke: The index of the stroke.
+        :return: The indices into the arrays of the bank.
+        """
+        return self._groups[(sign, stroke)][0] if (sign, stroke) in self._groups else np.empty(0, dtype=int)
+
+    def nearest(self, sign: str, curve: np.ndarray, threshold: float, stroke: int = 0,
+                num_candidates: Optional[int] = NUM_CANDIDATES, metric: str = 'dtw') \
+            -> Tuple[int, float, Dict[str, int]]:
+        """
+        Finds the template of a stroke of a sign with the smallest distance to the curve, if it is within the
+        threshold. Only the templates nearest in the embedding are compared, see the module docstring.
+
+        :param sign: The sign.
+        :param curve: The user curve as numpy array of shape (n, 2).
+        :param threshold: The threshold of the stroke on the scale of the metric.
+        :param stroke: The index of the stroke.
+        :param num_candidates: The number of templates that are compared exactly, or None to compare all templates.
+        :param metric: The name of the metric in recognition.CURVE_METRICS.
+        :return: The index of the nearest template into the arrays of the bank, or -1 if no template is within the
+        threshold, its distance, and the number of templates pruned by the index and by nearest_template.
+        """
+        if (sign, stroke) not in self._groups:
+            return -1, np.inf, {'candidates': 0, 'pruned_index': 0}
+        indices, tree = self._groups[(sign, stroke)]
+        candidates = indices
+        if num_candidates is not None and len(indices) > num_candidates:
+            candidates = indices[np.sort(tree.query(curve_embedding(curve), k=num_candidates)[1])]
+
+        statistics = {'candidates': len(indices), 'pruned_index': len(indices) - len(candidates)}
+        pyramids = {num_points: level[candidates] for num_points, level in self.pyramids.items()}
+        best, distance, matched = nearest_template(curve, self.curves[candidates], self.envelopes[candidates],
+                                                   threshold, pyramids, metric)
+        statistics.update({key: value for key, value in matched.items() if key != 'candidates'})
+        MATCH_STATISTICS['pruned_index'] += statistics['pruned_index']
+        return (int(candidates[best]) if best >= 0 else -1), distance, statistics
+
+    def match(self, sign: str, curves: Sequence[np.ndarray], thresholds: Sequence[float], metric: str = 'dtw') \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Assigns every user curve of a gesture to the stroke of the sign with the nearest template, relative to the
+        threshold of the stroke.
+
+        :param sign: The sign.
+        :param curves: The user curves, each a numpy array of shape (n, 2).
+        :param thresholds: The threshold of every stroke of the sign on the scale of the metric.
+        :param metric: The name of the metric in recognition.CURVE_METRICS.
+        :return: The stroke of every curve, -1 if no template is within the threshold, and the distances, infinity if
+        no template is within the threshold.
+        """
+        strokes, distances = np.full(len(curves), -1), np.full(len(curves), np.inf)
+        for position, curve in enumerate(curves):
+            # the distance of the best stroke so far relative to its threshold bounds the search of the other strokes
+            ratio = 1.0
+            for stroke in range(self.num_strokes(sign)):
+                index, distance, _ = self.nearest(sign, curve, thresholds[stroke] * ratio, stroke, metric=metric)
+                if index >= 0:
+                    strokes[position], distances[position] = stroke, distance
+                    ratio = distance / thresholds[stroke] if thresholds[stroke] > 0 else 0.0
+        return strokes, distances
+
+    def store_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the curves that are not template files of SIGN_TEMPLATES, keyed for the template store, see
+        BANK_KEY_PREFIX.
+
+        :return: The curves keyed by sign, stroke and source.
+        """
+        template_paths = {path for templates in SIGN_TEMPLATES.values() for path in templates['templates']}
+        return {f'{BANK_KEY_PREFIX}{sign}/{stroke}/{source}': curve
+                for curve, sign, stroke, source in zip(self.curves, self.signs.tolist(), self.strokes.tolist(),
+                                                       self.sources.tolist()) if source not in template_paths}
+
+    @classmethod
+    def from_store(cls, store: TemplateStore) -> 'TemplateBank':
+        """
+        Builds the bank from a version of the template store: the template files of SIGN_TEMPLATES in the store,
+        followed by the curves of each sign that were packed by store_arrays.
+
+        :param store: The template store.
+        :return: The template bank.
+        """
+        recordings: Dict[str, List[Tuple[int, str]]] = {}
+        for key in store.entries:
+            if key.startswith(BANK_KEY_PREFIX):
+                sign, stroke, source = key[len(BANK_KEY_PREFIX):].split('/', 2)
+                recordings.setdefault(sign, []).append((int(stroke), source))
+
+        curves, signs, strokes, degrees, sources = [], [], [], [], []
+        for sign, templates in SIGN_TEMPLATES.items():
+            entries = [(stroke, path, path) for stroke, path in enumerate(templates['templates']) if path in store]
+            entries += [(stroke, f'{BANK_KEY_PREFIX}{sign}/{stroke}/{source}', source)
+                        for stroke, source in recordings.get(sign, [])]
+            for stroke, key, source in entries:
+                curves.append(store.array(key))
+                signs.append(sign)
+                strokes.append(stroke)
+                degrees.append(templates['degree'])
+                sources.append(source)
+        return cls(np.array(curves), signs, strokes, degrees, sources)
+
+
+def recording_paths(directory: str, sign: str) -> List[str]:
+    """
+    Lists the recordings of a sign in a directory, i.e. 'data_<sign>.json' and any 'data_<sign>_*.json', for example
+    'data_rr.json' and 'data_rr_user2.json'.
+
+    :param directory: The directory of the recordings.
+    :param sign: The sign.
+    :return: The sorted paths of the recordings.
+    """
+    name = sign.lower()
+    return sorted(glob.glob(os.path.join(directory, f'data_{name}.json'))
+                  + glob.glob(os.path.join(directory, f'data_{name}_*.json')))
+
+
+def build_template_bank(parametric_directory: str = PARAMETRIC_DIRECTORY,
+                        recording_directories: Sequence[str] = ()) -> TemplateBank:
+    """
+    Builds the template bank from the template files of SIGN_TEMPLATES and from every recording of the signs, both in
+    the sign directories and in the given directories. Each recording is split into the strokes of its sign and fitted
+    with the degree of its recogniser; curves that duplicate a template of the bank are skipped.
+
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :param recording_directories: Further directories with recordings of several signs, e.g. one per user.
+    :return: The template bank.
+    """
+    curves, signs, strokes, degrees, sources = [], [], [], [], []
+
+    def add(curve: np.ndarray, sign: str, stroke: int, degree: int, source: str):
+        # skips curves that are already represented by a template of the same stroke
+        for index in range(len(curves)):
+            if signs[index] == sign and strokes[index] == stroke \
+                    and dtw_distance(curve, curves[index], threshold=DUPLICATE_THRESHOLD) <= DUPLICATE_THRESHOLD:
+                return
+        curves.append(curve)
+        signs.append(sign)
+        strokes.append(stroke)
+        degrees.append(degree)
+        sources.append(source)
+
+    for sign, templates in SIGN_TEMPLATES.items():
+        for stroke, path in enumerate(templates['templates']):
+            add(np.load(os.path.join(parametric_directory, path)), sign, stroke, templates['degree'], path)
+
+        directories = [os.path.join(parametric_directory, f'sign_{sign.lower()}'), *recording_directories]
+        for path in [path for directory in directories for path in recording_paths(directory, sign)]:
+            with open(path) as file:
+                _, locations = extract_timestamps_and_locations(json.load(file))
+            controls = fit_bezier_batch(split_recording(sign, locations), degree=templates['degree'])
+            for stroke, curve in enumerate(evaluate_bezier(controls)):
+                add(curve, sign, stroke, templates['degree'], os.path.relpath(path, parametric_directory))
+
+    return TemplateBank(np.array(curves), signs, strokes, degrees, sources)
+
+
+def load_template_bank(parametric_directory: str = PARAMETRIC_DIRECTORY) -> TemplateBank:
+    """
+    Loads the template bank from the template store that is currently served, or from the store of the parametric
+    directory if another or none is served.
+
+    :param parametric_directory: The 'Parametric' directory that contains the template store.
+    :return: The template bank.
+    :raises FileNotFoundError: If the directory has no template store.
+    """
+    store = current_template_store()
+    if store is None or os.path.abspath(store.directory) != os.path.abspath(parametric_directory):
+        store = TemplateStore.load(parametric_directory)
+    return TemplateBank.from_store(store)
+
+
+# builds the template bank from the recordings of the sign directories and of the directories given as arguments,
+# e.g. `python template_bank.py recordings/user1 recordings/user2`, and writes it into a new version of the template
+# store; needs to be executed again after recording
+if __name__ == '__main__':
+    import sys
+    bank = build_template_bank(recording_directories=sys.argv[1:])
+    save_template_store(bank_arrays=bank.store_arrays())
+    for bank_sign in sorted(set(bank.signs.tolist())):
+        print(bank_sign, [len(bank.templates(bank_sign, stroke)) for stroke in range(bank.num_strokes(bank_sign))])
@@ -0,0 +1,206 @@
+"""
+Versioned store of all templates of the parametric signs: the sampled template curves, their envelopes and Bézier
+control points, the curves that the frontend displays, the further templates of the template bank, the threshold of
+every template with its metric and the region templates of the tap signs. All arrays are packed into one raw float64
+.npy file per version, which is memory-mapped read-only, so that the server reads no template file at startup and
+several worker processes share the same pages. The metadata index, a JSON file next to it, records the version, the
+data file and the offset and shape of every array, keyed by the path of the file the array was packed from relative to
+the parametric directory, e.g. 'sign_g/bezier_curve_template.npy'.
+
+A new version is written to a new data file before the index is replaced, which is atomic. The server polls the index
+and swaps in the new store with a single assignment, so that requests never wait for a lock: a request that started
+with the previous store keeps its arrays, and modules that cache arrays of the store are notified to clear their
+caches. The store is built by templates.save_template_store.
+"""
+import json
+import os
+import threading
+from typing import List, Dict, Optional, Callable, Tuple, Union
+import numpy as np
+
+# metadata index of the template store within the parametric directory
+TEMPLATE_STORE_INDEX = 'template_store.json'
+# name of the data file of a version
+TEMPLATE_STORE_DATA = 'template_store_v{version}.npy'
+
+# seconds between two checks of the index for a new version
+STORE_RELOAD_INTERVAL = 1.0
+
+# functions called after a new version is swapped in, e.g. to clear caches of arrays of the previous version
+STORE_RELOAD_CALLBACKS: List[Callable[[], None]] = []
+
+
+class TemplateStore:
+    """
+    One version of the template store with its memory-mapped data.
+    """
+    __slots__ = ('directory', 'version', 'data', 'entries', 'thresholds', 'regions', 'modified')
+
+    def __init__(self, directory: str, version: int, data: np.ndarray, entries: Dict[str, Dict],
+                 thresholds: Dict[str, Dict[str, Union[str, float]]], regions: Optional[Dict[str, Dict]] = None,
+                 modified: float = 0.0):
+        """
+        :param directory: The parametric directory, to which the keys are relative.
+        :param version: The version of the store.
+        :param data: The packed arrays as flat float64 array, usually memory-mapped.
+        :param entries: The offset and shape of every array, keyed by the relative path of its source file.
+        :param thresholds: The metric and threshold of every template that a recogniser compares with, keyed by the
+        relative path of the template file.
+        :param regions: The region templates of the tap signs as stored in their JSON files, keyed by the relative path
+        of the file.
+        :param modified: The modification time of the index that the store was loaded from.
+        """
+        self.directory = directory
+        self.version = version
+        self.data = data
+        self.entries = entries
+        self.thresholds = thresholds
+        self.regions = regions or {}
+        self.modified = modified
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def key(self, path: str) -> str:
+        """
+        Returns the key of a file within the parametric directory.
+
+        :param path: The absolute or relative path of the file.
+        :return: The path relative to the parametric directory, with forward slashes.
+        """
+        return os.path.relpath(os.path.abspath(path), self.directory).replace(os.sep, '/')
+
+    def array(self, key: str) -> Optional[np.ndarray]:
+        """
+        Returns a read-only view of an array of the store, without copying it.
+
+        :param key: The relative path of the source file of the array.
+        :return: The array, or None if the store does not contain it.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        size = int(np.prod(entry['shape']))
+        return self.data[entry['offset']:entry['offset'] + size].reshape(entry['shape'])
+
+    @classmethod
+    def load(cls, directory: str) -> 'TemplateStore':
+        """
+        Loads the current version of the store of a directory and memory-maps its data.
+
+        :param directory: The parametric directory.
+        :return: The template store.
+        :raises FileNotFoundError: If the directory has no template store.
+        """
+        index_path = os.path.join(directory, TEMPLATE_STORE_INDEX)
+        modified = os.stat(index_path).st_mtime
+        with open(index_path) as file:
+            index = json.load(file)
+        # a plain read-only view of the mapped file, which stays mapped as long as any array of the store is used
+        data = np.asarray(np.load(os.path.join(directory, index['data_file']), mmap_mode='r'))
+        return cls(directory, index['version'], data, index['entries'], index['thresholds'], index.get('regions', {}),
+                   modified)
+
+
+def write_template_store(directory: str, arrays: Dict[str, np.ndarray],
+                         thresholds: Dict[str, Dict[str, Union[str, float]]],
+                         regions: Optional[Dict[str, Dict]] = None) -> int:
+    """
+    Writes a new version of the store: the packed data file first, then the index, which replaces the previous one
+    atomically. Data files of versions older than the previous one are removed.
+
+    :param directory: The parametric directory.
+    :param arrays: The arrays to store, keyed by the relative path of their source file.
+    :param thresholds: The metric and threshold of every template that a recogniser compares with, keyed by the
+    relative path of the template file.
+    :param regions: The region templates of the tap signs, keyed by the relative path of their JSON file.
+    :return: The new version.
+    """
+    index_path = os.path.join(directory, TEMPLATE_STORE_INDEX)
+    previous = 0
+    if os.path.exists(index_path):
+        with open(index_path) as file:
+            previous = json.load(file)['version']
+    version = previous + 1
+
+    entries, offset = {}, 0
+    for key, array in arrays.items():
+        entries[key] = {'offset': offset, 'shape': list(np.shape(array))}
+        offset += int(np.size(array))
+    data = np.concatenate([np.asarray(array, dtype=np.float64).ravel() for array in arrays.values()]) if arrays \
+        else np.zeros(0)
+
+    data_file = TEMPLATE_STORE_DATA.format(version=version)
+    np.save(os.path.join(directory, data_file), data)
+    index = {'version': version, 'data_file': data_file, 'entries': entries, 'thresholds': thresholds,
+             'regions': regions or {}}
+    temporary_path = index_path + '.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump(index, file, indent=2, ensure_ascii=False)
+    os.replace(temporary_path, index_path)
+
+    # keeps the previous version for processes that have not swapped yet
+    for old_version in range(1, previous):
+        old_path = os.path.join(directory, TEMPLATE_STORE_DATA.format(version=old_version))
+        if os.path.exists(old_path):
+            os.remove(old_path)
+    return version
+
+
+# store that the requests read from; replaced as a whole on reload
+_current_store: Optional[TemplateStore] = None
+
+
+def current_template_store() -> Optional[TemplateStore]:
+    """
+    Returns the store that is currently served, without checking the disk.
+
+    :return: The template store, or None if none was loaded.
+    """
+    return _current_store
+
+
+def reload_template_store(directory: str) -> bool:
+    """
+    Loads the store of a directory if its index changed since the current store was loaded, swaps it in and calls
+    STORE_RELOAD_CALLBACKS.
+
+    :param directory: The parametric directory.
+    :return: True if a new store was swapped in, False if the store is unchanged or the directory has none.
+    """
+    global _current_store
+    index_path = os.path.join(directory, TEMPLATE_STORE_INDEX)
+    if not os.path.exists(index_path):
+        return False
+    current = _current_store
+    if current is not None and current.directory == directory and current.modified == os.stat(index_path).st_mtime:
+        return False
+
+    _current_store = TemplateStore.load(directory)
+    for callback in STORE_RELOAD_CALLBACKS:
+        callback()
+    return True
+
+
+def watch_template_store(directory: str, interval: float = STORE_RELOAD_INTERVAL) -> Tuple[threading.Thread,
+                                                                                            threading.Event]:
+    """
+    Starts a background thread that reloads the store whenever its index changes.
+
+    :param directory: The parametric directory.
+    :param interval: The seconds between two checks.
+    :return: The thread and the event that stops it.
+    """
+    stopped = threading.Event()
+
+    def watch():
+        while not stopped.wait(interval):
+            try:
+                reload_template_store(directory)
+            except (OSError, ValueError, KeyError) as error:
+                # keeps serving the current store if a new version cannot be read
+                print(f"Template store not reloaded: {error}")
+
+    thread = threading.Thread(target=watch, name='template-store-watcher', daemon=True)
+    thread.start()
+    return thread, stopped
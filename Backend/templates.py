@@ -0,0 +1,185 @@
+"""
+Functions to describe and maintain the Bézier curve templates of the parametric signs.
+"""
+import glob
+import json
+import os
+from typing import List, Dict, Union, Optional
+import numpy as np
+from extraction import split_touch_locations_two_curves, split_touch_locations_three_curves
+from matching import ENVELOPE_SUFFIX, save_template_envelope
+from parameterisation import fit_bezier_batch
+from recognition import DTW_THRESHOLDS, recogniser_metric
+from template_store import TemplateStore, TEMPLATE_STORE_INDEX, write_template_store
+
+# directory of the parametric signs, relative to this file
+PARAMETRIC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Parametric')
+# suffix of the key of the control points of a template in the template store
+CONTROLS_SUFFIX = '_controls.npy'
+# prefix of the keys of the template bank curves fitted from recordings in the template store, followed by
+# '<sign>/<stroke>/<recording>' with the path of the recording relative to the parametric directory
+BANK_KEY_PREFIX = 'bank/'
+# directory of the curves that the frontend displays, relative to the parametric directory
+DISPLAY_DIRECTORY = 'Templates'
+# files of the display directory that are no templates
+DISPLAY_EXCLUDED = ('data.json',)
+
+# templates of the recognisers used by the endpoint: the degree of their Bézier curves and one template file per curve,
+# relative to the parametric directory
+SIGN_TEMPLATES: Dict[str, Dict[str, Union[int, List[str]]]] = {
+    'CH': {'degree': 1, 'templates': ['sign_ch/bezier1_upper_curve_template.npy',
+                                      'sign_ch/bezier2_lower_curve_template.npy']},
+    'G': {'degree': 1, 'templates': ['sign_g/bezier_curve_template.npy']},
+    'H': {'degree': 1, 'templates': ['sign_h/bezier_curve_template.npy']},
+    'J': {'degree': 3, 'templates': ['sign_j/bezier_curve_template.npy']},
+    'LL': {'degree': 4, 'templates': ['sign_ll/bezier1_upper_curve_template.npy',
+                                      'sign_ll/bezier2_lower_curve_template.npy']},
+    'RR': {'degree': 4, 'templates': ['sign_rr/bezier1_curve_template.npy', 'sign_rr/bezier2_curve_template.npy']},
+    'V': {'degree': 4, 'templates': ['sign_v/bezier1_curve_template.npy', 'sign_v/bezier2_curve_template.npy']},
+    'W': {'degree': 4, 'templates': ['sign_w/bezier1_curve_template.npy', 'sign_w/bezier2_curve_template.npy',
+                                     'sign_w/bezier3_curve_template.npy']},
+    'Y': {'degree': 1, 'templates': ['sign_y/bezier_curve_template.npy']},
+    'Z': {'degree': 3, 'templates': ['sign_z/bezier_curve_template_cubic.npy']},
+    'Ñ': {'degree': 4, 'templates': ['sign_ñ/bezier_curve_single_template.npy']},
+}
+
+# specification of every multi-curve sign: the number of curves, the degree of their Bézier curves, one template file
+# per curve relative to the parametric directory, and the Dynamic Time Warping threshold of every template
+MULTI_CURVE_SIGNS: Dict[str, Dict[str, Union[int, List[str], List[float]]]] = {
+    'CH': {'num_curves': 2, 'degree': 1, 'templates': ['sign_ch/bezier1_upper_curve_template.npy',
+                                                       'sign_ch/bezier2_lower_curve_template.npy'],
+           'thresholds': [5000.0, 5000.0]},
+    'LL': {'num_curves': 2, 'degree': 4, 'templates': ['sign_ll/bezier1_upper_curve_template.npy',
+                                                       'sign_ll/bezier2_lower_curve_template.npy'],
+           'thresholds': [7000.0, 7000.0]},
+    'RR': {'num_curves': 2, 'degree': 4, 'templates': ['sign_rr/bezier1_curve_template.npy',
+                                                       'sign_rr/bezier2_curve_template.npy'],
+           'thresholds': [5000.0, 5000.0]},
+    'V': {'num_curves': 2, 'degree': 4, 'templates': ['sign_v/bezier1_curve_template.npy',
+                                                      'sign_v/bezier2_curve_template.npy'],
+          'thresholds': [5000.0, 5000.0]},
+    'W': {'num_curves': 3, 'degree': 4, 'templates': ['sign_w/bezier1_curve_template.npy',
+                                                      'sign_w/bezier2_curve_template.npy',
+                                                      'sign_w/bezier3_curve_template.npy'],
+          'thresholds': [5000.0, 5000.0, 5000.0]},
+    'Ñ': {'num_curves': 2, 'degree': 4, 'templates': ['sign_ñ/bezier1_curve_template.npy',
+                                                      'sign_ñ/bezier2_curve_template.npy'],
+          'thresholds': [5000.0, 5000.0]},
+}
+
+# variants of the recognisers that compare with their own templates, kept to compare their accuracy: the sign, the
+# degree of their Bézier curves, one template file per curve relative to the parametric directory, and the Dynamic Time
+# Warping threshold of every template
+SIGN_VARIANTS: Dict[str, Dict[str, Union[str, int, List[str], List[float]]]] = {
+    'W single curve': {'sign': 'W', 'degree': 4, 'templates': ['sign_w/bezier_curve_single_template.npy'],
+                       'thresholds': [3000.0]},
+    'Z quartic': {'sign': 'Z', 'degree': 4, 'templates': ['sign_z/bezier_curve_template_quartic.npy'],
+                  'thresholds': [3000.0]},
+}
+
+
+def split_recording(sign: str, locations: List[List[float]]) -> List[List[List[float]]]:
+    """
+    Splits the touch locations of a recorded gesture into as many curves as the sign has templates.
+
+    :param sign: A string indicating which sign is parsed.
+    :param locations: A list of touch locations, where each location is a list of x and y coordinates.
+    :return: A list of curves, each a list of touch locations.
+    """
+    num_curves = len(SIGN_TEMPLATES[sign]['templates'])
+    if num_curves == 1:
+        return [locations]
+    if num_curves == 2:
+        return list(split_touch_locations_two_curves(sign, locations))
+    return list(split_touch_locations_three_curves(locations))
+
+
+def save_template_envelopes(parametric_directory: str = PARAMETRIC_DIRECTORY) -> List[str]:
+    """
+    Stores the envelope of every template file of the sign directories next to the template, for the lower bounds of
+    the template matcher. Needs to be executed again whenever a template is refitted.
+
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :return: The paths of the templates whose envelopes were stored.
+    """
+    template_paths = [path for path in sorted(glob.glob(os.path.join(parametric_directory, 'sign_*', '*template*.npy')))
+                      if not path.endswith(ENVELOPE_SUFFIX)]
+    for template_path in template_paths:
+        save_template_envelope(template_path)
+    return template_paths
+
+
+def template_thresholds() -> Dict[str, Dict[str, Union[str, float]]]:
+    """
+    Returns the metric and threshold of every template that a recogniser compares with, taken from the same
+    specification as the recogniser: SIGN_TEMPLATES with DTW_THRESHOLDS for the single-curve recognisers,
+    MULTI_CURVE_SIGNS for the multi-curve recognisers and SIGN_VARIANTS for their variants.
+
+    :return: The metric and threshold of every template, keyed by the path of the template file relative to the
+    parametric directory.
+    :raises ValueError: If two recognisers compare the same template on different metrics or thresholds.
+    """
+    recognisers = [(sign, templates['templates'], [DTW_THRESHOLDS[sign]] * len(templates['templates']))
+                   for sign, templates in SIGN_TEMPLATES.items() if sign not in MULTI_CURVE_SIGNS
+                   or templates['templates'] != MULTI_CURVE_SIGNS[sign]['templates']]
+    recognisers += [(sign, spec['templates'], spec['thresholds']) for sign, spec in MULTI_CURVE_SIGNS.items()]
+    recognisers += [(spec['sign'], spec['templates'], spec['thresholds']) for spec in SIGN_VARIANTS.values()]
+    thresholds = {}
+    for sign, paths, dtw_thresholds in recognisers:
+        metric, values = recogniser_metric(sign, dtw_thresholds)
+        for path, value in zip(paths, values):
+            entry = {'metric': metric, 'threshold': float(value)}
+            if thresholds.setdefault(path, entry) != entry:
+                raise ValueError(f"The template {path} has the thresholds {thresholds[path]} and {entry}")
+    return thresholds
+
+
+def save_template_store(parametric_directory: str = PARAMETRIC_DIRECTORY,
+                        bank_arrays: Optional[Dict[str, np.ndarray]] = None) -> int:
+    """
+    Packs every template file of the sign directories with its envelope, the control points of the templates of
+    SIGN_TEMPLATES, the curves of the display directory, the further templates of the template bank, the metric and
+    threshold of every template, see template_thresholds, and the region templates of the tap signs into a new version
+    of the template store, see template_store.py. Running servers swap to the new version without a restart. Needs to
+    be executed again whenever a template or threshold is changed.
+
+    :param parametric_directory: The 'Parametric' directory that contains the sign directories.
+    :param bank_arrays: The curves of the template bank fitted from recordings, see TemplateBank.store_arrays. Those of
+    the current version of the store are kept if omitted.
+    :return: The new version of the store.
+    """
+    arrays = {}
+    for path in sorted(glob.glob(os.path.join(parametric_directory, 'sign_*', '*template*.npy'))):
+        arrays[os.path.relpath(path, parametric_directory).replace(os.sep, '/')] = np.load(path)
+
+    for sign, templates in SIGN_TEMPLATES.items():
+        curves = [arrays[path] for path in templates['templates']]
+        for path, controls in zip(templates['templates'], fit_bezier_batch(curves, degree=templates['degree'])):
+            arrays[path[:-len('.npy')] + CONTROLS_SUFFIX] = controls
+
+    thresholds = template_thresholds()
+
+    for path in sorted(glob.glob(os.path.join(parametric_directory, DISPLAY_DIRECTORY, '*.json'))):
+        if os.path.basename(path) not in DISPLAY_EXCLUDED:
+            with open(path) as file:
+                arrays[f'{DISPLAY_DIRECTORY}/{os.path.basename(path)}'] = np.array(json.load(file), dtype=float)
+
+    # keeps the curves of the template bank, which are fitted from recordings by template_bank.py
+    if bank_arrays is None and os.path.exists(os.path.join(parametric_directory, TEMPLATE_STORE_INDEX)):
+        previous = TemplateStore.load(parametric_directory)
+        bank_arrays = {key: np.array(previous.array(key)) for key in previous.entries
+                       if key.startswith(BANK_KEY_PREFIX)}
+    arrays.update(bank_arrays or {})
+
+    regions = {}
+    for path in sorted(glob.glob(os.path.join(parametric_directory, 'sign_*', '*region*.json'))):
+        with open(path) as file:
+            regions[os.path.relpath(path, parametric_directory).replace(os.sep, '/')] = json.load(file)
+
+    return write_template_store(parametric_directory, arrays, thresholds, regions)
+
+
+# # executed once to store the template envelopes and store
+# if __name__ == '__main__':
+#     save_template_envelopes()
+#     save_template_store()
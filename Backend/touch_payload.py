@@ -0,0 +1,155 @@
+"""
+Compact formats of the touch data of a request, alternatives to the JSON array of touch points, which is the most
+expensive layout to parse and convert. Both formats are read straight into the arrays of a Gesture.
+
+The binary format is accepted when the request has the Content-Type BINARY_CONTENT_TYPE. The body is a small header
+followed by the touch points as (t, x, y) triples of float32 or float64 and, optionally, the touch identifier of every
+point as int32, all little-endian:
+
+    magic       4 bytes     b'TCHD'
+    version     uint8       BINARY_VERSION
+    float size  uint8       4 for float32, 8 for float64
+    flags       uint16      FLAG_TOUCH_IDS if touch identifiers follow the triples
+    count       uint32      number of touch points
+    padding     4 bytes     aligns the start time and the triples to 8 bytes
+    start time  float64     absolute time of the first touch point
+    triples     count * 3 floats, timestamps relative to the start time
+    ids         count int32, if FLAG_TOUCH_IDS is set
+
+The timestamps are relative to the start time, so that float32 keeps millisecond precision, as in Stroke. The body is
+read with np.frombuffer without copying it; the gesture then converts the strided columns into its contiguous arrays
+once, without any intermediate Python objects.
+
+The columnar JSON format is a JSON object with one list per column, {"t": [...], "x": [...], "y": [...]} and
+optionally "id": [...], with absolute timestamps as in the JSON array. It is told apart from the JSON array by its
+type; every column is decoded into a numpy array at once and validated strictly.
+"""
+import struct
+from typing import List, Dict, Union, Optional
+import numpy as np
+from gesture import Gesture
+
+# Content-Type of a request with a binary body
+BINARY_CONTENT_TYPE = 'application/vnd.touch-data'
+BINARY_MAGIC = b'TCHD'
+BINARY_VERSION = 1
+# flag of a body that contains the touch identifiers
+FLAG_TOUCH_IDS = 1
+
+# layout of the header: magic, version, float size, flags, count, padding, start time
+BINARY_HEADER = struct.Struct('<4sBBHI4xd')
+# data type of the triples by float size
+BINARY_FLOAT_TYPES = {4: np.dtype('<f4'), 8: np.dtype('<f8')}
+BINARY_ID_TYPE = np.dtype('<i4')
+
+# columns of the columnar JSON format, which need to be present, and the optional column of the touch identifiers
+COLUMNAR_COLUMNS = ('t', 'x', 'y')
+COLUMNAR_ID_COLUMN = 'id'
+
+
+def pack_binary_touches(timestamps: Union[List[float], np.ndarray], locations: Union[List[List[float]], np.ndarray],
+                        touch_ids: Optional[Union[List[int], np.ndarray]] = None, float_size: int = 4) -> bytes:
+    """
+    Packs touch data into the binary format, as the touch screen sends it.
+
+    :param timestamps: The absolute timestamps of the touch points.
+    :param locations: The touch locations, where each location is a list of x and y coordinates.
+    :param touch_ids: Optional identifier of the finger of every touch point.
+    :param float_size: 4 for float32 or 8 for float64 triples.
+    :return: The body of the request.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    start_time = float(timestamps[0]) if len(timestamps) else 0.0
+    triples = np.column_stack([timestamps - start_time, np.reshape(locations, (-1, 2))])
+    flags = 0 if touch_ids is None else FLAG_TOUCH_IDS
+    body = [BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, float_size, flags, len(timestamps), start_time),
+            triples.astype(BINARY_FLOAT_TYPES[float_size]).tobytes()]
+    if touch_ids is not None:
+        body.append(np.asarray(touch_ids).astype(BINARY_ID_TYPE).tobytes())
+    return b''.join(body)
+
+
+def parse_binary_touches(body: bytes) -> Gesture:
+    """
+    Reads a body in the binary format into a gesture.
+
+    :param body: The body of the request.
+    :return: The gesture.
+    :raises ValueError: If the body is not in the binary format or its length does not match its header.
+    """
+    if len(body) < BINARY_HEADER.size:
+        raise ValueError("Touch data shorter than its header")
+    magic, version, float_size, flags, count, start_time = BINARY_HEADER.unpack_from(body)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Touch data not in the binary format")
+    if float_size not in BINARY_FLOAT_TYPES:
+        raise ValueError(f"Unsupported float size: {float_size}")
+
+    float_type = BINARY_FLOAT_TYPES[float_size]
+    has_ids = bool(flags & FLAG_TOUCH_IDS)
+    expected = BINARY_HEADER.size + count * (3 * float_type.itemsize + has_ids * BINARY_ID_TYPE.itemsize)
+    if len(body) != expected:
+        raise ValueError(f"Touch data of {len(body)} bytes, expected {expected} for {count} points")
+
+    # views of the body, which are only copied into the contiguous arrays of the gesture
+    triples = np.frombuffer(body, dtype=float_type, count=3 * count, offset=BINARY_HEADER.size).reshape(count, 3)
+    touch_ids = None
+    if has_ids:
+        touch_ids = np.frombuffer(body, dtype=BINARY_ID_TYPE, count=count,
+                                  offset=BINARY_HEADER.size + triples.nbytes)
+    if not np.isfinite(triples).all():
+        raise ValueError("Touch data contains values that are not finite")
+    return Gesture(triples[:, 0], triples[:, 1:], touch_ids, start_time=start_time)
+
+
+def columnar_array(data: Dict, column: str, kinds: str) -> np.ndarray:
+    """
+    Decodes a column of the columnar JSON format into a numpy array at once.
+
+    :param data: The touch data in the columnar JSON format.
+    :param column: The name of the column.
+    :param kinds: The accepted kinds of numpy data types, e.g. 'iuf' for numbers; booleans and strings are rejected.
+    :return: The one-dimensional array of the column.
+    :raises ValueError: If the column is not a flat list of values of the accepted kinds.
+    """
+    values = data[column]
+    if not isinstance(values, list):
+        raise ValueError(f"Column '{column}' is not a list")
+    # booleans are integers in Python, so a list that mixes them with numbers is converted to a numeric array
+    if any(isinstance(value, bool) for value in values):
+        raise ValueError(f"Column '{column}' contains booleans")
+    array = np.asarray(values)
+    if array.ndim != 1 or (array.size and array.dtype.kind not in kinds):
+        raise ValueError(f"Column '{column}' is not a flat list of {'integers' if kinds == 'iu' else 'numbers'}")
+    return array
+
+
+def parse_columnar_touches(data: Dict[str, List[Union[float, int]]]) -> Gesture:
+    """
+    Reads touch data in the columnar JSON format into a gesture.
+
+    :param data: The touch data as decoded from JSON, with the columns 't', 'x', 'y' and optionally 'id'.
+    :return: The gesture.
+    :raises ValueError: If a column is missing, unknown, not numeric or not finite, or the columns differ in length.
+    """
+    missing = set(COLUMNAR_COLUMNS) - set(data)
+    if missing:
+        raise ValueError(f"Columns missing from the touch data: {sorted(missing)}")
+    unknown = set(data) - set(COLUMNAR_COLUMNS) - {COLUMNAR_ID_COLUMN}
+    if unknown:
+        raise ValueError(f"Unknown columns in the touch data: {sorted(unknown)}")
+
+    timestamps, x, y = (columnar_array(data, column, 'iuf') for column in COLUMNAR_COLUMNS)
+    touch_ids = columnar_array(data, COLUMNAR_ID_COLUMN, 'iu') if COLUMNAR_ID_COLUMN in data else None
+    lengths = {len(timestamps), len(x), len(y)} | ({len(touch_ids)} if touch_ids is not None else set())
+    if len(lengths) > 1:
+        raise ValueError("Columns of the touch data differ in length")
+
+    locations = np.empty((len(x), 2), dtype=np.float32)
+    locations[:, 0], locations[:, 1] = x, y
+    if not (np.isfinite(timestamps).all() and np.isfinite(locations).all()):
+        raise ValueError("Touch data contains values that are not finite")
+    if touch_ids is not None and len(touch_ids) and not (np.iinfo(np.int32).min <= touch_ids.min() and
+                                                         touch_ids.max() <= np.iinfo(np.int32).max):
+        raise ValueError("Touch identifiers out of range")
+    return Gesture(timestamps, locations, touch_ids)